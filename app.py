@@ -1,8 +1,37 @@
 import os
+
+# Startup profile (twin/startup.py): phase timings, readiness, lazy subsystems.
+# Created first so the import phase is measured too.
+from twin.startup import Startup
+STARTUP = Startup()
+
+import json
+import time
 import logging
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, redirect, url_for
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
+
+from twin.registry import AssetRegistry, AssetState, RegistryFull, DEFAULT_ASSET, room_for
+from twin.fanout import Broadcaster, subscription_args
+from twin.history import RingHistory, to_epoch, iso
+from twin.rollup import Rollups
+from twin.api import history_json, range_args, signal_args, pick_source, cached_json, max_points_arg
+from twin.seglog import LogStore
+from twin.wire import PackedSchema, PACKED, FLAG_RUNNING, packed_room
+from twin import metrics
+from twin.pipeline import IngestQueue, QueueFull, QUEUE_MAX
+from twin.analytics import AssetAnalytics, detect_signals
+from twin.perfmap import PerformanceMap
+from twin.backplane import Backplane, BackplaneUnavailable
+from twin.replay import ReplayEngine, ReplayError, parse_speed
+from twin.schema import Validator, SchemaError, sample_epoch
+from twin.shell import StaticAssets, Shell, gzip_json
+from twin.alarms import AssetAlarms, history_args, INPUTS as ALARM_INPUTS
+
+# only some requests need these: imported on first use (or by the opt-in warm-up, WGC_WARM_DELAY_S)
+export = STARTUP.lazy("twin.export")
+report = STARTUP.lazy("twin.report")
+STARTUP.mark("imports")
 
 # ----------------- Logging: keep console clean -----------------
 def _init_logging():
@@ -38,24 +67,84 @@ socketio = SocketIO(
     logger=False,
     engineio_logger=False
 )
+STARTUP.mark("socketio")
 
 # ----------------- State -----------------
-wgc_state = {
-    "oper": {
-        "T1": None, "T2": None,   # K
-        "P1": None, "P2": None,   # bar
-        "flow": None,             # kg/s
-        "speed": None,            # rpm
-        "valve": None             # %
-    },
-    "health": {
-        "v_ax": 0.0, "v_vert": 0.0, "v_horz": 0.0,        # mm/s
-        "oil_pressure": None, "bearing_temp": None,
-        "oil_temp": None, "seal_leak": None
-    },
-    "ts": None
-}
-running = False  # server-side run flag
+def _new_asset(asset_id):
+    st = AssetState(
+        asset_id,
+        oper={
+            "T1": None, "T2": None,   # K
+            "P1": None, "P2": None,   # bar
+            "flow": None,             # kg/s
+            "speed": None,            # rpm
+            "valve": None             # %
+        },
+        health={
+            "v_ax": 0.0, "v_vert": 0.0, "v_horz": 0.0,        # mm/s
+            "oil_pressure": None, "bearing_temp": None,
+            "oil_temp": None, "seal_leak": None
+        },
+        running=False  # server-side run flag (per asset)
+    )
+    st.analytics = AssetAnalytics(HISTORY_COLUMNS, detect=ANOMALY_SIGNALS)
+    st.alarms = AssetAlarms(asset_id)
+    return st
+
+# server-side history: one float column per oper/health signal
+OPER_FIELDS = ("T1", "T2", "P1", "P2", "flow", "speed", "valve")
+HEALTH_FIELDS = ("v_ax", "v_vert", "v_horz", "oil_pressure", "bearing_temp", "oil_temp", "seal_leak")
+HISTORY_COLUMNS = OPER_FIELDS + HEALTH_FIELDS
+# declared telemetry schema (twin/schema.py), presented under this app's field names;
+# samples are parsed once at ingest into (slot, value) pairs
+SCHEMA = Validator(("oper", "health"), present={
+    "vib_axial": "v_ax", "vib_vert": "v_vert", "vib_horz": "v_horz",
+    "lube_oil_pressure": "oil_pressure", "seal_leakage": "seal_leak"})
+HISTORY_SLOTS = SCHEMA.slots(HISTORY_COLUMNS)
+# alarm inputs (twin/alarms.py) by canonical name, read from the slot-ordered values
+ALARM_SLOTS = [(s.name, i) for i, s in enumerate(SCHEMA.signals) if s.name in ALARM_INPUTS]
+# rolling stats cover every column; spike/drift detection these (WGC_ANOMALY_SIGNALS)
+ANOMALY_SIGNALS = detect_signals(("v_ax", "v_vert", "v_horz", "oil_pressure", "bearing_temp", "oil_temp", "seal_leak"))
+
+assets = AssetRegistry(_new_asset)
+assets.get_or_create(DEFAULT_ASSET)
+
+# Optional scale-out (WGC_BACKPLANE): ingest and commands are published to a
+# backplane and every worker applies every event in the same order, so all
+# workers hold the same state and each serves its own dashboards.
+backplane = Backplane.from_env()
+
+# Optional durable history (WGC_LOG_DIR): append-only segment log per asset,
+# flushed by a background task; history is reloaded from it at startup.
+logstore = LogStore.from_env(HISTORY_COLUMNS)
+
+# Performance map (synthetic, or WGC_PERFMAP=<file.npz>): built once, looked up per sample
+PERF_MAP = PerformanceMap.from_env()
+
+def _wgc_payload(st):
+    return {"wgc": {"oper": st.oper, "health": st.health, "kpi": st.kpi, "ts": st.ts},
+            "asset": st.asset_id, "running": st.running}
+
+# Opt-in compact push (?wire=packed): `wgc_schema` once, then binary
+# `wgc_packed` frames (asset, frame) instead of JSON payloads.
+PUSH_SCHEMA = PackedSchema([("oper", f) for f in OPER_FIELDS] + [("health", f) for f in HEALTH_FIELDS])
+
+def _packed_frame(st):
+    frame = PUSH_SCHEMA.pack({"oper": st.oper, "health": st.health}, to_epoch(st.ts),
+                             FLAG_RUNNING if st.running else 0)
+    return (st.asset_id, frame)
+
+# Dashboards get a full `wgc_data` snapshot on connect, then `wgc_delta`
+# (changed fields only) at most WGC_MAX_CLIENT_HZ times per second.
+fanout = Broadcaster(socketio, _wgc_payload, "wgc_data", "wgc_delta",
+                     packed=("wgc_packed", _packed_frame))
+
+# Hot-path metrics (WGC_METRICS=1), scraped from /metrics
+INGEST_SECONDS = metrics.histogram("wgc_ingest_seconds", "Ingest handler latency (seconds)")
+INGEST_SAMPLES = metrics.counter("wgc_ingest_samples_total", "Samples applied")
+INGEST_REQUESTS = metrics.counter("wgc_ingest_requests_total", "Ingest requests by HTTP status", ("status",))
+metrics.register_app(socketio, assets)
+STARTUP.mark("state")
 
 # ----------------- Routes -----------------
 @app.route("/favicon.ico")
@@ -67,70 +156,597 @@ def index():
     # You can keep a simple home or redirect straight to the dashboard
     return redirect(url_for("wgc"))
 
+# The dashboard is a static shell, rendered once and served with an ETag;
+# state comes from /api/wgc/bootstrap.  Static files are fingerprinted.
+STATIC = StaticAssets(app.static_folder)
+BOOTSTRAP_WINDOW = float(os.getenv("WGC_BOOTSTRAP_WINDOW", "1800"))   # seconds of history
+app.jinja_env.globals["asset_url"] = STATIC.url
+
+def _render_shell():
+    with app.app_context():
+        return render_template("wgc.html")
+
+SHELL = Shell(_render_shell)
+
 @app.route("/wgc")
 def wgc():
-    # Bootstrap snapshot for the client
-    snap = {
-        "oper": wgc_state["oper"],
-        "health": wgc_state["health"],
-        "ts": wgc_state["ts"],
-        "running": running
-    }
-    return render_template("wgc.html", wgc=snap)
+    # the asset (?asset=<id>) is read by the page itself
+    return SHELL.response(request)
+
+@app.get("/assets/<path:name>")
+def static_asset(name):
+    resp = STATIC.response(name, request)
+    if resp is None:
+        return jsonify({"ok": False, "error": "not found"}), 404
+    return resp
+
+@app.get("/api/wgc/bootstrap")
+def wgc_bootstrap():
+    # snapshot + the last ?window= seconds (default 1800) downsampled to ?max_points=,
+    # in one gzipped response so a (re)connecting dashboard paints at once
+    asset_id = request.args.get("asset", DEFAULT_ASSET)
+    st = assets.get(asset_id)
+    if st is None:
+        body = {"snapshot": _new_asset(asset_id).snapshot(), "history": None}
+        return gzip_json(json.dumps(body, separators=(",", ":")), request)
+    try:
+        args = request.args.to_dict()
+        args["from"] = -abs(float(args.pop("window", BOOTSTRAP_WINDOW)))
+        hist = _history_source(st, max_points=max_points_arg(args))
+        body = {"snapshot": st.snapshot(), "history": history_json(hist, args)}
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return gzip_json(json.dumps(body, separators=(",", ":")), request)
+
+@app.get("/api/wgc/history")
+def wgc_history():
+    # ?asset=&from=&to=&signals=&max_points=&method=minmax|lttb[&tier=&agg=&resolution=]
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    try:
+        hist = _history_source(st, max_points=max_points_arg(request.args))
+        return jsonify(history_json(hist, request.args))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+def _export(fmt):
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    try:
+        hist = _history_source(st)
+        t0, t1 = range_args(request.args, hist)
+        signals = signal_args(request.args, hist)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    name = f"{st.asset_id}_history"
+    if getattr(hist, "label", None):
+        name += f"_{hist.label}_{hist.agg}"
+    if fmt == "csv":
+        return Response(export.iter_csv(hist, t0, t1, signals), mimetype="text/csv",
+                        headers={"Content-Disposition": f"attachment; filename={name}.csv"})
+    return Response(export.iter_binary(hist, t0, t1, signals), mimetype=export.BINARY_MIMETYPE,
+                    headers={"Content-Disposition": f"attachment; filename={name}.wgcb"})
+
+# Streaming exports (?asset=&from=&to=&signals=), generated chunk by chunk
+@app.get("/api/wgc/history.csv")
+def wgc_history_csv():
+    return _export("csv")
+
+@app.get("/api/wgc/history.bin")
+def wgc_history_bin():
+    return _export("bin")
+
+@app.get("/api/assets")
+def list_assets():
+    return jsonify([{"asset": st.asset_id, "running": st.running, "ts": st.ts} for st in assets])
+
+@app.get("/api/wgc/map")
+def wgc_map():
+    # immutable for the life of the process: encoded once, ETag + Cache-Control
+    return cached_json(*PERF_MAP.body, request)
+
+@app.get("/api/wgc/schema")
+def wgc_schema():
+    return jsonify(SCHEMA.describe())
+
+@app.get("/api/wgc/operating-point")
+def wgc_operating_point():
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    return jsonify({"asset": st.asset_id, "ts": st.ts, "flow": st.oper.get("flow"),
+                    "speed": st.oper.get("speed"), **st.kpi})
+
+@app.get("/api/wgc/stats")
+def wgc_stats():
+    # rolling per-signal stats and recent anomalies (?asset=)
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    return jsonify({"asset": st.asset_id, **st.analytics.summary()})
+
+@app.get("/api/wgc/alarms")
+def wgc_alarms():
+    # raised alarms and cleared ones awaiting acknowledgement (?asset=)
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    return jsonify({"asset": st.asset_id, "active": st.alarms.active()})
+
+@app.get("/api/wgc/alarms/history")
+def wgc_alarm_history():
+    # ?asset=&from=&to=&type=&severity=Warn|Trip&event=raise|escalate|deescalate|clear|ack&id=&limit=
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    try:
+        events = st.alarms.log.query(**history_args(request.args))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"asset": st.asset_id, "events": events})
+
+@app.post("/api/wgc/alarms/ack")
+def wgc_alarm_ack():
+    # {"id": <occurrence>} or {"type": "Surge"}; neither = every unacknowledged alarm of the asset
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    _alarm_ack(st, request.get_json(silent=True) or {})
+    return jsonify({"ok": True, "asset": st.asset_id})
+
+@app.get("/api/wgc/report")
+def wgc_report():
+    # ?asset=&period=day|shift&at=<epoch|ISO, default now>; 202 + Retry-After while it is built
+    st = assets.get(request.args.get("asset", DEFAULT_ASSET))
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    try:
+        rep, pending = reports.get(st.asset_id, request.args.get("period", "day"),
+                                   to_epoch(request.args.get("at")))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if rep is None:
+        return jsonify({"ok": True, **pending}), 202, {"Retry-After": "1"}
+    # a finished period never changes; a running one is revalidated by ETag
+    return cached_json(rep.body, rep.etag, request, max_age=86400 if rep.complete else 0)
+
+@app.get("/api/wgc/reports")
+def wgc_reports():
+    # built and queued reports (?asset= to filter)
+    return jsonify(reports.list(request.args.get("asset")))
+
+@app.get("/api/ingest")
+def ingest_stats():
+    if ingest_queue is None:
+        return jsonify({"policy": "inline", "depth": 0})
+    return jsonify(ingest_queue.stats())
+
+@app.get("/api/backplane")
+def backplane_stats():
+    if backplane is None:
+        return jsonify({"url": None, "worker": os.getpid()})
+    return jsonify({**backplane.stats(), "worker": os.getpid(),
+                    "log_writer": bool(logstore and logstore.writer)})
+
+@app.get("/api/wgc/replay")
+def replay_list():
+    return jsonify([s.describe() for s in replays.sessions.values()])
+
+@app.post("/api/wgc/replay")
+def replay_start():
+    # {"asset", "target", "from", "to", "speed": 1|10|100|"max", "source": "memory"|"log"}
+    body = request.get_json(silent=True) or {}
+    st = assets.get(body.get("asset") or DEFAULT_ASSET)
+    if st is None:
+        return jsonify({"ok": False, "error": "unknown asset"}), 404
+    target_id = body.get("target") or f"{st.asset_id}.replay"
+    try:
+        if target_id == st.asset_id:
+            raise ValueError("target must differ from the recorded asset")
+        speed = parse_speed(body.get("speed"))
+        source = body.get("source")
+        if source == "log":
+            hist = _durable(st)
+            if hist is None:
+                raise ValueError("no durable log (set WGC_LOG_DIR)")
+            hist.flush()
+        elif source == "memory":
+            hist = _history(st)
+        else:
+            hist = pick_source(_history(st), _durable(st), body)
+        t0, t1 = range_args(body, hist)
+        # only a valid request registers the target
+        target = assets.get_or_create(target_id)
+        _reset(target)
+        session = replays.start(hist, st.asset_id, target.asset_id, t0, t1, speed)
+    except (ValueError, ReplayError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except (RegistryFull, BackplaneUnavailable) as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    return jsonify({"ok": True, **session.describe()})
+
+@app.get("/api/wgc/replay/<session_id>")
+def replay_status(session_id):
+    session = replays.sessions.get(session_id)
+    if session is None:
+        return jsonify({"ok": False, "error": "unknown replay"}), 404
+    return jsonify(session.describe())
+
+@app.delete("/api/wgc/replay/<session_id>")
+def replay_stop(session_id):
+    session = replays.stop(session_id)
+    if session is None:
+        return jsonify({"ok": False, "error": "unknown replay"}), 404
+    return jsonify(session.describe())
+
+# Liveness vs readiness: /healthz answers while the process serves requests;
+# /readyz is 503 until setup has finished and the backplane (if any) is connected.
+@app.get("/healthz")
+def healthz():
+    return jsonify(STARTUP.status()[1])
+
+@app.get("/readyz")
+def readyz():
+    ready, body = STARTUP.status()
+    return jsonify(body), 200 if ready else 503
+
+@app.get("/metrics")
+def prometheus_metrics():
+    if not metrics.ENABLED:
+        return jsonify({"ok": False, "error": "metrics disabled (set WGC_METRICS=1)"}), 404
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 # Telemetry ingest (quiet)
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+def _history(st):
+    # allocated on first use; pages are committed only as rows are written
+    if st.history is None:
+        st.history = RingHistory(HISTORY_COLUMNS)
+        st.rollups = Rollups(HISTORY_COLUMNS)
+    return st.history
+
+def _history_source(st, max_points=None):
+    # raw rows, or the coarsest 1s/1m/1h rollup tier that meets the requested resolution
+    return pick_source(_history(st), _durable(st), request.args, st.rollups, max_points)
+
+def _durable(st):
+    if not logstore:
+        return None
+    # a worker that does not write the log still reads what the writer flushed
+    return logstore.logs.get(st.asset_id) if logstore.writer else logstore.get(st.asset_id)
+
+def _restore_history():
+    for asset_id in logstore.asset_ids():
+        try:
+            st = assets.get_or_create(asset_id)
+        except (ValueError, RegistryFull) as e:
+            log.warning("skipping logged asset %s: %s", asset_id, e)
+            continue
+        hist = _history(st)
+        if logstore.get(asset_id).load_into(hist):
+            st.ts = iso(hist.last_ts)
+            # rollups are rebuilt from the reloaded rows; older ranges are served from the log
+            st.rollups.load(hist)
+
+if logstore:
+    _restore_history()
+    # behind a backplane every worker sees every sample; one of them writes the log
+    if backplane is None or logstore.claim_writer():
+        logstore.start(socketio)
+    STARTUP.mark("history")
+
+# Daily / shift reports (twin/report.py), built from history by a background task
+def _report_source(asset_id, t0, t1):
+    st = assets.get(asset_id)
+    if st is None:
+        return None
+    return pick_source(_history(st), _durable(st), {"from": t0, "to": t1})
+
+def _report_service():
+    service = report.ReportService(socketio, _report_source, assets=lambda: [st.asset_id for st in assets],
+                                   rename=SCHEMA.canonical)
+    service.start()
+    return service
+
+# created (and its closed-period builds started) on the first report request
+reports = STARTUP.lazy("reports", _report_service)
+
+def _sample_epoch(sample):
+    # Producer timestamp (epoch seconds or ISO string, checked: SchemaError -> 400); fall back to arrival time
+    epoch = sample_epoch(sample.get("ts"))
+    return time.time() if epoch is None else epoch
+
+def _read_samples():
+    """Return the list of samples in the request body.
+
+    Accepts a single JSON object (legacy), a JSON array of objects,
+    ``{"samples": [...]}`` or a newline-delimited JSON stream.
+    """
+    if request.mimetype in NDJSON_TYPES:
+        lines = request.get_data(cache=False).splitlines()
+        samples = [json.loads(line) for line in lines if line.strip()]
+    else:
+        data = request.get_json(silent=True)
+        if data is None:
+            raise SchemaError("request body must be JSON")
+        if isinstance(data, dict) and isinstance(data.get("samples"), list):
+            samples = data["samples"]
+        elif isinstance(data, list):
+            samples = data
+        else:
+            samples = [data]
+    if not samples:
+        raise SchemaError("no samples in request")
+    return samples
+
+def _apply_sample(st, updates, epoch):
+    """Apply one parsed sample (``(slot, value)`` pairs); returns its anomalies and alarm transitions."""
+    vals = SCHEMA.apply(st, updates)
+    st.ts = iso(epoch)
+    # operating point on the map: head, efficiency, distance to surge
+    st.kpi = PERF_MAP.operating_point(st.oper.get("flow"), st.oper.get("speed")) or {}
+    values = [vals[i] for i in HISTORY_SLOTS]
+    epoch = _history(st).append(epoch, values)
+    st.rollups.append(epoch, values)
+    if logstore and logstore.writer:
+        logstore.get(st.asset_id).append(epoch, values)
+    inputs = {name: vals[i] for name, i in ALARM_SLOTS}
+    inputs["surge_margin_pct"] = st.kpi.get("surge_margin_pct")
+    events = st.alarms.update(epoch, inputs)
+    # only the fields this sample carried, so held-over values are not counted twice
+    return st.analytics.update(epoch, SCHEMA.named(updates)), events
+
+def _apply_batch(items):
+    # apply in order; each touched asset gets one (coalesced) broadcast.
+    # A sample that fails is skipped and counted; the rest of the batch still applies.
+    touched = {}
+    failed = 0
+    for st, updates, epoch in items:
+        try:
+            anomalies, alarms = _apply_sample(st, updates, epoch)
+        except Exception as e:
+            log.warning("ingest: sample for %s skipped: %s", st.asset_id, e)
+            failed += 1
+            continue
+        if anomalies or alarms:
+            room = room_for(st.asset_id)
+            targets = [*fanout.rooms(room), packed_room(room)]
+            for a in anomalies:
+                socketio.emit("wgc_anomaly", {"asset": st.asset_id, **a}, to=targets)
+            for ev in alarms:
+                socketio.emit("wgc_alarm", ev, to=targets)
+        touched[st.asset_id] = st
+    for st in touched.values():
+        fanout.publish(room_for(st.asset_id), st)
+    INGEST_SAMPLES.inc(len(items) - failed)
+    if touched:
+        STARTUP.ingested()
+    return failed
+
+# Ingest only validates and enqueues; a background worker applies the samples
+# (WGC_INGEST_QUEUE=0 applies them inline in the request instead).
+ingest_queue = IngestQueue(socketio, _apply_batch) if QUEUE_MAX > 0 else None
+
+def _submit(items):
+    if ingest_queue is None:
+        _apply_batch(items)
+    else:
+        ingest_queue.put(items)
+
+def _command(st, msg):
+    action = msg.get("action")
+    if action == "start":
+        st.running = True
+    elif action == "stop":
+        st.running = False
+    elif action == "setpoints":
+        st.setpoints(msg.get("speed"), msg.get("valve"))
+        st.values = None    # re-read from the section dicts on the next sample
+    fanout.publish(room_for(st.asset_id), st)
+
+def _reset(st):
+    # a replay target starts from an empty history so recorded timestamps apply as-is
+    if backplane is None:
+        _clear(st)
+    else:
+        backplane.publish({"op": "reset", "asset": st.asset_id})
+
+def _clear(st):
+    if st.history is not None:
+        st.history.clear()
+        st.rollups.clear()
+    st.analytics = AssetAnalytics(HISTORY_COLUMNS, detect=ANOMALY_SIGNALS)
+    st.alarms.clear()
+    if reports.loaded:
+        reports.forget(st.asset_id)
+
+def _ack_alarms(st, epoch, alarm_id=None, alarm_type=None):
+    room = room_for(st.asset_id)
+    for ev in st.alarms.ack(epoch, alarm_id, alarm_type):
+        socketio.emit("wgc_alarm", ev, to=[*fanout.rooms(room), packed_room(room)])
+
+def _alarm_ack(st, msg):
+    # behind a backplane every worker acknowledges (and tells its dashboards) at the same time
+    epoch = time.time()
+    alarm_id, alarm_type = msg.get("id"), msg.get("type")
+    if backplane is None:
+        _ack_alarms(st, epoch, alarm_id, alarm_type)
+    else:
+        backplane.publish({"op": "alarm_ack", "asset": st.asset_id, "ts": epoch, "id": alarm_id,
+                           "type": alarm_type})
+
+def _on_backplane(msg):
+    # every worker applies every event, in the backplane's order
+    st = assets.get_or_create(msg.get("asset") or DEFAULT_ASSET)
+    if msg.get("op") == "ingest":
+        try:
+            _submit([(st, updates, epoch) for epoch, updates in msg["samples"]])
+        except QueueFull:
+            pass    # counted as rejected by the queue
+    elif msg.get("op") == "command":
+        _command(st, msg)
+    elif msg.get("op") == "reset":
+        _clear(st)
+    elif msg.get("op") == "alarm_ack":
+        _ack_alarms(st, msg["ts"], msg.get("id"), msg.get("type"))
+
+if backplane:
+    backplane.start(socketio, _on_backplane)
+    # a worker that cannot see the other workers' events would serve a diverging state
+    STARTUP.check("backplane", lambda: backplane.connected)
+
+def _ingest(st, items):
+    if backplane is None:
+        _submit(items)
+    else:
+        # backpressure is judged on this worker's queue before the samples go out
+        if ingest_queue is not None:
+            ingest_queue.admit(len(items))
+        backplane.publish({"op": "ingest", "asset": st.asset_id,
+                           "samples": [[epoch, updates] for _, updates, epoch in items]})
+
+# Server-side replay: a recorded window is fed back through _ingest into a
+# target asset ("<asset>.replay" by default) at 1x/10x/100x/max speed.
+def _row_updates(values):
+    # a history row is already in schema units; only NaN (no reading) is dropped
+    return [(slot, round(v, 4)) for slot, v in zip(HISTORY_SLOTS, values) if v == v]
+
+def _replay_feed(asset_id, ts, rows):
+    st = assets.get_or_create(asset_id)
+    _ingest(st, [(st, _row_updates(values), epoch) for epoch, values in zip(ts, rows)])
+
+def _replay_notify(session):
+    room = room_for(session.target)
+    socketio.emit("wgc_replay", session.describe(), to=[*fanout.rooms(room), packed_room(room)])
+
+replays = ReplayEngine(socketio, _replay_feed, retry=(QueueFull, BackplaneUnavailable), notify=_replay_notify,
+                       busy=lambda: ingest_queue is not None and len(ingest_queue) > ingest_queue.maxsize // 2)
+
 @app.post("/ingest-wgc")
-def ingest_wgc():
-    global wgc_state
+@app.post("/ingest-wgc/<asset_id>")
+@metrics.timed(INGEST_SECONDS)
+def ingest_wgc(asset_id=DEFAULT_ASSET):
     try:
-        data = request.get_json(silent=True) or {}
-        oper = data.get("oper") or {}
-        health = data.get("health") or {}
-
-        # update state
-        wgc_state["oper"].update(oper)
-        wgc_state["health"].update(health)
-        wgc_state["ts"] = datetime.utcnow().isoformat() + "Z"
-
-        # broadcast to all dashboards (no noisy logs)
-        payload = {"wgc": {"oper": wgc_state["oper"],
-                           "health": wgc_state["health"],
-                           "ts": wgc_state["ts"]},
-                   "running": running}
-        socketio.emit("wgc_data", payload)
-        return jsonify({"ok": True})
+        # arrival time is stamped here, not when the worker gets to the sample
+        parsed = [(SCHEMA.parse(sample), _sample_epoch(sample)) for sample in _read_samples()]
+        # only a valid request registers its asset
+        st = assets.get_or_create(asset_id)
+        items = [(st, updates, epoch) for updates, epoch in parsed]
+        _ingest(st, items)
+        INGEST_REQUESTS.labels("200").inc()
+        # commanded setpoints ride back on the response so the simulator can follow them
+        return jsonify({"ok": True, "n": len(items), "running": st.running, "setpoints": st.commanded})
+    except QueueFull as e:
+        INGEST_REQUESTS.labels("429").inc()
+        return jsonify({"ok": False, "error": str(e)}), 429, {"Retry-After": "1"}
+    except (RegistryFull, BackplaneUnavailable) as e:
+        log.warning("ingest rejected: %s", e)
+        INGEST_REQUESTS.labels("503").inc()
+        return jsonify({"ok": False, "error": str(e)}), 503
+    except SchemaError as e:
+        # malformed telemetry is the producer's problem: answer, don't log
+        INGEST_REQUESTS.labels("400").inc()
+        return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
         # Only warn on errors
         log.warning("ingest error: %s", e)
+        INGEST_REQUESTS.labels("400").inc()
         return jsonify({"ok": False, "error": str(e)}), 400
 
 # ----------------- WebSocket events -----------------
 @socketio.on("connect")
 def ws_connect():
-    # Push a snapshot on connect
-    emit("wgc_data", {"wgc": wgc_state, "running": running})
+    # Join the requested asset's room (?asset=<id>, optionally &signals=&max_hz=) and push its snapshot
+    if request.args.get("wire") == PACKED:
+        emit("wgc_schema", PUSH_SCHEMA.describe())
+    try:
+        _, signals, hz = subscription_args(request.args)
+    except ValueError:
+        signals = hz = None
+    _join(request.args.get("asset", DEFAULT_ASSET), signals, hz)
+
+def _leave(asset_id):
+    room = room_for(asset_id)
+    for r in rooms():
+        if r == room or r.startswith(room + "/"):
+            leave_room(r)
+    leave_room(packed_room(room))
+
+def _join(asset_id, signals=None, hz=None):
+    room = room_for(asset_id)
+    st = assets.get(asset_id)
+    if st is not None:
+        emit("wgc_alarms", {"asset": asset_id, "active": st.alarms.active()})
+    if request.args.get("wire") == PACKED:
+        join_room(packed_room(room))
+        if st is not None:
+            emit("wgc_packed", _packed_frame(st))
+        return
+    if signals or hz:
+        # clients with the same (asset, signals, rate) share a group room
+        room = fanout.subscribe(room, signals, hz)
+    join_room(room)
+    if st is not None:
+        emit("wgc_data", fanout.baseline(room, st))
+
+@socketio.on("subscribe")
+def ws_subscribe(msg):
+    # {"asset": id | "assets": [ids], "signals": ["flow", "health.v_ax", "kpi"], "max_hz": 1};
+    # replaces this client's earlier subscription to those assets
+    try:
+        asset_ids, signals, hz = subscription_args(msg or {})
+    except ValueError as e:
+        emit("wgc_subscribed", {"ok": False, "error": str(e)})
+        return
+    asset_ids = asset_ids or [request.args.get("asset", DEFAULT_ASSET)]
+    for asset_id in asset_ids:
+        _leave(asset_id)
+        _join(asset_id, signals, hz)
+    emit("wgc_subscribed", {"ok": True, "assets": asset_ids, "signals": signals, "max_hz": hz})
+
+@socketio.on("unsubscribe")
+def ws_unsubscribe(msg):
+    asset_id = (msg or {}).get("asset")
+    if isinstance(asset_id, str):
+        _leave(asset_id)
+
+@socketio.on("wgc_alarm_ack")
+def ws_alarm_ack(msg):
+    # {"asset", "id" | "type"}; the resulting `ack` events go to every subscriber of the asset
+    msg = msg or {}
+    st = assets.get(msg.get("asset") or request.args.get("asset", DEFAULT_ASSET))
+    if st is not None:
+        _alarm_ack(st, msg)
 
 @socketio.on("wgc_command")
 def ws_wgc_command(msg):
-    global running
     try:
-        action = (msg or {}).get("action")
-        if action == "start":
-            running = True
-        elif action == "stop":
-            running = False
-        elif action == "setpoints":
-            spd = msg.get("speed")
-            v   = msg.get("valve")
-            if isinstance(spd, (int, float)):
-                wgc_state["oper"]["speed"] = float(spd)
-            if isinstance(v, (int, float)):
-                wgc_state["oper"]["valve"] = float(v)
+        msg = msg or {}
+        st = assets.get_or_create(msg.get("asset") or DEFAULT_ASSET)
+        action = msg.get("action")
+        if backplane is None:
+            _command(st, msg)
+            running = st.running
+        else:
+            # the newest start/stop and setpoints per asset are retained for workers that join later
+            retain = {"start": "run", "stop": "run", "setpoints": "setpoints"}.get(action)
+            backplane.publish({"op": "command", "asset": st.asset_id, "action": action,
+                               "speed": msg.get("speed"), "valve": msg.get("valve")},
+                              retain=retain and f"{retain}:{st.asset_id}")
+            running = {"start": True, "stop": False}.get(action, st.running)
         # Ack back (keeps the UI badge in sync)
-        emit("wgc_ack", {"ok": True, "running": running})
+        emit("wgc_ack", {"ok": True, "asset": st.asset_id, "running": running})
     except Exception as e:
         emit("wgc_ack", {"ok": False, "error": str(e)})
 
+# Setup done; with WGC_WARM_DELAY_S >= 0 the lazy subsystems and the dashboard shell are built in the background
+STARTUP.mark("setup")
+STARTUP.warm(socketio, lambda: SHELL.body)
+STARTUP.ready()
+
 # ----------------- Main -----------------
 if __name__ == "__main__":
     # Eventlet server (quiet): no access logs, no polling lines
@@ -0,0 +1,271 @@
+"""End-to-end ingest -> KPI -> broadcast benchmark.
+
+    python bench/bench_e2e.py                                  # both apps, 0/10/100 subscribers
+    python bench/bench_e2e.py --apps root --subscribers 0 50 --rates 200 1000 4000 --json
+
+Every configuration (app x subscriber count) runs in a fresh child
+process so CPU and RSS are its own.  The child imports the app
+in-process and drives it through the Flask / Socket.IO test clients:
+``POST /ingest-wgc/<asset>`` for ``app.py`` and the ``wgc_data`` event for
+``wgc_only/app.py``.  K subscribers are connected as Socket.IO test
+clients on the asset's room; their outgoing packets are intercepted at
+the engine.io layer (one decode per broadcast, not per client), so the
+client stand-in adds almost nothing to the server's cost.
+
+Each rate step is open-loop: sample *k* is due at ``start + k/rate`` and
+the driver never waits for the server beyond the call itself, so the
+achieved rate drops below the offered rate once the server saturates.
+Every sample carries its sequence number in a field the schema accepts
+and the broadcast echoes: the producer timestamp ``ts`` for ``app.py``
+(``SEQ_T0`` + 1 ms per sample) and ``gas.water_ppm`` for
+``wgc_only/app.py``, which stamps samples itself.  Delivery latency is
+the time from the start of the ingest call to the moment the server
+hands a packet carrying that number to a subscriber (coalescing by
+``WGC_MAX_CLIENT_HZ`` included).  A rejected sample counts as an error:
+a non-200 answer, or a ``wgc_error`` reply to the ``wgc_data`` emit.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+import importlib.util
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = {"root": os.path.join(ROOT, "app.py"), "wgc_only": os.path.join(ROOT, "wgc_only", "app.py")}
+ASSET = "bench"
+SEQ_T0 = 1700000000.0     # producer ts of sequence number 0 (app.py)
+SEQ_STEP = 0.001          # ts advance per sequence number
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return None
+    return sorted_vals[min(len(sorted_vals) - 1, int(q / 100.0 * len(sorted_vals)))]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # peak, KiB on Linux
+
+
+def cpu_s():
+    r = resource.getrusage(resource.RUSAGE_SELF)
+    return r.ru_utime + r.ru_stime
+
+
+def root_sample(seq, rng):
+    return {"oper": {"T1": 303 + rng.uniform(-1, 1), "T2": 352 + rng.uniform(-1, 1),
+                     "P1": 3.0 + 0.1 * rng.uniform(-1, 1), "P2": 8.7 + 0.2 * rng.uniform(-1, 1),
+                     "flow": 26 + 2 * rng.random(), "speed": 7800 + 80 * rng.uniform(-1, 1),
+                     "valve": 65 + rng.uniform(-1, 1)},
+            "ts": SEQ_T0 + seq * SEQ_STEP,
+            "health": {"v_ax": 2 + rng.random(), "v_vert": 2 + rng.random(), "v_horz": 2 + rng.random(),
+                       "oil_pressure": 3.5, "bearing_temp": 340 + rng.random(),
+                       "oil_temp": 335 + rng.random(), "seal_leak": 0.2}}
+
+
+def wgc_only_sample(seq, rng):
+    return {"asset": ASSET,
+            "gas": {"mw": 18.9, "glr": 1000.0, "water_ppm": float(seq)},
+            "oper": {"T1": 300 + rng.uniform(-1, 1), "T2": 360 + rng.uniform(-1, 1),
+                     "P1": 3.0 + 0.02 * rng.uniform(-1, 1), "P2": 9.0 + 0.05 * rng.uniform(-1, 1),
+                     "flow": 25 + rng.uniform(-1, 1), "speed": 7800 + 30 * rng.uniform(-1, 1),
+                     "valve": 65 + rng.uniform(-1, 1)},
+            "health": {"vib_axial": 2.2 + rng.random(), "vib_vert": 2.8 + rng.random(),
+                       "vib_horz": 2.5 + rng.random(), "bearing_temp": 345 + rng.random(),
+                       "oil_temp": 325 + rng.random(), "lube_oil_pressure": 3.2, "seal_leakage": 0.12}}
+
+
+def _seq(data):
+    """Sequence number carried by a ``wgc_data`` / ``wgc_delta`` / ``update_wgc*`` payload."""
+    if not data:
+        return None
+    payload = data[1] if len(data) > 1 else None
+    if not isinstance(payload, dict):
+        return None
+    body = payload.get("wgc")
+    if isinstance(body, dict):
+        ts = body.get("ts")
+        if not isinstance(ts, str):
+            return None
+        epoch = datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+        return round((epoch - SEQ_T0) / SEQ_STEP)
+    gas = payload.get("gas")
+    v = gas.get("water_ppm") if isinstance(gas, dict) else None
+    return int(v) if isinstance(v, (int, float)) else None
+
+
+class Subscribers:
+    """Engine.io-level packet sink for K test clients; other clients' packets go to ``forward``."""
+
+    def __init__(self, sids, forward):
+        self.sids = set(sids)
+        self.forward = forward
+        self.sent_at = {}       # seq -> perf_counter at ingest start
+        self.lat = []
+        self.deliveries = 0
+        self._last = (None, None)
+
+    def __call__(self, eio_sid, eio_pkt):
+        if eio_sid not in self.sids:
+            self.forward(eio_sid, eio_pkt)
+            return
+        self.deliveries += 1
+        if self._last[0] is not eio_pkt:
+            # room emits reuse one packet object for every recipient
+            data = eio_pkt.data
+            seq = None
+            if isinstance(data, str) and "[" in data:
+                try:
+                    seq = _seq(json.loads(data[data.index("["):]))
+                except ValueError:
+                    pass
+            self._last = (eio_pkt, seq)
+        seq = self._last[1]
+        t = self.sent_at.get(seq)
+        if t is not None:
+            self.lat.append(time.perf_counter() - t)
+
+
+def load_app(name):
+    spec = importlib.util.spec_from_file_location(f"bench_{name}_app", APPS[name])
+    mod = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, os.path.dirname(APPS[name]))
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def child(args):
+    A = load_app(args.app)
+    sleep = A.socketio.sleep
+    flask_client = A.app.test_client()
+    qs = f"asset={ASSET}"
+    subs = [A.socketio.test_client(A.app, flask_test_client=flask_client, query_string=qs)
+            for _ in range(args.subscribers)]
+    if args.app == "root":
+        make = root_sample
+
+        def ingest(sample):
+            return flask_client.post(f"/ingest-wgc/{ASSET}", json=sample).status_code == 200
+    else:
+        make = wgc_only_sample
+        # the ingest client sits in a room of its own so it does not receive the broadcasts
+        sim = A.socketio.test_client(A.app, flask_test_client=flask_client, query_string="asset=bench-sim")
+
+        def ingest(sample):
+            sim.emit("wgc_data", sample)
+            return not any(m["name"] == "wgc_error" for m in sim.get_received())
+
+    sink = Subscribers((c.eio_sid for c in subs), A.socketio.server._send_eio_packet)
+    A.socketio.server._send_eio_packet = sink
+    rng = random.Random(0)
+    seq = 0
+    steps = []
+    for rate in args.rates:
+        sink.lat, sink.deliveries = [], 0
+        call_lat, errors = [], 0
+        n_due = int(rate * args.step_s)
+        cpu0, t0 = cpu_s(), time.perf_counter()
+        for k in range(n_due):
+            due = t0 + k / rate
+            delay = due - time.perf_counter()
+            sleep(delay if delay > 0 else 0)
+            seq += 1
+            sample = make(seq, rng)
+            start = time.perf_counter()
+            sink.sent_at[seq] = start
+            try:
+                ok = ingest(sample)
+            except Exception:
+                ok = False
+            call_lat.append(time.perf_counter() - start)
+            errors += not ok
+        sent_elapsed = time.perf_counter() - t0
+        sleep(args.drain_s)         # let the last coalesced broadcast go out
+        elapsed = time.perf_counter() - t0
+        cpu = cpu_s() - cpu0
+        sink.sent_at.clear()
+        call_lat.sort()
+        lat = sorted(sink.lat)
+        ms = lambda v: None if v is None else round(v * 1000.0, 3)
+        steps.append({
+            "offered_hz": rate, "samples": n_due, "errors": errors,
+            "ingest_hz": round(n_due / sent_elapsed, 1),
+            "ingest_p50_ms": ms(percentile(call_lat, 50)), "ingest_p99_ms": ms(percentile(call_lat, 99)),
+            "deliveries": sink.deliveries,
+            "deliveries_hz": round(sink.deliveries / elapsed, 1),
+            "latency_p50_ms": ms(percentile(lat, 50)), "latency_p95_ms": ms(percentile(lat, 95)),
+            "latency_p99_ms": ms(percentile(lat, 99)),
+            "cpu_pct": round(100.0 * cpu / elapsed, 1), "rss_mb": round(rss_mb(), 1),
+        })
+    return {"app": args.app, "subscribers": args.subscribers, "steps": steps}
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_config(app, subscribers, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", "--app", app,
+           "--subscribers", str(subscribers), "--step-s", str(args.step_s), "--drain-s", str(args.drain_s),
+           "--rates", *[str(r) for r in args.rates]]
+    env = dict(os.environ, LOG_LEVEL="ERROR")
+    env.pop("WGC_LOG_DIR", None)
+    if args.max_client_hz is not None:
+        env["WGC_MAX_CLIENT_HZ"] = str(args.max_client_hz)
+    out = subprocess.run(cmd, cwd=os.path.dirname(APPS[app]), env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise SystemExit(f"{app} / {subscribers} subscribers failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--apps", nargs="+", choices=sorted(APPS), default=["root", "wgc_only"])
+    p.add_argument("--subscribers", type=int, nargs="+", default=[0, 10, 100])
+    p.add_argument("--rates", type=float, nargs="+", default=[100, 500, 2000],
+                   help="Offered ingest rates (samples/s), one step each")
+    p.add_argument("--step-s", type=float, default=3.0, help="Seconds per rate step")
+    p.add_argument("--drain-s", type=float, default=0.5, help="Wait after each step for the last broadcast")
+    p.add_argument("--max-client-hz", type=float, default=None, help="WGC_MAX_CLIENT_HZ for the server")
+    p.add_argument("--json", action="store_true", help="Print machine-readable results")
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--app", choices=sorted(APPS), help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        args.subscribers = args.subscribers[0]
+        print(json.dumps(child(args)))
+        return
+
+    configs = [run_config(app, k, args) for app in args.apps for k in args.subscribers]
+    if args.json:
+        print(json.dumps({"commit": git_rev(), "python": sys.version.split()[0], "step_s": args.step_s,
+                          "max_client_hz": args.max_client_hz, "configs": configs}))
+        return
+    print(f"{'app':>9} {'subs':>5} {'offered':>8} {'ingest/s':>9} {'err':>5} {'call p50':>9} "
+          f"{'deliv/s':>9} {'lat p50':>8} {'p95':>8} {'p99':>8} {'cpu%':>6} {'rss MB':>7}")
+    fmt = lambda v: "-" if v is None else f"{v:.1f}"
+    for c in configs:
+        for s in c["steps"]:
+            print(f"{c['app']:>9} {c['subscribers']:>5} {s['offered_hz']:>8.0f} {s['ingest_hz']:>9.1f} "
+                  f"{s['errors']:>5} {fmt(s['ingest_p50_ms']):>9} {s['deliveries_hz']:>9.1f} "
+                  f"{fmt(s['latency_p50_ms']):>8} {fmt(s['latency_p95_ms']):>8} {fmt(s['latency_p99_ms']):>8} "
+                  f"{s['cpu_pct']:>6.1f} {s['rss_mb']:>7.1f}")
+    print("latencies in ms (call = ingest handler; lat = ingest start -> packet handed to a subscriber)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Scalar vs vectorized KPI engine.
+
+    python bench/bench_kpi.py                 # 1k / 100k / 1M samples
+    python bench/bench_kpi.py --sizes 1000 10000 --json
+
+The scalar path is timed the way live ingest uses it (one state dict per
+call); the batch path gets the same samples as columns.  Every row of the
+batch result is checked against the scalar result.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from twin.kpi import compute_wgc_kpis, compute_wgc_kpis_batch, kpi_row  # noqa: E402
+
+
+def make_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "P1": rng.uniform(2.5, 3.5, n), "P2": rng.uniform(8.0, 10.0, n),
+        "T1": rng.uniform(295, 305, n), "T2": rng.uniform(350, 370, n),
+        "flow": rng.uniform(8, 35, n), "speed": rng.uniform(6000, 9000, n),
+        "valve": rng.uniform(40, 80, n), "mw": np.full(n, 18.9),
+        "vib_axial": rng.uniform(1, 8, n), "vib_vert": rng.uniform(1, 8, n),
+        "vib_horz": rng.uniform(1, 8, n), "lube_oil_pressure": rng.uniform(1.2, 3.6, n),
+        "bearing_temp": rng.uniform(340, 375, n), "oil_temp": rng.uniform(320, 330, n),
+        "seal_leakage": rng.uniform(0.0, 0.7, n),
+    }
+
+
+def to_states(cols):
+    oper = ("P1", "P2", "T1", "T2", "flow", "speed", "valve")
+    lists = {k: v.tolist() for k, v in cols.items()}
+    n = len(lists["P1"])
+    return [{"oper": {k: lists[k][i] for k in oper},
+             "gas": {"mw": lists["mw"][i]},
+             "health": {k: lists[k][i] for k in lists if k not in oper and k != "mw"}}
+            for i in range(n)]
+
+
+def check(batch, states, scalar):
+    bad = 0
+    for i, s in enumerate(states):
+        a, b = kpi_row(batch, i), scalar[i]
+        head_ok = abs(a.pop("head_index_norm") - b["head_index_norm"]) <= 1e-9 * max(1.0, abs(b["head_index_norm"]))
+        b = dict(b)
+        b.pop("head_index_norm")
+        bad += (not head_ok) or a != b
+    return bad
+
+
+def run(n):
+    cols = make_columns(n)
+    states = to_states(cols)
+
+    t = time.perf_counter()
+    scalar = [compute_wgc_kpis(s) for s in states]
+    t_scalar = time.perf_counter() - t
+
+    t = time.perf_counter()
+    batch = compute_wgc_kpis_batch(cols)
+    t_batch = time.perf_counter() - t
+
+    return {"n": n, "scalar_s": t_scalar, "batch_s": t_batch,
+            "speedup": t_scalar / max(t_batch, 1e-12),
+            "mismatches": check(batch, states, scalar)}
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    p.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = p.parse_args()
+
+    results = [run(n) for n in args.sizes]
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"{'samples':>10} {'scalar (s)':>12} {'batch (s)':>12} {'speedup':>9} {'mismatch':>9}")
+    for r in results:
+        print(f"{r['n']:>10} {r['scalar_s']:>12.4f} {r['batch_s']:>12.4f} {r['speedup']:>8.0f}x {r['mismatches']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""Multi-worker scale-out benchmark over the Unix-socket backplane.
+
+    python bench/bench_scale.py                                # 1, 2, 4 workers, 200 dashboards
+    python bench/bench_scale.py --workers 1 2 4 8 --subscribers 1000 --duration 20 --json
+    python bench/bench_scale.py --rate 300 --subscribers 2000     # fixed ingest load: fan-out capacity
+
+For each worker count N the script starts a backplane broker
+(``python -m twin.backplane``) and N ``app.py`` processes on consecutive
+ports with ``WGC_BACKPLANE=unix://...``, then one subscriber process and
+one load-driver process per worker.
+
+* Fan-out: ``--subscribers`` dashboards in total, split evenly over the
+  workers, are WebSocket Socket.IO clients on the assets' rooms.  They
+  count the ``wgc_data`` / ``wgc_delta`` events they receive (``deliv/s``)
+  and the time from the producer's ``ts`` to receipt (``lat``).  The
+  dashboard count is the same for every N, so what changes is how many
+  of them each worker serves: this is the part of the work that a
+  worker does for its own clients only, and ``fan-out x`` is its
+  delivery rate relative to one worker.  Workers run with
+  ``WGC_MAX_CLIENT_HZ=0`` by default (``--max-client-hz``), so every
+  accepted sample is pushed to its asset's dashboards and the fan-out
+  load grows with the ingest rate instead of being capped by coalescing.
+  ``deliv %`` is the share of those pushes that arrived (below 100 the
+  workers fell behind and coalesced).
+* Ingest: the drivers are closed-loop (each of ``--connections``
+  keep-alive connections posts the next sample as soon as the previous
+  one is answered, using the simulator's HTTP client), so the aggregate
+  rate is the cluster's ingest capacity.  ``--rate`` offers a fixed total
+  rate instead, so the fan-out load is the same for every N and only
+  its split over the workers changes.  ``--baseline`` adds a single
+  worker without a backplane.
+
+After the run every worker must have applied every accepted sample and
+agree on each asset's last timestamp and run flag; the ``consistent``
+column reports that check.
+
+Every worker applies every ingest event, so each one does the whole
+cluster's apply work.  The aggregate ingest rate is therefore bounded by
+one worker's apply rate, and ``ingest x`` stays close to 1.  The fan-out
+columns are the ones that should grow with N.  Drivers, subscribers,
+broker and workers all share this machine, so scaling is only as linear
+as its cores allow.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import struct
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_e2e import percentile, git_rev   # noqa: E402
+
+FANOUT_EVENTS = ("wgc_data", "wgc_delta")
+
+
+def _get(url, timeout=2.0):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return json.loads(r.read())
+
+
+def wait_up(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return _get(url)
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"{url} did not come up")
+
+
+async def drive(port, connections, duration, assets, seed, rate=0.0):
+    """Closed-loop posts on ``connections`` connections, or ``rate`` samples/s in total when set."""
+    from wgc_sim import HttpConn, make_sample
+    rng = random.Random(seed)
+    lat, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def conn_loop(c):
+        nonlocal errors
+        conn, k = HttpConn("127.0.0.1", port, False), 0
+        interval = connections / rate if rate > 0 else 0.0
+        due = time.monotonic() + c * interval / connections
+        while time.monotonic() < deadline:
+            if interval:
+                await asyncio.sleep(max(0.0, due - time.monotonic()))
+                due += interval
+            k += 1
+            asset = f"scale-{rng.randrange(assets)}"
+            sample = make_sample(k, rng)
+            sample["ts"] = time.time()
+            body = json.dumps(sample, separators=(",", ":")).encode()
+            t = time.monotonic()
+            try:
+                ok = await conn.post(f"/ingest-wgc/{asset}", body) == 200
+            except Exception:
+                conn.close()
+                ok = False
+            lat.append(time.monotonic() - t)
+            errors += not ok
+        conn.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*[conn_loop(c) for c in range(connections)])
+    return {"requests": len(lat), "errors": errors, "elapsed": time.monotonic() - started,
+            "lat": sorted(lat)}
+
+
+def driver_main(args):
+    out = asyncio.run(drive(args.port, args.connections, args.duration, args.assets, args.port, args.rate))
+    lat = out.pop("lat")
+    out["p50_ms"] = round(percentile(lat, 50) * 1000.0, 2) if lat else None
+    out["p99_ms"] = round(percentile(lat, 99) * 1000.0, 2) if lat else None
+    print(json.dumps(out))
+
+
+# ---- dashboards: a minimal Socket.IO-over-WebSocket client (server frames only, no extensions) ----
+async def _ws_open(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    if b" 101 " not in head.split(b"\r\n", 1)[0]:
+        raise OSError(f"websocket upgrade refused: {head.splitlines()[0]!r}")
+    return reader, writer
+
+
+async def _ws_recv(reader):
+    """``(opcode, payload)`` of the next frame."""
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack(">H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack(">Q", await reader.readexactly(8))[0]
+    return b0 & 0x0F, await reader.readexactly(n)
+
+
+def _ws_send(writer, text):
+    data, mask = text.encode(), os.urandom(4)
+    n = len(data)
+    head = bytes([0x81, 0x80 | n]) if n < 126 else bytes([0x81, 0x80 | 126]) + struct.pack(">H", n)
+    writer.write(head + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(data)))
+
+
+def _producer_ts(payload):
+    body = payload.get("wgc") if isinstance(payload, dict) else None
+    ts = body.get("ts") if isinstance(body, dict) else None
+    if not isinstance(ts, str):
+        return None
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+
+async def subscribe(port, clients, first, assets, duration):
+    """Connect ``clients`` dashboards, print ``ready``, then count fan-out events for ``duration`` seconds."""
+    deliveries, lat = 0, []
+    conns = []
+    for j in range(first, first + clients):
+        reader, writer = await _ws_open(port, f"/socket.io/?EIO=4&transport=websocket&asset=scale-{j % assets}")
+        await _ws_recv(reader)              # engine.io open
+        _ws_send(writer, "40")              # Socket.IO connect
+        conns.append((reader, writer))
+    print("ready", flush=True)
+    deadline = time.monotonic() + duration
+
+    async def listen(reader, writer):
+        nonlocal deliveries
+        while True:
+            op, data = await _ws_recv(reader)
+            if op == 8:
+                return
+            if data == b"2":
+                _ws_send(writer, "3")       # engine.io ping -> pong
+            elif data.startswith(b"42"):
+                name, *rest = json.loads(data[2:])
+                if name in FANOUT_EVENTS:
+                    deliveries += 1
+                    ts = _producer_ts(rest[0] if rest else None)
+                    if ts is not None:
+                        lat.append(time.time() - ts)
+
+    tasks = [asyncio.create_task(listen(r, w)) for r, w in conns]
+    started = time.monotonic()
+    await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+    elapsed = time.monotonic() - started
+    for t in tasks:
+        t.cancel()
+    for _, w in conns:
+        w.close()
+    return {"clients": clients, "deliveries": deliveries, "elapsed": elapsed, "lat": sorted(lat)}
+
+
+def subscriber_main(args):
+    out = asyncio.run(subscribe(args.port, args.clients, args.first, args.assets, args.duration))
+    lat = out.pop("lat")
+    out["lat_p50_ms"] = round(percentile(lat, 50) * 1000.0, 2) if lat else None
+    out["lat_p99_ms"] = round(percentile(lat, 99) * 1000.0, 2) if lat else None
+    print(json.dumps(out))
+
+
+def run_cluster(n, args, backplane=True):
+    tmp = tempfile.mkdtemp(prefix="wgc-scale-")
+    sock = os.path.join(tmp, "bus.sock")
+    env = dict(os.environ, LOG_LEVEL="ERROR", PYTHONPATH=ROOT, WGC_MAX_CLIENT_HZ=str(args.max_client_hz))
+    env.pop("WGC_LOG_DIR", None)
+    procs = []
+    try:
+        if backplane:
+            env["WGC_BACKPLANE"] = f"unix://{sock}"
+            procs.append(subprocess.Popen([sys.executable, "-m", "twin.backplane", sock], cwd=ROOT, env=env))
+            deadline = time.monotonic() + 10
+            while not os.path.exists(sock) and time.monotonic() < deadline:
+                time.sleep(0.05)
+        else:
+            env.pop("WGC_BACKPLANE", None)
+        ports = [args.port + i for i in range(n)]
+        for port in ports:
+            procs.append(subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, env=dict(env, PORT=str(port)),
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        for port in ports:
+            wait_up(f"http://127.0.0.1:{port}/api/backplane")
+
+        split = [args.subscribers // n + (i < args.subscribers % n) for i in range(n)]
+        subs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "--subscribe", "--port", str(port),
+                                  "--clients", str(k), "--first", str(sum(split[:i])), "--assets", str(args.assets),
+                                  "--duration", str(args.duration)],
+                                 cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+                for i, (port, k) in enumerate(zip(ports, split))]
+        procs.extend(subs)
+        for sp in subs:
+            if sp.stdout.readline().strip() != "ready":
+                raise SystemExit("subscribers failed to connect")
+
+        drivers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "--drive", "--port", str(port),
+                                     "--connections", str(args.connections), "--duration", str(args.duration),
+                                     "--rate", str(args.rate / n),
+                                     "--assets", str(args.assets)],
+                                    cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+                   for port in ports]
+        results = [json.loads(d.communicate()[0].strip().splitlines()[-1]) for d in drivers]
+        fanout = [json.loads(sp.communicate()[0].strip().splitlines()[-1]) for sp in subs]
+
+        accepted = sum(r["requests"] - r["errors"] for r in results)
+        deadline = time.monotonic() + args.settle_s
+        while True:
+            ingest = [_get(f"http://127.0.0.1:{p}/api/ingest") for p in ports]
+            applied = [q.get("processed", accepted) for q in ingest]
+            if all(a >= accepted for a in applied) or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+        views = [{a["asset"]: (a["ts"], a["running"]) for a in _get(f"http://127.0.0.1:{p}/api/assets")}
+                 for p in ports]
+        elapsed = max(r["elapsed"] for r in results)
+        return {
+            "workers": n, "backplane": backplane, "requests": sum(r["requests"] for r in results),
+            "errors": sum(r["errors"] for r in results),
+            "ingest_hz": round(accepted / elapsed, 1),
+            "p50_ms": max(r["p50_ms"] or 0 for r in results), "p99_ms": max(r["p99_ms"] or 0 for r in results),
+            "subscribers": args.subscribers,
+            "deliveries_hz": round(sum(f["deliveries"] / f["elapsed"] for f in fanout), 1),
+            # with every sample fanned out, each accepted sample is owed to its asset's share of the dashboards
+            "fanout_pct": (round(100.0 * sum(f["deliveries"] for f in fanout) / (accepted * args.subscribers
+                                                                                  / args.assets), 1)
+                           if accepted and not args.max_client_hz else None),
+            "fanout_p50_ms": max(f["lat_p50_ms"] or 0 for f in fanout),
+            "fanout_p99_ms": max(f["lat_p99_ms"] or 0 for f in fanout),
+            "applied": applied,
+            "consistent": all(a == accepted for a in applied) and all(v == views[0] for v in views),
+        }
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--baseline", action="store_true", help="Also run one worker without a backplane")
+    p.add_argument("--connections", type=int, default=8, help="Keep-alive connections per worker")
+    p.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    p.add_argument("--assets", type=int, default=20, help="Assets the samples and dashboards are spread over")
+    p.add_argument("--rate", type=float, default=0.0,
+                   help="Offered samples/s in total, split over the workers (default 0: closed loop)")
+    p.add_argument("--subscribers", type=int, default=200, help="Dashboards in total, split over the workers")
+    p.add_argument("--max-client-hz", type=float, default=0.0,
+                   help="WGC_MAX_CLIENT_HZ for the workers (default 0: every sample is fanned out)")
+    p.add_argument("--port", type=int, default=5600, help="First worker port")
+    p.add_argument("--settle-s", type=float, default=10.0, help="Max wait for workers to apply the backlog")
+    p.add_argument("--json", action="store_true", help="Print machine-readable results")
+    p.add_argument("--drive", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--subscribe", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--clients", type=int, default=0, help=argparse.SUPPRESS)
+    p.add_argument("--first", type=int, default=0, help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.drive:
+        driver_main(args)
+        return
+    if args.subscribe:
+        subscriber_main(args)
+        return
+
+    runs = [run_cluster(1, args, backplane=False)] if args.baseline else []
+    runs += [run_cluster(n, args) for n in args.workers]
+    if args.json:
+        print(json.dumps({"commit": git_rev(), "python": sys.version.split()[0], "cpus": os.cpu_count(),
+                          "duration_s": args.duration, "connections": args.connections, "runs": runs}))
+        return
+    base = next((r for r in runs if r["backplane"]), None)
+    ratio = lambda r, key: f"{r[key] / base[key]:.2f}" if base and base[key] and r["backplane"] else "-"
+    print(f"{'workers':>8} {'bus':>4} {'ingest/s':>9} {'ingest x':>9} {'err':>5} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'subs':>5} {'deliv/s':>9} {'fan-out x':>10} {'deliv %':>8} {'lat p50':>8} {'lat p99':>8} {'consistent':>10}")
+    for r in runs:
+        print(f"{r['workers']:>8} {'yes' if r['backplane'] else 'no':>4} {r['ingest_hz']:>9.1f} "
+              f"{ratio(r, 'ingest_hz'):>9} {r['errors']:>5} {r['p50_ms']:>7.1f} {r['p99_ms']:>7.1f} "
+              f"{r['subscribers']:>5} {r['deliveries_hz']:>9.1f} {ratio(r, 'deliveries_hz'):>10} "
+              f"{'-' if r['fanout_pct'] is None else r['fanout_pct']:>8} "
+              f"{r['fanout_p50_ms']:>8.1f} {r['fanout_p99_ms']:>8.1f} {str(r['consistent']):>10}")
+    print(f"{os.cpu_count()} CPUs; x = relative to 1 worker on the backplane. Every worker applies every sample, "
+          "so ingest x stays near 1; fan-out (deliveries to a fixed number of dashboards) is what scales. "
+          "lat = producer ts -> dashboard, ms")
+
+
+if __name__ == "__main__":
+    main()
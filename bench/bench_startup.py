@@ -0,0 +1,151 @@
+"""Cold-start benchmark: process spawn -> first sample accepted and applied.
+
+    python bench/bench_startup.py                                  # python app.py, 5 runs
+    python bench/bench_startup.py --server gunicorn --runs 10 --json
+    python bench/bench_startup.py --env EVENTLET_NO_GREENDNS=yes   # compare a setting
+
+Each run spawns a fresh ``app.py`` (the dev server, or gunicorn with the
+eventlet worker as in the Dockerfile) and, from the moment of the spawn,
+keeps posting one sample to ``/ingest-wgc/<asset>`` every few
+milliseconds until one is answered 200 -- the request that woke a
+scaled-to-zero container.  ``ingest`` is the time to that answer and
+``applied`` the time until ``/api/assets`` shows the sample.  The
+server's own view comes from ``/readyz`` (``twin/startup.py``): time from
+process start to the end of setup and the setup phases (interpreter and
+server boot, imports, Socket.IO, state, ...).
+
+Runs are sequential and the medians are reported; the first run also
+pays for a cold page cache and ``.pyc`` compilation.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import statistics
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_e2e import git_rev   # noqa: E402
+
+ASSET = "bench"
+SAMPLE = json.dumps({"oper": {"T1": 303.0, "T2": 352.0, "P1": 3.0, "P2": 8.7, "flow": 26.0, "speed": 7800.0,
+                              "valve": 65.0},
+                     "health": {"v_ax": 2.6, "v_vert": 2.9, "v_horz": 3.1, "oil_pressure": 3.6,
+                                "bearing_temp": 340.0, "oil_temp": 335.0, "seal_leak": 0.2}}).encode()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url, body=None, timeout=2.0):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return r.status, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def wait_for(fn, deadline, poll_s):
+    while time.monotonic() < deadline:
+        try:
+            if fn():
+                return True
+        except OSError:
+            pass
+        time.sleep(poll_s)
+    return False
+
+
+def command(server, port):
+    if server == "gunicorn":
+        return ["gunicorn", "--bind", f"127.0.0.1:{port}", "--worker-class", "eventlet", "--workers", "1",
+                "--log-level", "warning", "app:app"]
+    return [sys.executable, "app.py"]
+
+
+def run_once(args, extra_env):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), LOG_LEVEL="ERROR", PYTHONPATH=ROOT, **extra_env)
+    env.pop("WGC_LOG_DIR", None)
+    env.pop("WGC_BACKPLANE", None)
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.monotonic()
+    proc = subprocess.Popen(command(args.server, port), cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = t0 + args.timeout
+        ok = wait_for(lambda: _request(f"{base}/ingest-wgc/{ASSET}", SAMPLE)[0] == 200, deadline, args.poll_s)
+        ingest = time.monotonic() - t0
+        assets = lambda: json.loads(_request(f"{base}/api/assets")[1])
+        ok = ok and wait_for(lambda: any(a["asset"] == ASSET and a["ts"] for a in assets()), deadline, args.poll_s)
+        applied = time.monotonic() - t0
+        if not ok:
+            raise SystemExit(f"no sample applied within {args.timeout} s ({' '.join(command(args.server, port))})")
+        status, body = _request(f"{base}/readyz")
+        server = json.loads(body)
+        return {"ingest_s": round(ingest, 4), "applied_s": round(applied, 4), "ready": status == 200,
+                "server_ready_s": server.get("ready_s"), "server_first_ingest_s": server.get("first_ingest_s"),
+                "phases": server.get("phases", {})}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def summarize(runs):
+    med = lambda key: round(statistics.median(r[key] for r in runs if r[key] is not None), 4)
+    phases = {}
+    for r in runs:
+        for name, v in r["phases"].items():
+            phases.setdefault(name, []).append(v)
+    return {"ingest_s": med("ingest_s"), "applied_s": med("applied_s"), "server_ready_s": med("server_ready_s"),
+            "ingest_min_s": min(r["ingest_s"] for r in runs), "ingest_max_s": max(r["ingest_s"] for r in runs),
+            "phases": {name: round(statistics.median(v), 4) for name, v in phases.items()}}
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--server", choices=("dev", "gunicorn"), default="dev")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                   help="Extra environment for the server (repeatable)")
+    p.add_argument("--poll-s", type=float, default=0.005, help="Interval between connection attempts")
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = p.parse_args()
+    extra_env = dict(kv.split("=", 1) for kv in args.env)
+
+    runs = [run_once(args, extra_env) for _ in range(args.runs)]
+    summary = summarize(runs)
+    if args.json:
+        print(json.dumps({"commit": git_rev(), "python": sys.version.split()[0], "server": args.server,
+                          "env": extra_env, "summary": summary, "runs": runs}))
+        return
+    print(f"{'run':>4} {'ingest':>8} {'applied':>8} {'ready*':>8} " +
+          " ".join(f"{name:>9}" for name in summary["phases"]))
+    for i, r in enumerate(runs, 1):
+        print(f"{i:>4} {r['ingest_s'] * 1000:>8.0f} {r['applied_s'] * 1000:>8.0f} "
+              f"{(r['server_ready_s'] or 0) * 1000:>8.0f} " +
+              " ".join(f"{r['phases'].get(name, 0) * 1000:>9.0f}" for name in summary["phases"]))
+    print(f"{'p50':>4} {summary['ingest_s'] * 1000:>8.0f} {summary['applied_s'] * 1000:>8.0f} "
+          f"{summary['server_ready_s'] * 1000:>8.0f} " +
+          " ".join(f"{v * 1000:>9.0f}" for v in summary["phases"].values()))
+    print("ms from spawn (ingest = first 200 from /ingest-wgc, applied = visible in /api/assets); "
+          "ready* and phases as reported by the server's /readyz, from process start")
+
+
+if __name__ == "__main__":
+    main()
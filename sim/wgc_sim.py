@@ -1,29 +1,31 @@
 # wgc_sim.py
-import os, time, random, logging, argparse
+import os, ssl, math, time, json, random, asyncio, logging, argparse
+from urllib.parse import urlsplit
+import numpy as np
 import requests
 
 def clamp(v, lo, hi):
     return max(lo, min(hi, v))
 
-def make_sample(t):
-    # Simple synthetic dynamics
-    flow  = 26 + 2.5*random.random() + 0.5*random.uniform(-1, 1)
-    P1    = 3.0 + 0.1*random.uniform(-1, 1)
-    P2    = 8.7 + 0.2*random.uniform(-1, 1) + 0.05*(flow - 26)
-    T1    = 303.0 + 0.5*random.uniform(-1, 1)
-    T2    = 352.0 + 1.2*random.uniform(-1, 1) + 0.15*(P2 - P1)
+def make_sample(t, rng=random):
+    # Simple synthetic dynamics (pass a random.Random for an independent stream)
+    flow  = 26 + 2.5*rng.random() + 0.5*rng.uniform(-1, 1)
+    P1    = 3.0 + 0.1*rng.uniform(-1, 1)
+    P2    = 8.7 + 0.2*rng.uniform(-1, 1) + 0.05*(flow - 26)
+    T1    = 303.0 + 0.5*rng.uniform(-1, 1)
+    T2    = 352.0 + 1.2*rng.uniform(-1, 1) + 0.15*(P2 - P1)
 
-    speed = 7800 + 80*random.uniform(-1, 1)
-    valve = 65 + 2.0*random.uniform(-1, 1)
+    speed = 7800 + 80*rng.uniform(-1, 1)
+    valve = 65 + 2.0*rng.uniform(-1, 1)
 
-    v_ax   = clamp(2.0 + 1.4*random.random(), 0.2, 6.0)
-    v_vert = clamp(2.1 + 1.4*random.random(), 0.2, 6.0)
-    v_horz = clamp(2.2 + 1.4*random.random(), 0.2, 6.0)
+    v_ax   = clamp(2.0 + 1.4*rng.random(), 0.2, 6.0)
+    v_vert = clamp(2.1 + 1.4*rng.random(), 0.2, 6.0)
+    v_horz = clamp(2.2 + 1.4*rng.random(), 0.2, 6.0)
 
-    oil_p  = 3.5 + 0.2*random.uniform(-1, 1)
-    bt     = 340  + 1.5*random.uniform(-1, 1)
-    ot     = 335  + 1.5*random.uniform(-1, 1)
-    leak   = max(0.0, 0.2 + 0.1*random.random())
+    oil_p  = 3.5 + 0.2*rng.uniform(-1, 1)
+    bt     = 340  + 1.5*rng.uniform(-1, 1)
+    ot     = 335  + 1.5*rng.uniform(-1, 1)
+    leak   = max(0.0, 0.2 + 0.1*rng.random())
 
     oper = {
         "T1": round(T1, 2), "T2": round(T2, 2),
@@ -40,6 +42,126 @@ def make_sample(t):
     }
     return {"oper": oper, "health": health}
 
+# ---------------- plant model ----------------
+OPER_KEYS = ("T1", "T2", "P1", "P2", "flow", "speed", "valve")
+HEALTH_KEYS = ("v_ax", "v_vert", "v_horz", "oil_pressure", "bearing_temp", "oil_temp", "seal_leak")
+
+SPEED0, VALVE0, FLOW0 = 7800.0, 65.0, 26.0    # design point
+T_SUCTION = 303.0                              # K
+PR0 = 2.9                                      # pressure ratio at design speed
+T_EXP = 0.1407                                 # T2/T1 = PR**T_EXP (polytropic, ~352 K at design)
+
+# first-order time constants (s) of the lagged states
+TAU = {"speed": 2.0, "valve": 0.5, "flow": 1.5, "P1": 1.0, "P2": 2.0, "T2": 5.0,
+       "oil_pressure": 3.0, "bearing_temp": 60.0, "oil_temp": 120.0}
+
+
+class Plant:
+    """First-order model of N compressors, stepped together as NumPy arrays.
+
+    Speed and valve follow their setpoints; flow, pressures and temperatures
+    settle toward steady states that depend on them, each with its own time
+    constant, and vibration rises as flow approaches the surge line.  One
+    ``step(dt)`` advances every asset and returns one sample per asset.
+    """
+
+    def __init__(self, n, seed=None):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.sp_speed = np.full(n, SPEED0)
+        self.sp_valve = np.full(n, VALVE0)
+        self.x = {"speed": np.full(n, SPEED0), "valve": np.full(n, VALVE0), "flow": np.full(n, FLOW0),
+                  "P1": np.full(n, 3.0), "P2": np.full(n, 3.0 * PR0),
+                  "T2": np.full(n, T_SUCTION * PR0 ** T_EXP), "oil_pressure": np.full(n, 3.5),
+                  "bearing_temp": np.full(n, 340.0), "oil_temp": np.full(n, 335.0)}
+
+    def command(self, i, speed=None, valve=None):
+        """Apply commanded setpoints to asset ``i`` (None leaves one unchanged)."""
+        if isinstance(speed, (int, float)):
+            self.sp_speed[i] = clamp(float(speed), 0.0, 1.2 * SPEED0)
+        if isinstance(valve, (int, float)):
+            self.sp_valve[i] = clamp(float(valve), 0.0, 100.0)
+
+    def _lag(self, name, target, dt):
+        x = self.x[name]
+        x += (1.0 - math.exp(-dt / TAU[name])) * (target - x)
+        return x
+
+    def step(self, dt):
+        """Advance every asset by ``dt`` seconds; returns a list of samples."""
+        n, rng, x = self.n, self.rng, self.x
+        noise = lambda scale: scale * rng.standard_normal(n)
+
+        speed = self._lag("speed", self.sp_speed + noise(25.0), dt)
+        valve = self._lag("valve", self.sp_valve, dt)
+        s = np.maximum(speed, 0.0) / SPEED0
+        flow = self._lag("flow", FLOW0 * s * np.sqrt(valve / VALVE0) + noise(0.3), dt)
+        P1 = self._lag("P1", 3.0 - 0.02 * (flow - FLOW0), dt)
+        # head falls along the speed line as flow rises past the design point
+        P2 = self._lag("P2", P1 * (1.0 + (PR0 - 1.0) * s * s) - 0.05 * (flow - FLOW0 * s), dt)
+        T1 = T_SUCTION + noise(0.3)
+        T2 = self._lag("T2", T1 * (np.maximum(P2, P1) / P1) ** T_EXP, dt)
+
+        # within 2 kg/s of the surge line the server's performance map uses
+        surge = np.clip(0.2 * speed / 1000.0 + 12.0 - flow, 0.0, None)
+        vib = 2.0 + 0.7 * s * s + 1.5 * surge
+        oil_p = self._lag("oil_pressure", 2.0 + 1.5 * s, dt)
+        bt = self._lag("bearing_temp", 310.0 + 30.0 * s * s, dt)
+        ot = self._lag("oil_temp", 305.0 + 30.0 * s * s, dt)
+        leak = np.clip(0.2 + 0.05 * (P2 - 3.0 * PR0) + noise(0.03), 0.0, None)
+
+        cols = np.round(np.vstack([
+            T1, T2 + noise(0.5), P1 + noise(0.03), P2 + noise(0.05), flow, speed, valve,
+            np.clip(vib + noise(0.4), 0.2, 12.0), np.clip(vib + 0.1 + noise(0.4), 0.2, 12.0),
+            np.clip(vib + 0.2 + noise(0.4), 0.2, 12.0),
+            oil_p + noise(0.05), bt + noise(0.5), ot + noise(0.5), leak]), 2).T.tolist()
+        return [{"oper": dict(zip(OPER_KEYS, row[:7])), "health": dict(zip(HEALTH_KEYS, row[7:]))}
+                for row in cols]
+
+
+class Deadlines:
+    """Absolute-deadline scheduler: tick k is due at ``start + k * period``.
+
+    Time spent sending never pushes later ticks back, so the average rate is
+    exactly ``1 / period``.  When a tick is already late, ``policy`` decides:
+    ``catchup`` fires the missed ticks back to back, ``skip`` drops them and
+    resumes at the current slot.  ``next()`` returns ``(k, dt)``, where ``dt``
+    is the simulated time since the previous tick (larger after a skip, so
+    the model stays in step with the wall clock).
+    """
+
+    def __init__(self, period, policy="catchup"):
+        self.period, self.policy = period, policy
+        self.start = time.monotonic()
+        self.wall0 = time.time()
+        self.k = -1         # last tick handed out
+        self.skipped = 0
+
+    def delay(self):
+        """Seconds until the next tick is due (<= 0 when it is late)."""
+        return self.start + (self.k + 1) * self.period - time.monotonic()
+
+    def next(self):
+        k = self.k + 1
+        if self.policy == "skip":
+            slot = int((time.monotonic() - self.start) / self.period)
+            if slot > k:
+                self.skipped += slot - k
+                k = slot
+        dt, self.k = (k - self.k) * self.period, k
+        return k, dt
+
+    def due_wall(self, k):
+        """Wall-clock timestamp of tick ``k`` (evenly spaced sample times)."""
+        return self.wall0 + k * self.period
+
+    def wait(self):
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        return self.next()
+
+
 def parse_args():
     p = argparse.ArgumentParser(description="WGC simulator → /ingest-wgc")
     p.add_argument("--url",
@@ -51,14 +173,219 @@ def parse_args():
     p.add_argument("--timeout",
                    type=float, default=float(os.getenv("SIM_TIMEOUT", "3.0")),
                    help="HTTP timeout seconds")
+    p.add_argument("--batch-size",
+                   type=int, default=int(os.getenv("SIM_BATCH_SIZE", "1")),
+                   help="Samples per POST (1 = one request per sample)")
+    p.add_argument("--flush-interval",
+                   type=float, default=float(os.getenv("SIM_FLUSH_INTERVAL", "1.0")),
+                   help="Max seconds a partial batch is held before sending")
+    p.add_argument("--late",
+                   choices=("catchup", "skip"), default=os.getenv("SIM_LATE", "catchup"),
+                   help="When behind schedule: send missed samples back to back, or skip them")
     p.add_argument("--log-every",
                    type=int, default=int(os.getenv("SIM_LOG_EVERY", "0")),
                    help="Log every N samples (0 = silent)")
     p.add_argument("--verbose",
                    action="store_true", default=os.getenv("SIM_VERBOSE", "0") == "1",
                    help="Verbose logging")
+    # Load mode (asyncio): N virtual compressors at an aggregate rate
+    p.add_argument("--assets",
+                   type=int, default=int(os.getenv("SIM_ASSETS", "0")),
+                   help="Load mode: number of virtual compressors (0 = classic single-stream mode)")
+    p.add_argument("--rate",
+                   type=float, default=float(os.getenv("SIM_RATE", "100")),
+                   help="Load mode: aggregate samples per second across all assets")
+    p.add_argument("--connections",
+                   type=int, default=int(os.getenv("SIM_CONNECTIONS", "16")),
+                   help="Load mode: keep-alive connection pool size")
+    p.add_argument("--duration",
+                   type=float, default=float(os.getenv("SIM_DURATION", "0")),
+                   help="Load mode: seconds to run (0 = until Ctrl-C)")
+    p.add_argument("--max-backlog",
+                   type=int, default=int(os.getenv("SIM_MAX_BACKLOG", "10000")),
+                   help="Load mode: scheduled-but-unsent requests before new ones are dropped")
+    p.add_argument("--asset-prefix",
+                   default=os.getenv("SIM_ASSET_PREFIX", "sim"),
+                   help="Load mode: asset IDs are <prefix>-<n>")
+    p.add_argument("--seed",
+                   type=int, default=int(os.getenv("SIM_SEED", "0")),
+                   help="Base seed for the simulated plant")
     return p.parse_args()
 
+
+# ---------------- load mode ----------------
+class HttpConn:
+    """Minimal keep-alive HTTP/1.1 client connection (stdlib only)."""
+
+    def __init__(self, host, port, tls):
+        self.host, self.port, self.tls = host, port, tls
+        self.reader = self.writer = None
+
+    async def _open(self):
+        ctx = ssl.create_default_context() if self.tls else None
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=ctx)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def post(self, path, body, content_type="application/json"):
+        """Send one POST and read the whole response; returns the status code."""
+        return (await self.request(path, body, content_type))[0]
+
+    async def request(self, path, body, content_type="application/json"):
+        """Send one POST; returns ``(status, response body)``."""
+        if self.writer is None:
+            await self._open()
+        head = (f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection" and value == "close":
+                close = True
+        data = b""
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                data += (await self.reader.readexactly(size + 2))[:size]
+                if size == 0:
+                    break
+        elif length:
+            data = await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status, data
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return float("nan")
+    return sorted_vals[min(len(sorted_vals) - 1, int(q / 100.0 * len(sorted_vals)))]
+
+
+def apply_reply(plant, i, body):
+    """Feed the setpoints echoed in an ingest response back into the model."""
+    try:
+        sp = json.loads(body).get("setpoints")
+    except (ValueError, AttributeError):
+        return
+    if sp:
+        plant.command(i, sp.get("speed"), sp.get("valve"))
+
+
+async def run_load(args, log):
+    """Open-loop load: every tick (N/rate seconds) the plant model advances all
+    N assets in one step, and asset i's sample is due at tick + i/rate
+    regardless of how the server is doing.  Latency is measured from the due
+    time, so time spent waiting for a free pooled connection counts against
+    the server."""
+    url = urlsplit(args.url.rstrip("/"))
+    tls = url.scheme == "https"
+    host, port = url.hostname, url.port or (443 if tls else 80)
+    base = url.path[:-len("/ingest-wgc")] if url.path.endswith("/ingest-wgc") else url.path
+    assets = [f"{args.asset_prefix}-{n}" for n in range(args.assets)]
+    rate = max(args.rate, 0.001)
+    plant = Plant(len(assets), args.seed)
+
+    queue = asyncio.Queue()
+    lat, errors = [], {}
+    stats = {"sent": 0, "ok": 0, "dropped": 0}
+
+    async def worker():
+        conn = HttpConn(host, port, tls)
+        while True:
+            item = await queue.get()
+            if item is None:
+                conn.close()
+                return
+            due, i, body = item
+            try:
+                status, reply = await asyncio.wait_for(
+                    conn.request(f"{base}/ingest-wgc/{assets[i]}", body), args.timeout)
+                if status == 200:
+                    stats["ok"] += 1
+                    apply_reply(plant, i, reply)
+                else:
+                    errors[status] = errors.get(status, 0) + 1
+            except Exception as e:
+                conn.close()
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+                if args.verbose:
+                    log.info("post failed: %s", e)
+            lat.append(time.monotonic() - due)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, args.connections))]
+    log.warning("load: %d assets, %.1f samples/s, %d connections → %s://%s:%d%s/ingest-wgc/<asset>",
+                len(assets), rate, len(workers), url.scheme, host, port, base)
+
+    sched = Deadlines(len(assets) / rate, args.late)
+    started = sched.start
+    k = 0
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            delay = sched.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tick, dt = sched.next()
+            tick_due, tick_wall = started + tick * sched.period, sched.due_wall(tick)
+            for i, sample in enumerate(plant.step(dt)):
+                due = tick_due + i / rate
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                k += 1
+                if queue.qsize() >= args.max_backlog:
+                    stats["dropped"] += 1
+                    continue
+                sample["ts"] = tick_wall + i / rate
+                queue.put_nowait((due, i, json.dumps(sample, separators=(",", ":")).encode()))
+                stats["sent"] += 1
+                if args.log_every and k % args.log_every == 0:
+                    log.warning("scheduled %d, done %d, backlog %d", k, len(lat), queue.qsize())
+    except asyncio.CancelledError:
+        pass
+    finally:
+        sched_elapsed = time.monotonic() - started
+        stats["skipped"] = sched.skipped * len(assets)
+        for _ in workers:
+            queue.put_nowait(None)
+        await asyncio.gather(*workers, return_exceptions=True)
+        elapsed = time.monotonic() - started
+        report(stats, lat, errors, sched_elapsed, elapsed)
+
+
+def report(stats, lat, errors, sched_elapsed, elapsed):
+    lat = sorted(lat)
+    ms = lambda v: v * 1000.0
+    print("\n=== wgc_sim load report ===")
+    print(f"scheduled   {stats['sent'] + stats['dropped']} in {sched_elapsed:.1f}s "
+          f"({(stats['sent'] + stats['dropped']) / max(sched_elapsed, 1e-9):.1f}/s offered)")
+    print(f"completed   {len(lat)} in {elapsed:.1f}s ({len(lat) / max(elapsed, 1e-9):.1f}/s)")
+    print(f"ok          {stats['ok']}")
+    print(f"errors      {sum(errors.values())}" + (f"  {errors}" if errors else ""))
+    print(f"dropped     {stats['dropped']} (backlog full)")
+    print(f"skipped     {stats.get('skipped', 0)} (behind schedule, --late skip)")
+    if lat:
+        print(f"latency ms  p50 {ms(percentile(lat, 50)):.1f}  p95 {ms(percentile(lat, 95)):.1f}  "
+              f"p99 {ms(percentile(lat, 99)):.1f}  max {ms(lat[-1]):.1f}")
+
 def main():
     args = parse_args()
 
@@ -67,6 +394,13 @@ def main():
                         format="[SIM] %(message)s")
     log = logging.getLogger("sim")
 
+    if args.assets > 0:
+        try:
+            asyncio.run(run_load(args, log))
+        except KeyboardInterrupt:
+            pass
+        return
+
     base = args.url.rstrip("/")
     INGEST = base if base.endswith("/ingest-wgc") else f"{base}/ingest-wgc"
     period = 1.0 / max(args.hz, 0.001)
@@ -75,21 +409,45 @@ def main():
         log.info("posting to %s at %.2f Hz", INGEST, args.hz)
 
     session = requests.Session()
-    i = 0
-    while True:
-        i += 1
-        payload = make_sample(i)
+    plant = Plant(1, args.seed)
+    sched = Deadlines(period, args.late)
+    batch = []
+    last_flush = time.monotonic()
+
+    def post(body, headers=None):
         try:
-            resp = session.post(INGEST, json=payload, timeout=args.timeout)
-            if args.verbose and resp.status_code != 200:
+            if headers:
+                resp = session.post(INGEST, data=body, headers=headers, timeout=args.timeout)
+            else:
+                resp = session.post(INGEST, json=body, timeout=args.timeout)
+            if resp.status_code == 200:
+                apply_reply(plant, 0, resp.content)
+            elif args.verbose:
                 log.info("post → %s", resp.status_code)
         except Exception as e:
             if args.verbose:
                 log.info("post failed: %s", e)
 
+    i = 0
+    while True:
+        k, dt = sched.wait()
+        i += 1
+        payload = plant.step(dt)[0]
+        payload["ts"] = sched.due_wall(k)
+        if args.batch_size <= 1:
+            post(payload)
+        else:
+            batch.append(payload)
+            now = time.monotonic()
+            if len(batch) >= args.batch_size or now - last_flush >= args.flush_interval:
+                body = "\n".join(json.dumps(s, separators=(",", ":")) for s in batch)
+                post(body, {"Content-Type": "application/x-ndjson"})
+                batch = []
+                last_flush = now
+
         if args.log_every and (i % args.log_every == 0):
-            log.info("sent %d samples", i)
-        time.sleep(period)
+            log.info("sent %d samples (%.1f/s, %d skipped)", i,
+                     i / max(time.monotonic() - sched.start, 1e-6), sched.skipped)
 
 if __name__ == "__main__":
     main()
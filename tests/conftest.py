@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import queue
+import threading
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def root_app():
+    """``app.py``, imported once per test session."""
+    import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def wgc_only_app():
+    """``wgc_only/app.py`` under its own module name (it would clash with ``app``)."""
+    spec = importlib.util.spec_from_file_location("wgc_only_app", os.path.join(ROOT, "wgc_only", "app.py"))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def settle(app_module):
+    """Apply whatever ``app.py``'s ingest queue holds now, without waiting for its worker."""
+    q = app_module.ingest_queue
+    while q is not None and q.drain():
+        pass
+
+
+class FakeSocketIO:
+    """Enough of ``flask_socketio.SocketIO`` for ``Broadcaster``: records emits, runs tasks in daemon threads."""
+
+    def __init__(self, members=()):
+        self.server = SimpleNamespace(eio=SimpleNamespace(create_queue=queue.Queue),
+                                      manager=SimpleNamespace(rooms={"/": {r: {"sid"} for r in members}}))
+        self.emitted = []
+        self.lock = threading.Lock()
+
+    def start_background_task(self, fn, *args):
+        t = threading.Thread(target=fn, args=args, daemon=True)
+        t.start()
+        return t
+
+    def sleep(self, s):
+        time.sleep(s)
+
+    def emit(self, event, payload, to=None):
+        with self.lock:
+            self.emitted.append((event, to, payload))
+
+    def to(self, room):
+        with self.lock:
+            return [(e, p) for e, r, p in self.emitted if r == room]
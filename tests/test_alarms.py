@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from twin.alarms import AssetAlarms, RULES, _severity
+from twin.kpi import compute_wgc_kpis_batch
+
+
+def feed(alarms, t0, t1, values, step=1.0):
+    events = []
+    t = t0
+    while t <= t1:
+        events.extend(alarms.update(t, values))
+        t += step
+    return events
+
+
+def kinds(events, type=None):
+    return [e["event"] for e in events if type is None or e["type"] == type]
+
+
+def test_raise_needs_on_delay():
+    a = AssetAlarms("c1", on_s=2, off_s=5)
+    assert feed(a, 0, 1, {"bearing_temp": 380.0}) == []
+    ev = feed(a, 2, 2, {"bearing_temp": 380.0})
+    assert kinds(ev) == ["raise"] and ev[0]["severity"] == "Warn" and ev[0]["id"] == "Bearing-1"
+    assert [x["type"] for x in a.active()] == ["Bearing"]
+
+
+def test_short_excursion_is_ignored():
+    a = AssetAlarms("c1", on_s=2, off_s=5)
+    feed(a, 0, 1, {"bearing_temp": 380.0})
+    assert feed(a, 2, 10, {"bearing_temp": 300.0}) == []
+    assert a.active() == []
+
+
+def test_escalate_then_clear_with_deadband():
+    a = AssetAlarms("c1", on_s=0, off_s=2)
+    assert kinds(a.update(0, {"vib_axial": 4.0})) == ["raise"]
+    assert kinds(a.update(1, {"vib_axial": 8.0, "vib_vert": 1.0})) == ["escalate"]
+    # back under the trip limit but not by the 0.3 deadband: stays Trip
+    assert feed(a, 2, 10, {"vib_axial": 7.0}) == []
+    assert kinds(feed(a, 11, 13, {"vib_axial": 5.0})) == ["deescalate"]
+    assert kinds(feed(a, 14, 16, {"vib_axial": 2.0})) == ["clear"]
+    # never acknowledged: still listed after clearing
+    assert [x["state"] for x in a.active()] == ["cleared"]
+
+
+def test_ack_removes_cleared_alarm():
+    a = AssetAlarms("c1", on_s=0, off_s=0)
+    a.update(0, {"seal_leakage": 1.0})
+    a.update(1, {"seal_leakage": 0.0})
+    (ack,) = a.ack(2, type="Seal")
+    assert ack["event"] == "ack" and ack["acked"]
+    assert a.active() == [] and a.ack(3) == []
+
+
+def test_missing_or_nan_leaves_state():
+    a = AssetAlarms("c1", on_s=0, off_s=0)
+    a.update(0, {"lube_oil_pressure": 1.0})
+    assert a.update(1, {"lube_oil_pressure": float("nan")}) == ()
+    assert a.update(2, {}) == ()
+    assert a.active()[0]["severity"] == "Trip"
+
+
+def test_log_query_filters():
+    a = AssetAlarms("c1", on_s=0, off_s=0)
+    a.update(0, {"bearing_temp": 380.0, "seal_leakage": 1.0})
+    a.update(10, {"bearing_temp": 300.0})
+    assert kinds(a.log.query(type="Bearing")) == ["raise", "clear"]
+    assert kinds(a.log.query(t0=5)) == ["clear"]
+    assert len(a.log.query(event="raise")) == 2
+
+
+@pytest.mark.parametrize("column, rule_type, key", [
+    ("surge_margin_pct", "Surge", "alarm_surge"),
+    ("vib_axial", "Vibration", "alarm_vibration"),
+    ("lube_oil_pressure", "LubeOil", "alarm_lube_oil"),
+    ("bearing_temp", "Bearing", "alarm_bearing"),
+    ("seal_leakage", "Seal", "alarm_seal"),
+])
+def test_severity_matches_kpi_engine_at_the_limits(column, rule_type, key):
+    rule = next(r for r in RULES if r.type == rule_type)
+    limits = [rule.warn[1]] + ([rule.trip[1]] if rule.trip else [])
+    values = np.array(sorted({x + d for x in limits for d in (-1e-3, 0.0, 1e-3)}))
+    if column == "surge_margin_pct":
+        # drive the surge margin through flow at the default speed (surge flow 11.2 kg/s)
+        cols = {"flow": 11.2 * (1 + values / 100.0)}
+        values = compute_wgc_kpis_batch(cols)["surge_margin_pct"]
+    else:
+        cols = {column: values}
+    batch = compute_wgc_kpis_batch(cols)[key]
+    assert [_severity(rule, float(v)) for v in values] == batch.tolist()
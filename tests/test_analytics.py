@@ -0,0 +1,71 @@
+import random
+import statistics
+
+import pytest
+
+from conftest import settle
+from twin.analytics import AssetAnalytics, SignalStats
+
+
+def test_sliding_window_matches_full_recompute():
+    rng = random.Random(1)
+    st = SignalStats(window=20, alpha=0.5)
+    xs = [rng.gauss(10.0, 2.0) for _ in range(100)]
+    for i, x in enumerate(xs):
+        st.observe(float(i), x)
+        st.absorb(x)
+    win = xs[-20:]
+    assert st.n == 20
+    assert st.mean == pytest.approx(statistics.fmean(win), rel=1e-9)
+    assert st.std == pytest.approx(statistics.stdev(win), rel=1e-9)
+    assert st.min == min(win) and st.max == max(win)
+    assert st.roc == pytest.approx(xs[-1] - xs[-2])
+
+
+def test_ewma():
+    st = SignalStats(window=5, alpha=0.5)
+    for x in (0.0, 4.0, 8.0):
+        st.absorb(x)
+    assert st.ewma == 5.0
+
+
+def feed(an, values, t0=0.0):
+    out = []
+    for i, v in enumerate(values):
+        out += an.update(t0 + i, {"flow": v})
+    return out
+
+
+def test_spike_is_flagged_and_kept_out_of_the_mean():
+    rng = random.Random(2)
+    an = AssetAnalytics(("flow", "P1"), detect=("flow",), window=50, warmup=30, z=4.0)
+    assert feed(an, [20.0 + rng.gauss(0, 0.1) for _ in range(40)]) == []
+    mean = an.stats["flow"].mean
+    found = an.update(40.0, {"flow": 30.0, "P1": 1e9})
+    assert [a["kind"] for a in found] == ["spike"] and found[0]["signal"] == "flow"
+    assert an.stats["flow"].mean == mean and an.stats["flow"].max == 30.0
+    assert an.summary()["anomalies"][-1]["value"] == 30.0
+
+
+def test_sustained_shift_is_drift():
+    rng = random.Random(3)
+    an = AssetAnalytics(("flow",), window=200, warmup=30, z=10.0, k=0.5, h=8.0)
+    feed(an, [20.0 + rng.gauss(0, 0.1) for _ in range(100)])
+    found = feed(an, [20.3 + rng.gauss(0, 0.1) for _ in range(50)], t0=100.0)
+    assert found and found[0]["kind"] == "drift_up"
+
+
+def test_warmup_and_missing_values():
+    an = AssetAnalytics(("flow",), warmup=30, z=1.0)
+    assert feed(an, [1.0, 100.0, float("nan"), None, 1.0]) == []
+    assert an.stats["flow"].n == 3
+
+
+def test_stats_endpoint(root_app):
+    client = root_app.app.test_client()
+    assert client.post("/ingest-wgc/stats-a", json=[{"oper": {"flow": f}} for f in (10.0, 12.0)]).status_code == 200
+    settle(root_app)
+    body = client.get("/api/wgc/stats?asset=stats-a").get_json()
+    assert body["asset"] == "stats-a" and body["signals"]["flow"]["n"] == 2
+    assert body["signals"]["flow"]["mean"] == 11.0
+    assert client.get("/api/wgc/stats?asset=nope").status_code == 404
@@ -0,0 +1,60 @@
+import pytest
+
+from twin.registry import AssetRegistry, AssetState, RegistryFull, valid_asset_id
+from conftest import settle
+
+SAMPLE = {"oper": {"flow": 20.0, "speed": 7000.0}}
+
+
+def test_registry_is_bounded_and_validates_ids():
+    reg = AssetRegistry(lambda a: AssetState(a, {}, {}), max_assets=2)
+    a = reg.get_or_create("a")
+    assert reg.get_or_create("a") is a and reg.get("zzz") is None
+    reg.get_or_create("b")
+    with pytest.raises(RegistryFull):
+        reg.get_or_create("c")
+    with pytest.raises(ValueError):
+        reg.get_or_create("no spaces")
+    assert reg.ids() == ["a", "b"]
+
+
+@pytest.mark.parametrize("asset_id, ok", [("c-1", True), ("C_2.x", True), ("", False), ("a/b", False),
+                                          ("x" * 200, False)])
+def test_valid_asset_id(asset_id, ok):
+    assert bool(valid_asset_id(asset_id)) is ok
+
+
+def test_rejected_ingest_does_not_register(root_app):
+    client = root_app.app.test_client()
+    r = client.post("/ingest-wgc/reg-rejected", json={"oper": {"speed": -1}})
+    assert r.status_code == 400
+    assert root_app.assets.get("reg-rejected") is None
+    assert "reg-rejected" not in [a["asset"] for a in client.get("/api/assets").get_json()]
+
+
+def test_assets_are_independent(root_app):
+    client = root_app.app.test_client()
+    assert client.post("/ingest-wgc/reg-a", json={"oper": {"flow": 11.0}}).status_code == 200
+    assert client.post("/ingest-wgc/reg-b", json={"oper": {"flow": 22.0}}).status_code == 200
+    settle(root_app)
+    assert root_app.assets.get("reg-a").oper["flow"] == 11.0
+    assert root_app.assets.get("reg-b").oper["flow"] == 22.0
+
+
+def test_wgc_only_reads_do_not_register(wgc_only_app):
+    client = wgc_only_app.app.test_client()
+    assert client.get("/api/wgc/history?asset=reg-ghost").status_code == 404
+    assert client.get("/api/wgc/history?asset=bad%20id").status_code == 400
+    assert wgc_only_app.assets.get("reg-ghost") is None
+
+
+def test_wgc_only_socket_errors(wgc_only_app):
+    sio = wgc_only_app.socketio.test_client(wgc_only_app.app, query_string="asset=reg-ghost")
+    assert wgc_only_app.assets.get("reg-ghost") is None
+    sio.emit("wgc_data", {"asset": "bad id", **SAMPLE})
+    sio.emit("wgc_alarm_ack", {"asset": "reg-ghost"})
+    errors = [m for m in sio.get_received() if m["name"] == "wgc_error"]
+    assert len(errors) == 2
+    sio.emit("wgc_data", {"asset": "reg-real", **SAMPLE})
+    assert wgc_only_app.assets.get("reg-real").oper["flow"] == 20.0
+    sio.disconnect()
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from conftest import ROOT
+from twin.backplane import Backplane, MemoryBackplane, UnixBackplane, serve
+
+
+def poll_until(bp, n, timeout=5.0):
+    got, end = [], time.monotonic() + timeout
+    while len(got) < n:
+        assert time.monotonic() < end, f"got {got}"
+        got += [p.decode() if isinstance(p, bytes) else p for p in bp._poll()]
+        time.sleep(0.005)
+    return got
+
+
+def test_memory_delivers_in_one_order_to_every_worker():
+    a, b = MemoryBackplane("memory://order"), MemoryBackplane("memory://order")
+    a.publish({"n": 1})
+    b.publish({"n": 2})
+    a.publish({"n": 3})
+    assert a._poll() == b._poll() == ['{"n":1}', '{"n":2}', '{"n":3}']
+
+
+def test_retained_messages_reach_late_workers():
+    a = MemoryBackplane("memory://retain")
+    a.publish({"run": False}, retain="cmd:x")
+    a.publish({"run": True}, retain="cmd:x")
+    a.publish({"sample": 1})
+    late = MemoryBackplane("memory://retain")
+    assert late._poll() == ['{"run":true}']
+
+
+def test_from_env():
+    assert Backplane.from_env("") is None
+    assert isinstance(Backplane.from_env("memory://env"), MemoryBackplane)
+    with pytest.raises(ValueError):
+        Backplane.from_env("redis://localhost")
+
+
+def test_unix_broker_relays_to_all_workers(tmp_path):
+    path = str(tmp_path / "bus.sock")
+    threading.Thread(target=serve, args=(path,), daemon=True).start()
+    end = time.monotonic() + 5.0
+    while not os.path.exists(path):
+        assert time.monotonic() < end
+        time.sleep(0.01)
+    a = UnixBackplane(f"unix://{path}")
+    a.publish({"run": True}, retain="cmd:x")
+    b = UnixBackplane(f"unix://{path}")
+    assert a.connected and b.connected
+    assert poll_until(b, 1) == ['{"run":true}']     # retained, replayed on connect
+    b.publish({"n": 1})
+    assert poll_until(a, 2) == ['{"run":true}', '{"n":1}']
+    assert poll_until(b, 1) == ['{"n":1}']
+
+
+TWO_WORKERS = textwrap.dedent("""
+    import importlib.util, sys
+
+    def load(name):
+        spec = importlib.util.spec_from_file_location(name, "app.py")
+        mod = sys.modules[name] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        return mod
+
+    a, b = load("worker_a"), load("worker_b")
+    r = a.app.test_client().post("/ingest-wgc/bp", json=[{"oper": {"flow": 21.0}}] * 3)
+    assert r.status_code == 200, r.data
+    for _ in range(100):
+        a.socketio.sleep(0.02)      # let both workers' backplane and ingest tasks run
+        hist = b.assets.get("bp") and b.assets.get("bp").history
+        if hist is not None and len(hist) == 3:
+            break
+    assert len(a.assets.get("bp").history) == len(b.assets.get("bp").history) == 3
+    assert b.assets.get("bp").oper["flow"] == 21.0
+    assert b.app.test_client().get("/readyz").status_code == 200
+    print("ok")
+""")
+
+
+def test_two_workers_share_state():
+    env = {**os.environ, "WGC_BACKPLANE": "memory://workers", "PYTHONPATH": ROOT}
+    proc = subprocess.run([sys.executable, "-c", TWO_WORKERS], cwd=ROOT, env=env, capture_output=True,
+                          text=True, timeout=120)
+    assert proc.returncode == 0 and proc.stdout.strip().endswith("ok"), proc.stderr[-2000:]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from twin.downsample import minmax, lttb, lttb_multi
+from conftest import settle
+
+
+@pytest.fixture
+def columns():
+    rng = np.random.default_rng(0)
+    return [rng.normal(size=20000) for _ in range(14)]
+
+
+def test_minmax_uses_the_budget_for_one_column(columns):
+    idx = minmax(columns[:1], 1000)
+    assert 900 <= len(idx) <= 1000
+
+
+def test_minmax_stays_within_budget_for_many_columns(columns):
+    for n in (2, 3, 10, 100, 1000, 5000):
+        idx = minmax(columns, n)
+        assert len(idx) <= n and len(idx) >= n // 2
+        assert np.all(np.diff(idx) > 0)
+
+
+def test_minmax_keeps_spikes(columns):
+    columns[5][12345] = 100.0
+    columns[9][777] = -100.0
+    idx = minmax(columns, 500)
+    assert 12345 in idx and 777 in idx
+    assert idx[0] == 0 and idx[-1] == 19999
+
+
+def test_short_input_is_returned_whole():
+    np.testing.assert_array_equal(minmax([np.arange(5.0)], 10), np.arange(5))
+
+
+def test_lttb_point_counts(columns):
+    x = np.arange(20000.0)
+    assert len(lttb(x, columns[0], 300)) == 300
+    assert len(lttb_multi(x, columns, 1400)) <= 1400
+
+
+def _ingest(app, client, asset, n):
+    samples = [{"ts": 1700000000 + i, "oper": {"flow": 20 + (i % 7), "speed": 7000.0}} for i in range(n)]
+    assert client.post(f"/ingest-wgc/{asset}", json=samples).status_code == 200
+    settle(app)
+
+
+@pytest.mark.parametrize("max_points", ["0", "1", "-5", "lots"])
+def test_history_rejects_bad_max_points(root_app, max_points):
+    client = root_app.app.test_client()
+    _ingest(root_app, client, "ds-bad", 50)
+    r = client.get(f"/api/wgc/history?asset=ds-bad&tier=raw&max_points={max_points}")
+    assert r.status_code == 400
+
+
+def test_history_is_capped(root_app):
+    client = root_app.app.test_client()
+    _ingest(root_app, client, "ds-cap", 3000)
+    body = client.get("/api/wgc/history?asset=ds-cap&tier=raw&from=0&max_points=200").get_json()
+    assert body["n_raw"] == 3000 and body["method"] == "minmax"
+    assert 100 <= len(body["ts"]) <= 200
@@ -0,0 +1,55 @@
+import time
+
+from conftest import FakeSocketIO
+from twin.fanout import Broadcaster, diff
+
+
+def broadcaster(sio, max_hz):
+    return Broadcaster(sio, lambda src: {"asset": "a", **src}, "full", "delta", max_hz=max_hz)
+
+
+def wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_diff_keeps_only_changes():
+    assert diff({"a": 1, "s": {"x": 1, "y": 2}}, {"a": 1, "s": {"x": 1, "y": 3}}) == {"s": {"y": 2}}
+    assert diff({"a": None}, {}) == {"a": None}
+
+
+def test_unlimited_sends_full_then_deltas():
+    sio = FakeSocketIO()
+    b = broadcaster(sio, 0)
+    b.publish("r", {"flow": 1, "P1": 2})
+    b.publish("r", {"flow": 1, "P1": 3})
+    b.publish("r", {"flow": 1, "P1": 3})
+    assert sio.to("r") == [("full", {"asset": "a", "flow": 1, "P1": 2}), ("delta", {"asset": "a", "P1": 3})]
+
+
+def test_rate_limit_coalesces_and_idle_task_stays_quiet():
+    sio = FakeSocketIO()
+    b = broadcaster(sio, 10)
+    for i in range(5):
+        b.publish("r", {"n": i})
+    wait_for(lambda: sio.to("r"))
+    wait_for(lambda: sio.to("r")[-1][1]["n"] == 4)
+    assert len(sio.to("r")) <= 2
+    sent = len(sio.emitted)
+    time.sleep(0.3)
+    assert len(sio.emitted) == sent     # nothing published, nothing sent
+
+
+def test_slow_group_is_flushed_when_due_without_another_publish():
+    # unlimited fan-out, but a group subscribed at 5 Hz: its held-back update must still arrive
+    sio = FakeSocketIO()
+    b = broadcaster(sio, 0)
+    group = b.subscribe("r", ["flow"], hz=5)
+    sio.server.manager.rooms["/"][group] = {"sid"}
+    b.publish("r", {"flow": 1})
+    b.publish("r", {"flow": 2})
+    assert sio.to(group) == [("full", {"asset": "a", "flow": 1})]
+    wait_for(lambda: len(sio.to(group)) == 2, timeout=1.0)
+    assert sio.to(group)[1] == ("delta", {"asset": "a", "flow": 2})
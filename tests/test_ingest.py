@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from conftest import settle
+
+SAMPLE = {"oper": {"flow": 20.0, "speed": 7000.0}}
+
+
+def _post(client, asset, **kw):
+    r = client.post(f"/ingest-wgc/{asset}", **kw)
+    return r.status_code, r.get_json()
+
+
+@pytest.mark.parametrize("kw, n", [
+    ({"json": SAMPLE}, 1),
+    ({"json": [SAMPLE, SAMPLE, SAMPLE]}, 3),
+    ({"json": {"samples": [SAMPLE, SAMPLE]}}, 2),
+    ({"data": "\n".join(json.dumps(SAMPLE) for _ in range(4)) + "\n", "content_type": "application/x-ndjson"}, 4),
+])
+def test_batch_shapes(root_app, kw, n):
+    client = root_app.app.test_client()
+    asset = f"ing-{n}"
+    before = len(root_app.assets.get(asset).history) if root_app.assets.get(asset) else 0
+    status, body = _post(client, asset, **kw)
+    assert status == 200 and body["n"] == n
+    settle(root_app)
+    assert len(root_app.assets.get(asset).history) == before + n
+
+
+@pytest.mark.parametrize("kw", [
+    {"json": []},
+    {"json": {"samples": []}},
+    {"data": "\n\n", "content_type": "application/x-ndjson"},
+    {"data": "not json", "content_type": "application/json"},
+    {"data": "{\"oper\": {}}\nnot json\n", "content_type": "application/x-ndjson"},
+    {"json": [SAMPLE, {"ts": 1.7e12, **SAMPLE}]},
+    {"json": [SAMPLE, {"oper": {"nope": 1}}]},
+])
+def test_rejected_batches_apply_nothing(root_app, kw):
+    client = root_app.app.test_client()
+    status, body = _post(client, "ing-bad", **kw)
+    assert status == 400 and not body["ok"]
+    settle(root_app)
+    assert root_app.assets.get("ing-bad") is None
+
+
+def test_producer_ts_is_kept(root_app):
+    client = root_app.app.test_client()
+    status, _ = _post(client, "ing-ts", json=[{"ts": 1700000000.5, **SAMPLE}, {"ts": "2023-11-14T22:13:21Z", **SAMPLE}])
+    assert status == 200
+    settle(root_app)
+    ts, _ = root_app.assets.get("ing-ts").history.range()
+    assert ts.tolist() == [1700000000.5, 1700000001.0]
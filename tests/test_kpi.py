@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+import pytest
+
+from twin.kpi import compute_wgc_kpis, compute_wgc_kpis_batch, kpi_row
+
+NAN = math.nan
+
+SAMPLES = [
+    {"oper": {"flow": 10.0}},
+    {"oper": {"flow": 12.0, "speed": 7000.0, "P1": 2.0, "P2": 6.0}, "health": {"vib_axial": 3.5}},
+    {"oper": {"flow": 30.0}, "health": {"vib_vert": 7.1, "lube_oil_pressure": 1.4, "bearing_temp": 371.0}},
+    {"oper": {"flow": 25.0}, "health": {"vib_axial": NAN, "vib_horz": 4.0, "lube_oil_pressure": NAN}},
+    {"oper": {"flow": NAN}, "health": {"vib_axial": NAN, "vib_vert": NAN, "vib_horz": NAN, "seal_leakage": 0.6}},
+]
+
+
+def batch_row(sample):
+    # one-sample batch, so missing fields take the defaults as in the scalar path
+    cols = {k: np.array([v]) for sec in sample.values() for k, v in sec.items()}
+    return kpi_row(compute_wgc_kpis_batch(cols), 0)
+
+
+@pytest.mark.parametrize("sample", SAMPLES)
+def test_batch_matches_scalar(sample):
+    scalar, batch = compute_wgc_kpis(sample), batch_row(sample)
+    assert batch["alarms"] == scalar["alarms"]
+    for axis in ("axial", "vertical", "horizontal"):
+        assert batch["vibration"][axis]["band"] == scalar["vibration"][axis]["band"]
+    for key in ("compression_ratio", "head_index_norm", "surge_margin_pct", "efficiency_index"):
+        a, b = scalar[key], batch[key]
+        assert (math.isnan(a) and math.isnan(b)) or a == pytest.approx(b, rel=1e-12)
+
+
+def test_missing_vibration_reading_raises_nothing():
+    sample = {"health": {"vib_axial": NAN, "vib_vert": NAN, "vib_horz": NAN}}
+    scalar = compute_wgc_kpis(sample)
+    assert {v["band"] for v in scalar["vibration"].values()} == {"OK"}
+    assert not [a for a in scalar["alarms"] if a["type"] == "Vibration"]
+    batch = compute_wgc_kpis_batch({"vib_axial": [NAN, 8.0], "vib_vert": [NAN, 1.0], "vib_horz": [NAN, 1.0]})
+    assert batch["vib_band_axial"].tolist() == [0, 2] and batch["alarm_vibration"].tolist() == [0, 2]
+
+
+def test_band_edges():
+    bands = compute_wgc_kpis_batch({"vib_axial": [3.49, 3.5, 7.09, 7.1]})["vib_band_axial"]
+    assert bands.tolist() == [0, 1, 1, 2]
+    assert [compute_wgc_kpis({"health": {"vib_axial": v}})["vibration"]["axial"]["band"]
+            for v in (3.49, 3.5, 7.09, 7.1)] == ["OK", "Warning", "Warning", "Trip"]
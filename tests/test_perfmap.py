@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from conftest import settle
+from twin.perfmap import PerformanceMap
+
+
+@pytest.fixture(scope="module")
+def pm():
+    return PerformanceMap.synthetic()
+
+
+def test_grid_points_are_exact_and_cells_interpolate(pm):
+    op = pm.operating_point(30.0, 7000.0)
+    assert op["head"] == pytest.approx(7000.0 / 50.0)
+    mid = pm.operating_point(30.25, 7125.0)
+    corners = [pm.operating_point(f, s)["head"] for f in (30.0, 30.5) for s in (7000.0, 7250.0)]
+    assert mid["head"] == pytest.approx(sum(corners) / 4)
+
+
+def test_surge_line_matches_the_kpi_heuristic(pm):
+    for speed in (5000.0, 6123.0, 9999.0):
+        op = pm.operating_point(25.0, speed)
+        surge = 0.2 * speed / 1000.0 + 10.0
+        assert op["surge_flow"] == pytest.approx(surge)
+        assert op["surge_margin_pct"] == pytest.approx((25.0 - surge) / surge * 100.0)
+
+
+def test_outside_the_grid_is_clamped(pm):
+    op = pm.operating_point(100.0, 20000.0)
+    assert not op["in_map"] and op["head"] == pytest.approx(pm.head[-1, -1])
+    assert pm.operating_point(None, 7000.0) is None
+
+
+def test_bad_maps_are_rejected():
+    f, s = np.linspace(0, 1, 3), np.array([1.0, 2.0, 4.0])
+    with pytest.raises(ValueError):
+        PerformanceMap(f, s, np.zeros((3, 3)), np.zeros((3, 3)), np.zeros(3))
+    with pytest.raises(ValueError):
+        PerformanceMap(f, f, np.zeros((2, 3)), np.zeros((2, 3)), np.zeros(3))
+
+
+def test_load_round_trip(tmp_path, pm):
+    path = tmp_path / "map.npz"
+    np.savez(path, flow=pm.flow, speed=pm.speed, head=pm.head, efficiency=pm.efficiency, surge_flow=pm.surge_flow)
+    assert PerformanceMap.load(path).operating_point(21.3, 7400.0) == pm.operating_point(21.3, 7400.0)
+
+
+def test_map_endpoint_etag(root_app):
+    client = root_app.app.test_client()
+    r = client.get("/api/wgc/map")
+    assert r.status_code == 200 and r.headers["ETag"]
+    body = r.get_json()
+    assert len(body["head"]) == len(body["speed"]) and len(body["head"][0]) == len(body["flow"])
+    assert client.get("/api/wgc/map", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+
+
+def test_operating_point_endpoint(root_app):
+    client = root_app.app.test_client()
+    client.post("/ingest-wgc/map-a", json={"oper": {"flow": 30.0, "speed": 7000.0}})
+    settle(root_app)
+    body = client.get("/api/wgc/operating-point?asset=map-a").get_json()
+    assert body["head"] == pytest.approx(140.0) and body["flow"] == 30.0
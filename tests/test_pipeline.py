@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from twin.pipeline import IngestQueue, QueueFull
+
+
+class FakeSocketIO:
+    """Just enough of flask_socketio.SocketIO; the worker task is never started."""
+
+    def __init__(self):
+        self.server = SimpleNamespace(eio=SimpleNamespace(create_queue=queue.Queue))
+        self.tasks = []
+
+    def start_background_task(self, fn, *args):
+        self.tasks.append(fn)
+        return fn
+
+    def sleep(self, s):
+        time.sleep(s)
+
+
+def make(apply=None, **kw):
+    applied = []
+
+    def record(batch):
+        applied.extend(batch)
+
+    return IngestQueue(FakeSocketIO(), apply or record, **kw), applied
+
+
+def test_drain_applies_in_order_in_batches():
+    q, applied = make(maxsize=100, batch_max=3)
+    q.put(list(range(7)))
+    assert [q.drain(), q.drain(), q.drain(), q.drain()] == [3, 3, 1, 0]
+    assert applied == list(range(7))
+    assert q.stats()["processed"] == 7 and len(q) == 0
+
+
+def test_worker_started_once():
+    q, _ = make(maxsize=100)
+    q.put([1])
+    q.put([2])
+    assert len(q.socketio.tasks) == 1
+
+
+def test_drop_oldest_keeps_newest():
+    q, applied = make(maxsize=3, policy="drop-oldest")
+    q.put([1, 2])
+    q.put([3, 4, 5])
+    q.drain()
+    assert applied == [3, 4, 5]
+    assert q.stats()["dropped"] == 2
+
+
+def test_reject_refuses_whole_request():
+    q, _ = make(maxsize=3, policy="reject")
+    q.put([1, 2])
+    with pytest.raises(QueueFull):
+        q.put([3, 4])
+    assert len(q) == 2 and q.stats()["rejected"] == 2
+
+
+def test_block_times_out():
+    q, _ = make(maxsize=1, policy="block", block_s=0.02, poll_s=0.005)
+    q.put([1])
+    with pytest.raises(QueueFull):
+        q.put([2])
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        make(policy="spill")
+
+
+def test_failed_items_counted_not_fatal():
+    q, _ = make(apply=lambda batch: sum(1 for x in batch if x < 0), maxsize=100)
+    q.put([1, -1, 2, -2, 3])
+    assert q.drain() == 5
+    stats = q.stats()
+    assert stats["processed"] == 3 and stats["dropped"] == 2
+
+
+def test_apply_exception_drops_batch_only():
+    def apply(batch):
+        if "boom" in batch:
+            raise RuntimeError("boom")
+
+    q, _ = make(apply=apply, maxsize=100, batch_max=2)
+    q.put(["boom", 1, 2, 3])
+    q.drain()
+    q.drain()
+    stats = q.stats()
+    assert stats["dropped"] == 2 and stats["processed"] == 2
+
+
+def test_worker_wakes_on_put():
+    q, applied = make(maxsize=100)
+    q.put([1])
+    worker = threading.Thread(target=q._run, daemon=True)
+    worker.start()
+    deadline = time.monotonic() + 2
+    while len(applied) < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    q.put([2, 3])
+    while len(applied) < 3 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert applied == [1, 2, 3]
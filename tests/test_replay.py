@@ -0,0 +1,119 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import settle
+from twin.history import RingHistory
+from twin.replay import ReplayEngine, ReplayError, parse_speed
+
+
+class FakeSocketIO:
+    def start_background_task(self, fn, *args):
+        t = threading.Thread(target=fn, args=args, daemon=True)
+        t.start()
+        return t
+
+    def sleep(self, s):
+        time.sleep(s)
+
+
+def history(n, dt=0.1):
+    hist = RingHistory(("flow",), capacity=1000)
+    for i in range(n):
+        hist.append(100.0 + i * dt, [float(i)])
+    return hist
+
+
+def wait_done(session, timeout=5.0):
+    end = time.monotonic() + timeout
+    while session.state == "running":
+        assert time.monotonic() < end
+        time.sleep(0.01)
+
+
+def test_parse_speed():
+    assert parse_speed(None) == 1.0 and parse_speed("10x") == 10.0 and parse_speed("MAX") == 0.0
+    for bad in ("0", "-1", "fast", [1]):
+        with pytest.raises(ReplayError):
+            parse_speed(bad)
+
+
+def test_max_speed_feeds_every_row_in_chunks():
+    fed = []
+    engine = ReplayEngine(FakeSocketIO(), lambda target, ts, rows: fed.append((target, ts, rows)),
+                          tick_s=0.001, chunk=7)
+    session = engine.start(history(30), "a", "a.replay", speed=0.0)
+    wait_done(session)
+    assert session.state == "done" and session.describe()["progress"] == 1.0
+    assert {t for t, _, _ in fed} == {"a.replay"} and max(len(ts) for _, ts, _ in fed) <= 7
+    ts = [x for _, chunk, _ in fed for x in chunk]
+    assert ts == pytest.approx(list(100.0 + np.arange(30) * 0.1))
+    assert [r[0] for _, _, rows in fed for r in rows] == list(range(30))
+
+
+def test_paced_replay_follows_recorded_time():
+    fed = []
+    engine = ReplayEngine(FakeSocketIO(), lambda target, ts, rows: fed.extend(ts), tick_s=0.01)
+    t = time.monotonic()
+    session = engine.start(history(11), "a", "b", speed=10.0)     # 1 s recorded -> 0.1 s
+    wait_done(session)
+    assert len(fed) == 11 and 0.09 <= time.monotonic() - t < 1.0
+
+
+def test_backpressure_is_retried_and_stop_ends_the_session():
+    calls = {"n": 0}
+
+    def feed(target, ts, rows):
+        calls["n"] += 1
+        if calls["n"] <= 2:
+            raise OverflowError("queue full")
+
+    engine = ReplayEngine(FakeSocketIO(), feed, retry=(OverflowError,), tick_s=0.001, chunk=5)
+    session = engine.start(history(10), "a", "b", speed=0.0)
+    wait_done(session)
+    assert session.state == "done" and calls["n"] == 4
+
+    slow = engine.start(history(100, dt=1.0), "a", "b", speed=1.0)
+    assert engine.stop(slow.id).state == "stopped"
+    assert engine.stop("nope") is None
+
+
+def test_failures_and_limits():
+    engine = ReplayEngine(FakeSocketIO(), lambda *a: 1 / 0, tick_s=0.001, max_sessions=1, max_rows=50)
+    with pytest.raises(ReplayError):
+        engine.start(history(0), "a", "b")
+    with pytest.raises(ReplayError):
+        engine.start(history(60), "a", "b")
+    session = engine.start(history(10), "a", "b", speed=0.0)
+    wait_done(session)
+    assert session.state == "failed" and "division" in session.error
+    engine.sessions[session.id] = SimpleNamespace(state="running")
+    with pytest.raises(ReplayError):
+        engine.start(history(10), "a", "b")
+
+
+def test_replay_endpoint(root_app):
+    client = root_app.app.test_client()
+    samples = [{"ts": 1700000000.0 + i, "oper": {"flow": 20.0 + i}} for i in range(20)]
+    assert client.post("/ingest-wgc/rec-a", json=samples).status_code == 200
+    settle(root_app)
+    assert client.post("/api/wgc/replay", json={"asset": "rec-a", "speed": "warp"}).status_code == 400
+    assert root_app.assets.get("rec-a.replay") is None
+    assert client.post("/api/wgc/replay", json={"asset": "rec-a", "target": "rec-a"}).status_code == 400
+    assert client.post("/api/wgc/replay", json={"asset": "nope"}).status_code == 404
+    r = client.post("/api/wgc/replay", json={"asset": "rec-a", "speed": "max"})
+    assert r.status_code == 200
+    sid = r.get_json()["id"]
+    for _ in range(100):
+        root_app.socketio.sleep(0.01)       # let the replay task run
+        settle(root_app)
+        if client.get(f"/api/wgc/replay/{sid}").get_json()["state"] != "running":
+            break
+    assert client.get(f"/api/wgc/replay/{sid}").get_json()["state"] == "done"
+    ts, cols = root_app.assets.get("rec-a.replay").history.range()
+    assert ts.tolist() == [s["ts"] for s in samples] and cols["flow"][-1] == 39.0
+    assert any(s["id"] == sid for s in client.get("/api/wgc/replay").get_json())
+    assert client.delete("/api/wgc/replay/nope").status_code == 404
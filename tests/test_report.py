@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+
+from conftest import settle
+from twin.alarms import ON_S, OFF_S
+from twin.report import _Builder, period_bounds
+
+COLUMNS = ("flow", "speed", "vib_axial", "vib_vert", "vib_horz")
+
+
+def build(vib, dt=0.5, gap_s=10.0):
+    ts = np.arange(len(vib)) * dt + 1_700_000_000.0
+    n = len(ts)
+    data = np.vstack([np.full(n, 30.0), np.full(n, 6000.0), np.asarray(vib, dtype=np.float64),
+                      np.full(n, 1.0), np.full(n, 1.0)])
+    b = _Builder(COLUMNS, None, gap_s)
+    half = n // 2
+    b.add(ts[:half], data[:, :half])        # two chunks: engine state carries over
+    b.add(ts[half:], data[:, half:])
+    return b.result()
+
+
+def test_short_spike_is_not_an_alarm():
+    # one sample over the limit: a threshold crossing, but shorter than the alarm on-delay
+    rep = build([1.0] * 10 + [5.0] + [1.0] * 10)
+    assert rep["alarms"]["Vibration"]["Warn"] == {"count": 0, "seconds": 0.0}
+    assert rep["vibration_bands"]["Warning"]["seconds"] == 0.5
+
+
+def test_sustained_condition_is_one_episode_with_engine_timing():
+    on, off = int(ON_S / 0.5), int(OFF_S / 0.5)
+    # once raised, flickering around the limit stays one alarm thanks to the deadband
+    high = [5.0] * (on + 4) + [3.4, 5.0] * 10
+    rep = build([1.0] * 10 + high + [1.0] * (off + 10))
+    warn = rep["alarms"]["Vibration"]["Warn"]
+    assert warn["count"] == 1
+    # raised ON_S after the condition started, cleared OFF_S after it ended
+    assert warn["seconds"] == (len(high) - on + off) * 0.5
+
+
+def test_escalation_counts_each_level():
+    rep = build([1.0] * 4 + [5.0] * 12 + [8.0] * 12 + [1.0] * 20)
+    vib = rep["alarms"]["Vibration"]
+    assert vib["Warn"]["count"] == 1 and vib["Trip"]["count"] == 1
+
+
+def test_quiet_rows_do_not_hide_a_pending_alarm():
+    # a quiet row between two high runs resets the on-delay, also when the rows are skipped
+    on = int(ON_S / 0.5)
+    rep = build([1.0] * 5 + [5.0] * (on - 1) + [1.0] * 50 + [5.0] * (on - 1) + [1.0] * 5)
+    assert rep["alarms"]["Vibration"]["Warn"]["count"] == 0
+
+
+def test_report_endpoint(root_app):
+    client = root_app.app.test_client()
+    now = time.time()
+    t0 = period_bounds("day", now)[1]
+    samples = [{"ts": max(t0, now - 60) + i, "oper": {"flow": 20.0}, "health": {"vib_axial": 5.0}}
+               for i in range(30)]
+    assert client.post("/ingest-wgc/rep-a", json=samples).status_code == 200
+    settle(root_app)
+    r = client.get("/api/wgc/report?asset=rep-a&period=day")
+    assert r.status_code == 202 and r.headers["Retry-After"]
+    for _ in range(50):
+        root_app.socketio.sleep(0.05)       # let the report task run
+        r = client.get("/api/wgc/report?asset=rep-a&period=day")
+        if r.status_code == 200:
+            break
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["asset"] == "rep-a" and body["coverage"]["rows"] == 30 and not body["complete"]
+    assert body["alarms"]["Vibration"]["Warn"]["count"] == 1
+    assert client.get("/api/wgc/report?asset=rep-a&period=day",
+                      headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+    assert client.get("/api/wgc/report?asset=rep-a&period=week").status_code == 400
+    assert client.get("/api/wgc/report?asset=nope").status_code == 404
+    assert any(x["asset"] == "rep-a" for x in client.get("/api/wgc/reports?asset=rep-a").get_json())
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pytest
+
+from twin.history import RingHistory
+from twin.rollup import Rollups, parse_tiers
+
+TIERS = [("1s", 1.0, 100), ("1m", 60.0, 100)]
+
+
+def test_parse_tiers_sorts_and_checks_multiples():
+    assert parse_tiers("1m:10, 1s:20") == [("1s", 1.0, 20), ("1m", 60.0, 10)]
+    with pytest.raises(ValueError):
+        parse_tiers("2s:10,3s:10")
+
+
+def test_buckets_aggregate_and_include_open_bucket():
+    r = Rollups(("a", "b"), TIERS)
+    for ts, a, b in [(0.1, 1.0, None), (0.6, 3.0, 5.0), (1.2, 10.0, math.nan)]:
+        r.append(ts, [a, b])
+    ts, cols = r.view("1s", "mean").range()
+    np.testing.assert_array_equal(ts, [0.0, 1.0])     # closed bucket + the open one
+    np.testing.assert_array_equal(cols["a"], [2.0, 10.0])
+    assert cols["b"][0] == 5.0 and math.isnan(cols["b"][1])
+    assert r.view("1s", "max").range()[1]["a"][0] == 3.0
+    assert r.view("1s", "count").range()[1]["b"].tolist() == [1.0, 0.0]
+
+
+def test_coarse_tier_built_from_closed_fine_buckets():
+    r = Rollups(("a",), TIERS)
+    for t in range(125):
+        r.append(float(t), [float(t)])
+    ts, cols = r.view("1m", "mean").range()
+    np.testing.assert_array_equal(ts, [0.0, 60.0, 120.0])
+    np.testing.assert_allclose(cols["a"][:2], [29.5, 89.5])
+    # the 1 m open bucket only has the closed 1 s buckets 120..123 so far
+    assert cols["a"][2] == pytest.approx(121.5)
+
+
+def test_load_matches_incremental_appends():
+    rng = np.random.default_rng(7)
+    hist = RingHistory(("a", "b"), capacity=1000)
+    inc = Rollups(("a", "b"), TIERS)
+    for i in range(400):
+        # float32 values, as the history stores them
+        row = [float(np.float32(rng.normal())), math.nan if i % 5 == 0 else float(np.float32(rng.normal()))]
+        ts = 1000.0 + 0.37 * i
+        hist.append(ts, row)
+        inc.append(ts, row)
+    bulk = Rollups(("a", "b"), TIERS)
+    bulk.load(hist)
+    for label, _, _ in TIERS:
+        for agg in ("mean", "min", "max", "last", "count"):
+            t1, c1 = inc.view(label, agg).range()
+            t2, c2 = bulk.view(label, agg).range()
+            np.testing.assert_array_equal(t1, t2)
+            for name in ("a", "b"):
+                np.testing.assert_allclose(c1[name], c2[name], rtol=1e-6, equal_nan=True)
+
+
+def test_unknown_view():
+    r = Rollups(("a",), TIERS)
+    with pytest.raises(ValueError):
+        r.view("1h")
+    with pytest.raises(ValueError):
+        r.view("1s", "median")
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from twin.schema import SchemaError, Validator, sample_epoch, TS_MIN, TS_MAX
+
+
+@pytest.fixture
+def validator():
+    return Validator(present={"vib_axial": "v_ax"})
+
+
+def named(validator, sample):
+    return dict(validator.named(validator.parse(sample)))
+
+
+def test_parse_coerces_and_accepts_aliases(validator):
+    out = named(validator, {"oper": {"P1": "3.5", "flow": 20}, "health": {"vib_axial": 2.0, "oil_pressure": 3}})
+    assert out == {"P1": 3.5, "flow": 20.0, "v_ax": 2.0, "lube_oil_pressure": 3.0}
+
+
+def test_none_and_nan_are_no_reading(validator):
+    assert named(validator, {"oper": {"P1": None, "flow": math.nan}}) == {}
+
+
+@pytest.mark.parametrize("sample, message", [
+    ([], "JSON object"),
+    ({"oper": [1]}, "oper must be an object"),
+    ({"oper": {"nope": 1}}, "unknown field oper.nope"),
+    ({"oper": {"P1": True}}, "not a number"),
+    ({"oper": {"P1": "x"}}, "not a number"),
+    ({"oper": {"P1": {}}}, "not a number"),
+    ({"oper": {"speed": 1e6}}, "outside"),
+])
+def test_parse_rejects(validator, sample, message):
+    with pytest.raises(SchemaError, match=message):
+        validator.parse(sample)
+
+
+def test_passthrough_is_skipped():
+    v = Validator(passthrough={("gas", "composition")})
+    assert v.parse({"gas": {"composition": {"CH4": 0.9}, "mw": 18.0}}) == [(v.slot["mw"], 18.0)]
+
+
+def test_apply_updates_state_by_slot(validator):
+    class State:
+        values = None
+        oper, health, gas = {}, {}, {}
+
+    st = State()
+    vals = validator.apply(st, validator.parse({"oper": {"P1": 2.0}}))
+    assert st.oper["P1"] == 2.0 and vals[validator.slot["P1"]] == 2.0
+    assert math.isnan(vals[validator.slot["flow"]])
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    (1700000000, 1700000000.0),
+    ("1700000000.5", 1700000000.5),
+    ("2023-11-14T22:13:20Z", 1700000000.0),
+    (TS_MIN, TS_MIN),
+    (TS_MAX, TS_MAX),
+])
+def test_sample_epoch_accepts(value, expected):
+    assert sample_epoch(value) == expected
+
+
+@pytest.mark.parametrize("value, message", [
+    (True, "not a timestamp"),
+    ([1], "not a timestamp"),
+    ("yesterday", "not a timestamp"),
+    (math.inf, "finite"),
+    (math.nan, "finite"),
+    (12.0, "outside"),
+    (1700000000000, "milliseconds"),
+])
+def test_sample_epoch_rejects(value, message):
+    with pytest.raises(SchemaError, match=message):
+        sample_epoch(value)
+
+
+def test_schema_error_is_value_error():
+    assert issubclass(SchemaError, ValueError)
@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+
+from twin.history import RingHistory
+from twin.seglog import SegmentLog, SUFFIX
+
+COLUMNS = ("P1", "flow")
+
+
+def write(directory, rows, **kw):
+    lg = SegmentLog(directory, COLUMNS, fsync="never", **kw)
+    for ts, values in rows:
+        lg.append(ts, values)
+    lg.close()
+    return lg
+
+
+def test_rows_survive_reopen(tmp_path):
+    write(tmp_path, [(1.0, [1.0, 2.0]), (2.0, [None, 4.0])])
+    lg = SegmentLog(tmp_path, COLUMNS)
+    ts, cols = lg.range()
+    np.testing.assert_array_equal(ts, [1.0, 2.0])
+    assert math.isnan(cols["P1"][1]) and cols["flow"].tolist() == [2.0, 4.0]
+
+
+def test_every_start_opens_a_new_segment(tmp_path):
+    write(tmp_path, [(1.0, [1.0, 1.0])])
+    write(tmp_path, [(2.0, [2.0, 2.0])])
+    lg = SegmentLog(tmp_path, COLUMNS)
+    assert len(lg.paths()) == 2 and len(lg) == 2
+    np.testing.assert_array_equal(lg.range(t0=1.5)[0], [2.0])
+
+
+def test_torn_record_is_ignored(tmp_path):
+    lg = write(tmp_path, [(1.0, [1.0, 1.0]), (2.0, [2.0, 2.0])])
+    path = lg.paths()[-1]
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")        # a crash mid-record
+    reopened = SegmentLog(tmp_path, COLUMNS)
+    np.testing.assert_array_equal(reopened.range()[0], [1.0, 2.0])
+    write(tmp_path, [(3.0, [3.0, 3.0])])   # the next start writes a fresh segment
+    np.testing.assert_array_equal(SegmentLog(tmp_path, COLUMNS).range()[0], [1.0, 2.0, 3.0])
+
+
+def test_foreign_layout_is_skipped(tmp_path):
+    SegmentLog(tmp_path, ("other",), fsync="never").close()
+    lg = SegmentLog(tmp_path, ("other",), fsync="never")
+    lg.append(1.0, [1.0])
+    lg.close()
+    assert len(SegmentLog(tmp_path, COLUMNS)) == 0
+
+
+def test_rotation_and_retention(tmp_path):
+    rows = [(float(t), [float(t), 0.0]) for t in range(100)]
+    write(tmp_path, rows, segment_bytes=256, retain=3)
+    lg = SegmentLog(tmp_path, COLUMNS)
+    paths = lg.paths()
+    assert len(paths) == 3 and all(p.endswith(SUFFIX) for p in paths)
+    ts = lg.range()[0]
+    assert ts[-1] == 99.0 and np.all(np.diff(ts) == 1.0)
+
+
+def test_load_into_keeps_newest_rows(tmp_path):
+    write(tmp_path, [(float(t), [float(t), 0.0]) for t in range(10)])
+    write(tmp_path, [(float(t), [float(t), 0.0]) for t in range(10, 15)])
+    hist = RingHistory(COLUMNS, capacity=8)
+    assert SegmentLog(tmp_path, COLUMNS).load_into(hist) == 8
+    ts, cols = hist.range()
+    np.testing.assert_array_equal(ts, np.arange(7.0, 15.0))
+    np.testing.assert_array_equal(cols["P1"], np.arange(7.0, 15.0))
+
+
+def test_reset_starts_a_new_run(tmp_path):
+    # a replay after a reset goes back in time: the log reads like the reset ring buffer
+    rows = [(float(t), [float(t), 0.0]) for t in (10, 11, 12)] + [(float(t), [float(t), 1.0]) for t in (1, 2)]
+    write(tmp_path, rows)
+    lg = SegmentLog(tmp_path, COLUMNS)
+    assert len(lg.paths()) == 2
+    ts, cols = lg.range()
+    np.testing.assert_array_equal(ts, [1.0, 2.0])
+    assert lg.first_ts == 1.0 and lg.last_ts == 2.0
+    hist = RingHistory(COLUMNS, capacity=8)
+    assert lg.load_into(hist) == 2
+    write(tmp_path, [(3.0, [3.0, 1.0])])     # a restart continues the current run
+    np.testing.assert_array_equal(SegmentLog(tmp_path, COLUMNS).range()[0], [1.0, 2.0, 3.0])
+
+
+def test_maps_follow_appends_and_rotation(tmp_path):
+    lg = SegmentLog(tmp_path, COLUMNS, fsync="never", segment_bytes=256)
+    reader = SegmentLog(tmp_path, COLUMNS)
+    lg.append(1.0, [1.0, 1.0])
+    lg.flush()
+    first = reader._maps()
+    assert reader._maps() is first and len(reader) == 1
+    for t in range(2, 40):
+        lg.append(float(t), [float(t), 0.0])
+    lg.flush()
+    assert len(lg.paths()) > 1
+    assert len(reader) == len(lg) == 39
+    closed = reader._maps()[0]
+    lg.append(40.0, [40.0, 0.0])
+    lg.flush()
+    assert len(reader) == 40 and reader._maps()[0] is closed    # a closed segment keeps its map
+    lg.close()
+
+
+def test_fsync_goes_through_sync_hook(tmp_path):
+    calls = []
+    lg = SegmentLog(tmp_path, COLUMNS, fsync="always")
+    lg.sync = calls.append
+    lg.append(1.0, [1.0, 1.0])
+    lg.flush()
+    lg.close()
+    assert len(calls) == 2
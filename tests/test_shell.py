@@ -0,0 +1,64 @@
+import gzip
+import json
+import time
+
+from conftest import settle
+from twin.shell import VENDOR, Body, StaticAssets
+
+
+def test_body_gzip_only_when_it_pays():
+    assert Body(b"x" * 100, "text/plain").gz is None
+    big = Body(b"abc" * 1000, "text/plain")
+    assert gzip.decompress(big.gz) == b"abc" * 1000
+
+
+def test_vendor_fallback_and_fingerprint(tmp_path):
+    (tmp_path / "app.js").write_text("console.log(1)")
+    assets = StaticAssets(str(tmp_path))
+    name = next(iter(VENDOR))
+    assert assets.url(name) == VENDOR[name]
+    url = assets.url("app.js")
+    assert url.startswith("/assets/app.js?v=") and url.endswith(assets.get("app.js").etag)
+    assert assets.get("../etc/passwd") is None and assets.get("missing.js") is None
+
+
+def test_shell_is_cached_with_an_etag(root_app):
+    client = root_app.app.test_client()
+    r = client.get("/wgc")
+    assert r.status_code == 200 and r.mimetype == "text/html"
+    assert r.headers["ETag"] and "no-cache" in r.headers["Cache-Control"]
+    assert client.get("/wgc", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+    gz = client.get("/wgc", headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["Content-Encoding"] == "gzip" and gzip.decompress(gz.data) == r.data
+
+
+def test_fingerprinted_assets_are_immutable(root_app):
+    client = root_app.app.test_client()
+    url = root_app.STATIC.url("favicon.svg")
+    r = client.get(url)
+    assert r.status_code == 200 and "immutable" in r.headers["Cache-Control"]
+    assert "max-age=31536000" in r.headers["Cache-Control"]
+    stale = client.get("/assets/favicon.svg?v=old")
+    assert stale.status_code == 200 and "no-cache" in stale.headers["Cache-Control"]
+    assert client.get("/assets/../app.py").status_code == 404
+
+
+def test_bootstrap(root_app):
+    client = root_app.app.test_client()
+    body = client.get("/api/wgc/bootstrap?asset=boot-new").get_json()
+    assert body["history"] is None and body["snapshot"]["asset"] == "boot-new"
+    assert root_app.assets.get("boot-new") is None
+
+    now = time.time()
+    samples = [{"ts": now - 100 + i, "oper": {"flow": 20.0 + i % 5}} for i in range(50)]
+    client.post("/ingest-wgc/boot-a", json=samples)
+    settle(root_app)
+    r = client.get("/api/wgc/bootstrap?asset=boot-a&max_points=10&signals=flow",
+                   headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip" and "no-store" in r.headers["Cache-Control"]
+    body = json.loads(gzip.decompress(r.data))
+    assert body["snapshot"]["asset"] == "boot-a"
+    assert body["history"]["n_raw"] == 50 and len(body["history"]["ts"]) <= 10
+    short = client.get("/api/wgc/bootstrap?asset=boot-a&window=10").get_json()
+    assert short["history"]["n_raw"] <= 11
+    assert client.get("/api/wgc/bootstrap?asset=boot-a&max_points=1").status_code == 400
@@ -0,0 +1,46 @@
+from twin.startup import Startup
+
+
+def test_ready_after_setup_and_checks():
+    s = Startup()
+    assert s.status()[0] is False
+    s.ready()
+    ok = {"value": False}
+    s.check("backplane", lambda: ok["value"])
+    s.check("broken", lambda: 1 / 0)
+    ready, body = s.status()
+    assert not ready and body["failing"] == ["backplane", "broken"]
+    ok["value"] = True
+    del s.checks["broken"]
+    ready, body = s.status()
+    assert ready and body["ready"] and body["ready_s"] is not None and body["first_ingest_s"] is None
+    s.ingested()
+    assert s.status()[1]["first_ingest_s"] is not None
+
+
+def test_lazy_builds_on_first_use():
+    s = Startup()
+    built = []
+    obj = s.lazy("thing", lambda: built.append(1) or "abc")
+    assert not obj.loaded and s.status()[1]["lazy"] == ["thing"]
+    assert obj.upper() == "ABC" and obj.upper() == "ABC"
+    assert built == [1] and obj.loaded and "thing" in s.status()[1]["loaded"]
+
+
+def test_probes(root_app, wgc_only_app):
+    for mod in (root_app, wgc_only_app):
+        client = mod.app.test_client()
+        r = client.get("/readyz")
+        assert r.status_code == 200 and r.get_json()["ready"]
+        assert client.get("/healthz").get_json()["pid"]
+
+
+def test_readyz_is_503_while_a_check_fails(root_app):
+    client = root_app.app.test_client()
+    root_app.STARTUP.check("test", lambda: False)
+    try:
+        r = client.get("/readyz")
+        assert r.status_code == 503 and r.get_json()["failing"] == ["test"]
+        assert client.get("/healthz").status_code == 200
+    finally:
+        del root_app.STARTUP.checks["test"]
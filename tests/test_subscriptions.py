@@ -0,0 +1,74 @@
+import pytest
+
+from conftest import FakeSocketIO, settle
+from twin.fanout import Broadcaster, Selector, group_room, subscription_args
+
+PAYLOAD = {"wgc": {"oper": {"flow": 1.0, "speed": 2.0}, "health": {"v_ax": 3.0, "v_vert": 4.0},
+                   "kpi": {"cr": 5.0}, "ts": "t"},
+           "asset": "a", "running": True}
+
+
+def test_selector_matches_fields_paths_and_sections():
+    sel = Selector(["flow", "health.v_ax", "kpi"])
+    assert sel.project(PAYLOAD) == {"wgc": {"oper": {"flow": 1.0}, "health": {"v_ax": 3.0},
+                                            "kpi": {"cr": 5.0}, "ts": "t"},
+                                    "asset": "a", "running": True}
+    assert Selector(["nothing"]).project(PAYLOAD) == {"wgc": {"ts": "t"}, "asset": "a", "running": True}
+
+
+def test_subscription_args():
+    assert subscription_args({}) == (None, None, None)
+    assert subscription_args({"assets": "a,b", "signals": "flow, kpi", "max_hz": "2"}) == (["a", "b"], ["flow", "kpi"], 2.0)
+    assert subscription_args({"asset": "a"})[0] == ["a"]
+    for bad in ({"assets": [1]}, {"signals": {"x": 1}}, {"max_hz": "fast"}, {"max_hz": 0}):
+        with pytest.raises(ValueError):
+            subscription_args(bad)
+
+
+def test_same_subscription_shares_a_group():
+    assert group_room("r", ["b", "a"], 1.0) == group_room("r", ["a", "b", "a"], 1.0)
+    assert group_room("r", ["a"], 1.0) != group_room("r", ["a"], 2.0)
+    sio = FakeSocketIO()
+    b = Broadcaster(sio, lambda src: src, "full", "delta", max_hz=4)
+    assert b.subscribe("r", ["flow"], 10) == group_room("r", ["flow"], 4)      # capped at max_hz
+    assert b.rooms("r") == ["r", group_room("r", ["flow"], 4)]
+
+
+def test_group_gets_only_its_fields_and_only_when_they_change():
+    sio = FakeSocketIO()
+    b = Broadcaster(sio, lambda src: src, "full", "delta", max_hz=0)
+    group = b.subscribe("r", ["flow"])
+    sio.server.manager.rooms["/"][group] = {"sid"}
+    b.publish("r", {"asset": "a", "flow": 1.0, "P1": 1.0})
+    b.publish("r", {"asset": "a", "flow": 1.0, "P1": 2.0})      # nothing the group asked for changed
+    b.publish("r", {"asset": "a", "flow": 3.0, "P1": 2.0})
+    assert sio.to(group) == [("full", {"asset": "a", "flow": 1.0}), ("delta", {"asset": "a", "flow": 3.0})]
+
+
+def test_empty_group_is_dropped():
+    sio = FakeSocketIO()
+    b = Broadcaster(sio, lambda src: src, "full", "delta", max_hz=0)
+    group = b.subscribe("r", ["flow"])
+    b.publish("r", {"flow": 1.0})
+    assert group not in b.rooms("r") and sio.to(group) == []
+
+
+def test_socket_subscription(root_app):
+    client = root_app.app.test_client()
+    client.post("/ingest-wgc/sub-a", json={"oper": {"flow": 20.0, "speed": 7000.0}, "health": {"v_ax": 2.0}})
+    settle(root_app)
+    sio = root_app.socketio.test_client(root_app.app, query_string="asset=sub-a&signals=flow&max_hz=1")
+    first = [m for m in sio.get_received() if m["name"] == "wgc_data"][0]["args"][0]
+    assert first["asset"] == "sub-a" and first["wgc"]["oper"] == {"flow": 20.0}
+    assert "health" not in first["wgc"] and "kpi" not in first["wgc"]
+
+    sio.emit("subscribe", {"assets": ["sub-a"], "signals": ["health.v_ax"]})
+    got = sio.get_received()
+    ack = [m for m in got if m["name"] == "wgc_subscribed"][0]["args"][0]
+    assert ack["ok"] and ack["assets"] == ["sub-a"] and ack["signals"] == ["health.v_ax"]
+    data = [m for m in got if m["name"] == "wgc_data"][0]["args"][0]
+    assert data["wgc"]["health"] == {"v_ax": 2.0} and "oper" not in data["wgc"]
+
+    sio.emit("subscribe", {"max_hz": -1})
+    assert sio.get_received()[-1]["args"][0]["ok"] is False
+    sio.disconnect()
@@ -0,0 +1,42 @@
+import math
+
+import pytest
+
+from twin.wire import PackedSchema, FLAG_RUNNING, packed_room
+
+FIELDS = (("oper", "P1"), ("oper", "flow"), ("health", "vib_axial"))
+
+
+def test_round_trip_leaves_out_missing():
+    schema = PackedSchema(FIELDS)
+    frame = schema.pack({"oper": {"P1": 3.5, "flow": None}, "health": {"vib_axial": 2.25}}, 1700000000.5,
+                        FLAG_RUNNING)
+    assert len(frame) == schema.size == 8 + 8 + 4 * len(FIELDS)
+    flags, ts, sections = schema.unpack(frame)
+    assert flags == FLAG_RUNNING and ts == 1700000000.5
+    assert sections == {"oper": {"P1": 3.5}, "health": {"vib_axial": 2.25}}
+
+
+def test_values_are_float32():
+    schema = PackedSchema(FIELDS)
+    _, _, sections = schema.unpack(schema.pack({"oper": {"P1": 0.1}}, 0.0))
+    assert sections["oper"]["P1"] != 0.1 and math.isclose(sections["oper"]["P1"], 0.1, rel_tol=1e-6)
+
+
+@pytest.mark.parametrize("frame", [b"", b"\x00" * 10, "text", None, {"oper": {}}])
+def test_unpack_rejects_malformed(frame):
+    schema = PackedSchema(FIELDS)
+    with pytest.raises(ValueError, match="packed frame"):
+        schema.unpack(frame)
+
+
+def test_unpack_accepts_bytes_like():
+    schema = PackedSchema(FIELDS)
+    frame = schema.pack({"oper": {"P1": 1.0}}, 5.0)
+    assert schema.unpack(bytearray(frame)) == schema.unpack(memoryview(frame))
+
+
+def test_describe_and_room():
+    d = PackedSchema(FIELDS).describe()
+    assert d["fields"] == ["oper.P1", "oper.flow", "health.vib_axial"] and d["size"] == 28
+    assert packed_room("asset:a") == "asset:a|packed"
@@ -0,0 +1 @@
+"""Shared building blocks for the WGC digital-twin servers (app.py and wgc_only/app.py)."""
@@ -0,0 +1,218 @@
+"""Stateful process alarms: hysteresis, minimum duration, acknowledgement.
+
+``compute_wgc_kpis`` classifies every sample on its own; the engine here
+keeps one state machine per alarm type and asset, so a sustained
+condition is one alarm, not one per sample:
+
+* an alarm is raised (or escalated Warn -> Trip) once the condition has
+  held for ``WGC_ALARM_ON_S`` seconds, and lowered or cleared once the
+  value has been back inside the limit by the rule's deadband for
+  ``WGC_ALARM_OFF_S`` seconds; time is the samples' own timestamps, so
+  every worker behind a backplane reaches the same state,
+* an escalation needs a new acknowledgement; a cleared alarm that was
+  never acknowledged stays listed until it is (ISA-18.2 style),
+* only transitions produce events (``raise``, ``escalate``,
+  ``deescalate``, ``clear``, ``ack``); each asset keeps the last
+  ``WGC_ALARM_HISTORY`` of them, indexed by time for range queries.
+
+Limits and messages are the ones the KPI engine uses (``twin.kpi.ALARMS``).
+"""
+import os
+import bisect
+from operator import lt, le, gt, ge
+from collections import namedtuple
+
+from twin.history import iso, to_epoch
+from twin.kpi import ALARMS, SEVERITIES
+
+ON_S = float(os.getenv("WGC_ALARM_ON_S", "2"))
+OFF_S = float(os.getenv("WGC_ALARM_OFF_S", "5"))
+HISTORY = int(os.getenv("WGC_ALARM_HISTORY", "10000"))
+
+EVENTS = ("raise", "escalate", "deescalate", "clear", "ack")
+
+# inputs: canonical signal names (worst of several for vibration); high: alarm above the limits;
+# warn / trip: (comparison, limit), the same comparisons as compute_wgc_kpis_batch (trip None = no trip)
+Rule = namedtuple("Rule", "type inputs high warn trip deadband messages")
+
+_MESSAGES = {kind: messages for kind, _, messages in ALARMS}
+
+RULES = (
+    Rule("Surge", ("surge_margin_pct",), False, (lt, 10.0), (le, 0.0), 2.0, _MESSAGES["Surge"]),
+    Rule("Vibration", ("vib_axial", "vib_vert", "vib_horz"), True, (ge, 3.5), (ge, 7.1), 0.3, _MESSAGES["Vibration"]),
+    Rule("LubeOil", ("lube_oil_pressure",), False, (lt, 2.0), (lt, 1.5), 0.1, _MESSAGES["LubeOil"]),
+    Rule("Bearing", ("bearing_temp",), True, (gt, 370.0), None, 2.0, _MESSAGES["Bearing"]),
+    Rule("Seal", ("seal_leakage",), True, (gt, 0.5), None, 0.05, _MESSAGES["Seal"]),
+)
+INPUTS = tuple(dict.fromkeys(name for r in RULES for name in r.inputs))
+
+
+def _severity(rule, v):
+    if rule.trip is not None and rule.trip[0](v, rule.trip[1]):
+        return 2
+    return 1 if rule.warn[0](v, rule.warn[1]) else 0
+
+
+class _Alarm:
+    """State of one rule on one asset."""
+
+    __slots__ = ("rule", "level", "acked", "id", "raised", "value", "pending", "pending_since")
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.level = 0
+        self.acked = True
+        self.id = None          # occurrence ID while raised or awaiting acknowledgement
+        self.raised = None
+        self.value = None
+        self.pending = None     # level the value currently asks for
+        self.pending_since = None
+
+    def describe(self):
+        r = self.rule
+        return {"id": self.id, "type": r.type, "severity": SEVERITIES[self.level],
+                "state": "active" if self.level else "cleared", "acked": self.acked,
+                "message": r.messages.get(self.level or 1), "raised": iso(self.raised),
+                "value": None if self.value is None else round(self.value, 4)}
+
+
+class AlarmLog:
+    """Bounded, time-ordered event history with a timestamp index."""
+
+    def __init__(self, capacity=HISTORY):
+        self.capacity = capacity
+        self.events = []
+        self.ts = []
+
+    def append(self, epoch, event):
+        self.events.append(event)
+        self.ts.append(epoch)
+        if len(self.events) > self.capacity * 2:
+            # trimmed in blocks, so appends stay O(1) amortized
+            del self.events[:-self.capacity], self.ts[:-self.capacity]
+
+    def query(self, t0=None, t1=None, type=None, severity=None, event=None, alarm_id=None, limit=1000):
+        """Events in ``[t0, t1]`` matching the filters, oldest first (the newest ``limit``)."""
+        a = max(bisect.bisect_left(self.ts, t0) if t0 is not None else 0, len(self.ts) - self.capacity)
+        b = bisect.bisect_right(self.ts, t1) if t1 is not None else len(self.ts)
+        out = [e for e in self.events[a:b]
+               if (type is None or e["type"] == type) and (severity is None or e["severity"] == severity)
+               and (event is None or e["event"] == event) and (alarm_id is None or e["id"] == alarm_id)]
+        return out[-limit:] if limit else out
+
+    def clear(self):
+        self.events.clear()
+        self.ts.clear()
+
+
+class AssetAlarms:
+    """All alarm state machines of one asset.
+
+    ``update(epoch, values)`` takes the current readings by canonical
+    name (missing or NaN = no reading, state unchanged) and returns the
+    transition events it caused.
+    """
+
+    def __init__(self, asset_id, rules=RULES, on_s=ON_S, off_s=OFF_S, history=HISTORY):
+        self.asset_id = asset_id
+        self.alarms = [_Alarm(r) for r in rules]
+        self.by_type = {a.rule.type: a for a in self.alarms}
+        self.on_s = on_s
+        self.off_s = off_s
+        self.log = AlarmLog(history)
+        self.seq = 0
+
+    def update(self, epoch, values):
+        events = None
+        for alarm in self.alarms:
+            rule = alarm.rule
+            v = None
+            for name in rule.inputs:
+                x = values.get(name)
+                if x is None or x != x:
+                    continue
+                if v is None or (x > v if rule.high else x < v):
+                    v = x
+            if v is None:
+                continue
+            alarm.value = v
+            level = alarm.level
+            want = _severity(rule, v)
+            if want < level:
+                # lowering needs the value back inside the limit by the deadband
+                want = min(level, _severity(rule, v + rule.deadband if rule.high else v - rule.deadband))
+            if want == level:
+                alarm.pending = None
+                continue
+            if alarm.pending != want:
+                alarm.pending, alarm.pending_since = want, epoch
+            if epoch - alarm.pending_since >= (self.on_s if want > level else self.off_s):
+                ev = self._transition(alarm, want, epoch)
+                events = events or []
+                events.append(ev)
+        return events or ()
+
+    def _transition(self, alarm, level, epoch):
+        prev, alarm.level, alarm.pending = alarm.level, level, None
+        if prev == 0:
+            kind = "raise"
+            alarm.id = f"{alarm.rule.type}-{self.seq + 1}"
+            alarm.raised, alarm.acked = epoch, False
+        elif level > prev:
+            kind = "escalate"
+            alarm.acked = False
+        elif level:
+            kind = "deescalate"
+        else:
+            kind = "clear"
+        ev = self._event(alarm, kind, epoch, prev)
+        if kind == "clear" and alarm.acked:
+            alarm.id = None
+        return ev
+
+    def _event(self, alarm, kind, epoch, prev):
+        self.seq += 1
+        r = alarm.rule
+        ev = {"seq": self.seq, "id": alarm.id, "asset": self.asset_id, "type": r.type, "event": kind,
+              "severity": SEVERITIES[alarm.level], "prev": SEVERITIES[prev],
+              "message": r.messages.get(alarm.level or prev or 1), "ts": iso(epoch),
+              "value": None if alarm.value is None else round(alarm.value, 4), "acked": alarm.acked}
+        self.log.append(epoch, ev)
+        return ev
+
+    def ack(self, epoch, alarm_id=None, type=None):
+        """Acknowledge one alarm (by occurrence ID or type) or, with neither, all of them."""
+        events = []
+        for alarm in self.alarms:
+            if alarm.id is None or alarm.acked:
+                continue
+            if (alarm_id is not None and alarm.id != alarm_id) or (type is not None and alarm.rule.type != type):
+                continue
+            alarm.acked = True
+            events.append(self._event(alarm, "ack", epoch, alarm.level))
+            if alarm.level == 0:
+                alarm.id = None
+        return events
+
+    def active(self):
+        """Raised alarms and cleared ones still awaiting acknowledgement."""
+        return [a.describe() for a in self.alarms if a.id is not None]
+
+    def clear(self):
+        for alarm in self.alarms:
+            alarm.__init__(alarm.rule)
+        self.log.clear()
+
+
+def history_args(args):
+    """Filters of an alarm-history query (``from``/``to``/``type``/``severity``/``event``/``id``/``limit``)."""
+    event = args.get("event") or None
+    if event is not None and event not in EVENTS:
+        raise ValueError(f"unknown event: {event}")
+    severity = args.get("severity") or None
+    if severity is not None and severity not in SEVERITIES[1:]:
+        raise ValueError(f"unknown severity: {severity}")
+    return {"t0": to_epoch(args.get("from")), "t1": to_epoch(args.get("to")), "type": args.get("type") or None,
+            "severity": severity, "event": event, "alarm_id": args.get("id") or None,
+            "limit": int(args.get("limit", 1000))}
+
@@ -0,0 +1,179 @@
+"""Incremental per-signal statistics and streaming anomaly detection.
+
+Every sample updates each signal's running statistics in O(1):
+
+* mean / variance over the last ``window`` samples (sliding Welford update,
+  no re-summing of the window),
+* an EWMA,
+* min / max over the same window (monotonic deques, amortised O(1)),
+* rate of change against the previous sample (units per second).
+
+Signals listed in ``detect`` are also checked before they enter the window:
+
+* **spike** -- ``|x - mean| / std >= z`` (the sample is kept out of the
+  mean/variance/EWMA so one spike does not mask the next),
+* **drift** -- two-sided CUSUM of the standardised residual with slack
+  ``k`` and threshold ``h``; it fires on a sustained shift the rolling
+  mean has not caught up with, then resets.
+
+Detection starts once ``warmup`` samples have been seen.  Nothing here
+rescans history.
+"""
+import os
+import math
+from collections import deque
+
+from twin import metrics
+from twin.history import iso
+
+WINDOW = int(os.getenv("WGC_STATS_WINDOW", "120"))               # samples
+EWMA_ALPHA = float(os.getenv("WGC_STATS_EWMA_ALPHA", "0.1"))
+WARMUP = int(os.getenv("WGC_ANOMALY_WARMUP", "30"))
+SPIKE_Z = float(os.getenv("WGC_ANOMALY_Z", "4.0"))
+CUSUM_K = float(os.getenv("WGC_ANOMALY_CUSUM_K", "0.5"))
+CUSUM_H = float(os.getenv("WGC_ANOMALY_CUSUM_H", "8.0"))
+RECENT = 50                                                       # anomalies kept per asset
+
+ANOMALIES = metrics.counter("wgc_anomalies_total", "Anomalies raised by kind", ("kind",))
+
+
+def detect_signals(default):
+    """Signals to run detectors on: ``WGC_ANOMALY_SIGNALS`` (comma list, ``*`` = all) or ``default``."""
+    raw = os.getenv("WGC_ANOMALY_SIGNALS", "")
+    if raw.strip() == "*":
+        return None
+    return tuple(s.strip() for s in raw.split(",") if s.strip()) or tuple(default)
+
+
+class SignalStats:
+    """Rolling statistics of one signal."""
+
+    __slots__ = ("window", "alpha", "_buf", "_i", "n", "mean", "_m2", "ewma", "last", "last_ts",
+                 "roc", "_seq", "_min", "_max", "cusum_hi", "cusum_lo")
+
+    def __init__(self, window=WINDOW, alpha=EWMA_ALPHA):
+        self.window = window
+        self.alpha = alpha
+        self._buf = [0.0] * window
+        self._i = 0
+        self.n = 0              # samples in the mean/variance window
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.ewma = None
+        self.last = None
+        self.last_ts = None
+        self.roc = None
+        self._seq = 0
+        self._min = deque()     # (seq, value), increasing values
+        self._max = deque()     # (seq, value), decreasing values
+        self.cusum_hi = 0.0
+        self.cusum_lo = 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    def zscore(self, x):
+        # floor the spread so a perfectly flat signal does not divide by zero
+        std = max(self.std, 1e-6 * abs(self.mean), 1e-9)
+        return (x - self.mean) / std
+
+    def observe(self, ts, x):
+        """Update min/max and rate of change (every sample, spikes included)."""
+        if self.last is not None and ts is not None and self.last_ts is not None and ts > self.last_ts:
+            self.roc = (x - self.last) / (ts - self.last_ts)
+        self.last, self.last_ts = x, ts
+        self._seq += 1
+        seq, old = self._seq, self._seq - self.window
+        mn, mx = self._min, self._max
+        while mn and mn[-1][1] >= x:
+            mn.pop()
+        mn.append((seq, x))
+        while mn[0][0] <= old:
+            mn.popleft()
+        while mx and mx[-1][1] <= x:
+            mx.pop()
+        mx.append((seq, x))
+        while mx[0][0] <= old:
+            mx.popleft()
+
+    def absorb(self, x):
+        """Add ``x`` to the mean/variance window and the EWMA."""
+        if self.n < self.window:
+            self._buf[self.n] = x
+            self.n += 1
+            d = x - self.mean
+            self.mean += d / self.n
+            self._m2 += d * (x - self.mean)
+        else:
+            old = self._buf[self._i]
+            self._buf[self._i] = x
+            self._i = (self._i + 1) % self.window
+            mean = self.mean + (x - old) / self.window
+            self._m2 = max(0.0, self._m2 + (x - old) * (x - mean + old - self.mean))
+            self.mean = mean
+        self.ewma = x if self.ewma is None else self.ewma + self.alpha * (x - self.ewma)
+
+    def summary(self):
+        r = lambda v: None if v is None else round(v, 6)
+        return {"n": self.n, "last": r(self.last), "mean": r(self.mean if self.n else None),
+                "std": r(self.std if self.n > 1 else None), "ewma": r(self.ewma),
+                "min": r(self.min), "max": r(self.max), "roc": r(self.roc)}
+
+
+class AssetAnalytics:
+    """``SignalStats`` for every signal of one asset plus the spike/drift detectors.
+
+    ``detect`` names the signals that raise anomalies (None = all).
+    """
+
+    def __init__(self, signals, detect=None, window=WINDOW, alpha=EWMA_ALPHA, warmup=WARMUP,
+                 z=SPIKE_Z, k=CUSUM_K, h=CUSUM_H):
+        self.signals = tuple(signals)
+        self.stats = {s: SignalStats(window, alpha) for s in self.signals}
+        self.detect = frozenset(self.signals if detect is None else detect)
+        self.warmup = warmup
+        self.z, self.k, self.h = z, k, h
+        self.recent = deque(maxlen=RECENT)
+
+    def update(self, ts, values):
+        """Feed one sample (``{signal: value}`` or ``(signal, value)`` pairs); returns the anomalies it raised."""
+        found = []
+        for name, x in (values.items() if isinstance(values, dict) else values):
+            st = self.stats.get(name)
+            if st is None or not isinstance(x, (int, float)) or x != x:
+                continue
+            x = float(x)
+            st.observe(ts, x)
+            if name in self.detect and st.n >= self.warmup:
+                z = st.zscore(x)
+                if abs(z) >= self.z:
+                    found.append(self._anomaly("spike", name, ts, x, z, st))
+                    continue
+                st.cusum_hi = max(0.0, st.cusum_hi + z - self.k)
+                st.cusum_lo = max(0.0, st.cusum_lo - z - self.k)
+                if st.cusum_hi > self.h or st.cusum_lo > self.h:
+                    kind = "drift_up" if st.cusum_hi > self.h else "drift_down"
+                    found.append(self._anomaly(kind, name, ts, x, z, st))
+                    st.cusum_hi = st.cusum_lo = 0.0
+            st.absorb(x)
+        return found
+
+    def _anomaly(self, kind, name, ts, x, z, st):
+        a = {"kind": kind, "signal": name, "ts": None if ts is None else iso(ts),
+             "value": round(x, 6), "z": round(z, 2), "mean": round(st.mean, 6), "std": round(st.std, 6)}
+        self.recent.append(a)
+        ANOMALIES.labels(kind).inc()
+        return a
+
+    def summary(self):
+        return {"signals": {s: st.summary() for s, st in self.stats.items()},
+                "anomalies": list(self.recent)}
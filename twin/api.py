@@ -0,0 +1,131 @@
+"""Request-argument parsing and JSON shaping shared by the HTTP routes of both apps."""
+import numpy as np
+from flask import Response
+
+from twin.history import to_epoch, iso
+from twin.downsample import METHODS
+
+MAX_POINTS_LIMIT = 20000
+
+
+def range_args(args, hist):
+    """``(t0, t1)`` from ``from`` / ``to`` query args.
+
+    Accepts epoch seconds or ISO-8601; a negative ``from`` means "that
+    many seconds before the newest sample".
+    """
+    t0 = to_epoch(args.get("from"))
+    t1 = to_epoch(args.get("to"))
+    if t0 is not None and t0 < 0:
+        t0 = (hist.last_ts or 0.0) + t0
+    return t0, t1
+
+
+def pick_source(hist, durable, args, rollups=None, max_points=None):
+    """History source for a request.
+
+    Raw rows come from the ring buffer, or from the on-disk log
+    (``durable``, may be None) when the range starts before the ring's
+    oldest row.  With ``rollups`` (``twin.rollup``), ``tier=1s|1m|1h``
+    (and ``agg=mean|min|max|last|count``) selects a rollup tier
+    explicitly, ``tier=raw`` forces raw rows, and otherwise the coarsest
+    tier whose bucket width still meets the requested resolution --
+    ``resolution`` seconds, or the range divided by ``max_points`` -- and
+    that reaches back to the range start is used.
+    """
+    tier = args.get("tier") or None
+    if rollups is not None and tier not in (None, "raw"):
+        return rollups.view(tier, args.get("agg", "mean"))
+    raw = hist
+    t0, t1 = range_args(args, hist)
+    if durable is not None:
+        first = hist.first_ts
+        if first is None or (t0 if t0 is not None else durable.first_ts or first) < first:
+            durable.flush()
+            raw = durable
+    if rollups is None or tier == "raw" or raw.first_ts is None:
+        return raw
+    if args.get("resolution"):
+        need = float(args["resolution"])
+    elif max_points:
+        start = raw.first_ts if t0 is None else t0
+        need = ((t1 if t1 is not None else raw.last_ts) - start) / max_points
+    else:
+        return raw
+    start = raw.first_ts if t0 is None else t0
+    views = rollups.views(args.get("agg", "mean"))
+    covering = [v for v in views if v.first_ts is not None and v.first_ts <= start]
+    for v in covering:
+        if v.width <= need:
+            return v
+    if raw.first_ts <= start or not covering:
+        return raw
+    # nothing fine enough reaches back that far: the finest tier that does
+    return covering[-1]
+
+
+def signal_args(args, hist):
+    raw = args.get("signals")
+    if not raw:
+        return hist.columns
+    names = tuple(s.strip() for s in raw.split(",") if s.strip())
+    unknown = [s for s in names if s not in hist.index]
+    if unknown:
+        raise ValueError(f"unknown signals: {', '.join(unknown)}")
+    return names
+
+
+def _json_floats(values, decimals):
+    v = np.round(np.asarray(values, dtype=np.float64), decimals)
+    out = v.tolist()
+    if np.isnan(v).any():
+        out = [None if x != x else x for x in out]
+    return out
+
+
+def max_points_arg(args):
+    """``max_points`` (default 1000), capped at ``MAX_POINTS_LIMIT``; ValueError below 2."""
+    n = int(args.get("max_points", 1000))
+    if n < 2:
+        raise ValueError("max_points must be at least 2")
+    return min(n, MAX_POINTS_LIMIT)
+
+
+def history_json(hist, args):
+    """Downsampled history for ``/api/wgc/history``.
+
+    ``max_points`` (default 1000) bounds the rows returned; ``method`` is
+    ``minmax`` (default, keeps spikes) or ``lttb``.  ``hist`` may be a
+    rollup tier view, whose label is reported as ``tier``.
+    """
+    t0, t1 = range_args(args, hist)
+    signals = signal_args(args, hist)
+    max_points = max_points_arg(args)
+    method = args.get("method", "minmax")
+    if method not in METHODS:
+        raise ValueError(f"unknown method: {method}")
+
+    ts, cols = hist.range(t0, t1, signals)
+    n_raw = len(ts)
+    if n_raw > max_points:
+        idx = METHODS[method](ts, [cols[s] for s in signals], max_points)
+        ts = ts[idx]
+        cols = {s: cols[s][idx] for s in signals}
+    return {
+        "from": iso(float(ts[0])) if len(ts) else None,
+        "to": iso(float(ts[-1])) if len(ts) else None,
+        "method": method if n_raw > max_points else "raw",
+        "tier": getattr(hist, "label", "raw"),
+        "n_raw": n_raw,
+        "ts": np.round(ts, 3).tolist(),
+        "signals": {s: _json_floats(cols[s], 4) for s in signals},
+    }
+
+
+def cached_json(body, etag, request, max_age=3600):
+    """Response for a pre-encoded, immutable JSON body: ETag + Cache-Control, 304 on a match."""
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = max_age
+    return resp.make_conditional(request)
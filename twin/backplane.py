@@ -0,0 +1,417 @@
+"""Pub/sub backplane that lets several app workers serve one twin.
+
+With ``WGC_BACKPLANE`` set, a worker does not apply the ingest requests
+and commands it receives itself: it publishes them as events, the
+backplane delivers every event to every worker -- the publisher included
+-- in one total order, and each worker applies them to its own asset
+registry.  All workers therefore hold the same state, history, analytics
+and ``running`` flags, and each pushes broadcasts to its own Socket.IO
+clients only, so a dashboard sees the same updates whichever worker it
+is connected to.
+
+Backends, selected by the URL scheme:
+
+``unix:///path/bus.sock``  a broker process (``python -m twin.backplane /path/bus.sock``)
+                           relaying newline-delimited JSON over a Unix socket
+``memory://<name>``        an in-process channel, for tests and benchmarks that
+                           load several app instances in one interpreter
+
+Another message queue (Redis pub/sub, NATS, ...) plugs in by subclassing
+``Backplane`` (``_send`` / ``_poll`` / ``_wait``) and adding it to
+``BACKENDS``; it only has to deliver one channel's messages in the same
+order to all subscribers.
+
+``publish(msg, retain=key)`` also makes the broker keep the newest
+message per key and replay it to workers that connect later (the latest
+start/stop per asset, say), so a restarted worker gets the run flags
+back; sensor values fill in with the next sample.  Delivery runs in a
+background task that blocks in ``_wait`` while nothing is pending (on the
+socket's readability, or a wake-up queue for ``memory://``) using the
+async mode's own primitives, so it needs no monkey-patching under
+eventlet.
+
+Every worker applies every ingest event, so adding workers does not add
+ingest capacity: each one still does all of the apply work.  What scales
+with the number of workers is the Socket.IO fan-out (each worker pushes
+to its own dashboards) and the HTTP request handling in front of the
+backplane.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import select
+import socket
+import logging
+import selectors
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+from twin import metrics
+
+log = logging.getLogger("twin.backplane")
+
+URL = os.getenv("WGC_BACKPLANE", "")
+POLL_S = float(os.getenv("WGC_BACKPLANE_POLL_S", "0.005"))       # retry interval while a send is backlogged
+IDLE_S = 1.0                            # longest blocking wait (bounds reconnect and flush delays)
+RECONNECT_S = 1.0
+MAX_PENDING = 16 * 1024 * 1024          # bytes a worker may buffer while the broker is slow
+MAX_PEER_BUFFER = 64 * 1024 * 1024      # bytes the broker buffers for one worker before dropping it
+BATCH_MAX = 1000                        # messages handled per poll
+
+PUBLISHED = metrics.counter("wgc_backplane_published_total", "Events published to the backplane")
+DELIVERED = metrics.counter("wgc_backplane_delivered_total", "Backplane events applied by this worker")
+
+
+class BackplaneUnavailable(Exception):
+    """Raised by ``publish`` when the event cannot be handed to the backplane."""
+
+
+def _line(retain, payload):
+    # "<retain key or -> <json>\n": the broker reads the key without parsing the JSON
+    return f"{retain or '-'} {payload}\n".encode("utf-8")
+
+
+class Backplane:
+    """Ordered fan-out of JSON events to every worker, the publisher included."""
+
+    scheme = None
+
+    def __init__(self, url, poll_s=POLL_S):
+        self.url = url
+        self.poll_s = poll_s
+        self.handler = None
+        self.published = 0
+        self.delivered = 0
+        self._task = None
+
+    @classmethod
+    def from_env(cls, url=URL):
+        """The backplane configured by ``WGC_BACKPLANE``, or None for a single process."""
+        if not url:
+            return None
+        scheme = urlsplit(url).scheme
+        if scheme not in BACKENDS:
+            raise ValueError(f"WGC_BACKPLANE: unsupported scheme {scheme!r} (use {', '.join(BACKENDS)})")
+        return BACKENDS[scheme](url)
+
+    def publish(self, msg, retain=None):
+        """Send ``msg`` to every worker; raises ``BackplaneUnavailable``."""
+        self._send(retain, json.dumps(msg, separators=(",", ":")))
+        self.published += 1
+        PUBLISHED.inc()
+
+    def start(self, socketio, handler):
+        """Call ``handler(msg)`` for every event, from a background task."""
+        self.handler = handler
+        if self._task is None:
+            self._task = socketio.start_background_task(self._run, socketio)
+
+    @property
+    def connected(self):
+        return True
+
+    def stats(self):
+        return {"url": self.url, "connected": self.connected,
+                "published": self.published, "delivered": self.delivered}
+
+    def _run(self, socketio):
+        while True:
+            try:
+                payloads = self._poll()
+            except Exception as e:
+                log.warning("backplane error: %s", e)
+                payloads = []
+            for payload in payloads:
+                try:
+                    self.handler(json.loads(payload))
+                except Exception as e:
+                    log.warning("backplane event failed: %s", e)
+            if payloads:
+                self.delivered += len(payloads)
+                DELIVERED.inc(len(payloads))
+                socketio.sleep(0)
+            else:
+                self._wait(socketio)
+
+    def _send(self, retain, payload):
+        raise NotImplementedError
+
+    def _poll(self):
+        """Payloads (JSON strings) delivered since the last call."""
+        raise NotImplementedError
+
+    def _wait(self, socketio):
+        """Block (cooperatively) until ``_poll`` may have something; spurious returns are fine."""
+        raise NotImplementedError
+
+
+class _Channel:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.members = []
+        self.retained = {}
+
+
+class MemoryBackplane(Backplane):
+    """Channel shared by every ``memory://<name>`` backplane in this process."""
+
+    scheme = "memory"
+    _channels = {}
+
+    def __init__(self, url, poll_s=POLL_S):
+        super().__init__(url, poll_s)
+        ch = self._channels.setdefault(urlsplit(url).netloc, _Channel())
+        self._wake = None
+        with ch.lock:
+            self._inbox = deque(ch.retained.values())
+            ch.members.append(self)
+        self._channel = ch
+
+    def start(self, socketio, handler):
+        if self._wake is None:
+            self._wake = socketio.server.eio.create_queue(maxsize=1)
+            self._notify()      # retained messages are already in the inbox
+        super().start(socketio, handler)
+
+    def _notify(self):
+        if self._wake is not None:
+            try:
+                self._wake.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def _send(self, retain, payload):
+        ch = self._channel
+        with ch.lock:
+            if retain:
+                ch.retained.pop(retain, None)
+                ch.retained[retain] = payload
+            members = list(ch.members)
+            for member in members:
+                member._inbox.append(payload)
+        for member in members:
+            member._notify()
+
+    def _poll(self):
+        box, out = self._inbox, []
+        while box and len(out) < BATCH_MAX:
+            out.append(box.popleft())
+        return out
+
+    def _wait(self, socketio):
+        self._wake.get()
+
+
+class UnixBackplane(Backplane):
+    """Client of the Unix-socket broker (``serve``), reconnecting while it is down."""
+
+    scheme = "unix"
+
+    def __init__(self, url, poll_s=POLL_S):
+        super().__init__(url, poll_s)
+        self.path = urlsplit(url).path
+        self._sock = None
+        self._rbuf = bytearray()
+        self._wbuf = bytearray()
+        self._lock = threading.Lock()
+        self._next_connect = 0.0
+        self._connect()
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def _connect(self):
+        self._next_connect = time.monotonic() + RECONNECT_S
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(self.path)
+        except OSError as e:
+            s.close()
+            log.warning("backplane %s unavailable: %s", self.path, e)
+            return
+        s.setblocking(False)
+        self._sock, self._rbuf, self._wbuf = s, bytearray(), bytearray()
+
+    def _drop(self, why):
+        log.warning("backplane connection lost: %s", why)
+        try:
+            self._sock.close()
+        finally:
+            self._sock = None
+
+    def _flush(self):
+        while self._wbuf and self._sock is not None:
+            try:
+                sent = self._sock.send(self._wbuf)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self._drop(e)
+                return
+            del self._wbuf[:sent]
+
+    def _send(self, retain, payload):
+        with self._lock:
+            if self._sock is None:
+                raise BackplaneUnavailable(f"backplane {self.path} is not connected")
+            if len(self._wbuf) > MAX_PENDING:
+                raise BackplaneUnavailable("backplane send buffer full")
+            self._wbuf += _line(retain, payload)
+            self._flush()
+            if self._sock is None:
+                raise BackplaneUnavailable(f"backplane {self.path} connection lost")
+
+    def _poll(self):
+        with self._lock:
+            if self._sock is None:
+                if time.monotonic() >= self._next_connect:
+                    self._connect()
+                return []
+            self._flush()
+            while self._sock is not None:
+                try:
+                    data = self._sock.recv(1 << 16)
+                except BlockingIOError:
+                    break
+                except OSError as e:
+                    self._drop(e)
+                    break
+                if not data:
+                    self._drop("closed by broker")
+                    break
+                self._rbuf += data
+            end = self._rbuf.rfind(b"\n") + 1
+            if not end:
+                return []
+            lines = bytes(self._rbuf[:end]).splitlines()
+            del self._rbuf[:end]
+        return [line.split(b" ", 1)[1] for line in lines]
+
+    def _wait(self, socketio):
+        sock = self._sock
+        if sock is None:
+            socketio.sleep(max(0.0, self._next_connect - time.monotonic()))
+            return
+        if self._wbuf:
+            socketio.sleep(self.poll_s)     # the broker is slow to read; retry the flush soon
+            return
+        try:
+            if socketio.async_mode == "eventlet":
+                from eventlet.hubs import trampoline
+                trampoline(sock, read=True, timeout=IDLE_S, timeout_exc=socket.timeout)
+            else:
+                select.select([sock], [], [], IDLE_S)
+        except (OSError, ValueError):
+            pass    # timed out, or the socket was closed meanwhile; _poll sorts it out
+
+
+BACKENDS = {cls.scheme: cls for cls in (UnixBackplane, MemoryBackplane)}
+
+
+# ---------------- broker ----------------
+class _Peer:
+    __slots__ = ("sock", "rbuf", "wbuf")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.rbuf = bytearray()
+        self.wbuf = bytearray()
+
+
+def serve(path):
+    """Relay every complete line from any worker to all workers, in arrival order."""
+    if os.path.exists(path):
+        os.unlink(path)
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(path)
+    srv.listen(128)
+    srv.setblocking(False)
+    sel = selectors.DefaultSelector()
+    sel.register(srv, selectors.EVENT_READ)
+    peers, retained = {}, {}
+    log.warning("backplane broker listening on %s", path)
+
+    def close(peer, why):
+        log.warning("worker disconnected: %s", why)
+        sel.unregister(peer.sock)
+        peer.sock.close()
+        peers.pop(peer.sock, None)
+
+    def want_write(peer):
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if peer.wbuf else 0)
+        sel.modify(peer.sock, events, peer)
+
+    def flush(peer):
+        try:
+            while peer.wbuf:
+                del peer.wbuf[:peer.sock.send(peer.wbuf)]
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            close(peer, e)
+            return
+        want_write(peer)
+
+    while True:
+        for key, events in sel.select():
+            if key.fileobj is srv:
+                conn, _ = srv.accept()
+                conn.setblocking(False)
+                peer = peers[conn] = _Peer(conn)
+                peer.wbuf += b"".join(retained.values())
+                sel.register(conn, selectors.EVENT_READ, peer)
+                flush(peer)
+                continue
+            peer = key.data
+            if events & selectors.EVENT_READ:
+                try:
+                    data = peer.sock.recv(1 << 16)
+                except OSError as e:
+                    close(peer, e)
+                    continue
+                if not data:
+                    close(peer, "eof")
+                    continue
+                peer.rbuf += data
+                end = peer.rbuf.rfind(b"\n") + 1
+                if end:
+                    chunk = bytes(peer.rbuf[:end])
+                    del peer.rbuf[:end]
+                    for line in chunk.splitlines(keepends=True):
+                        if not line.startswith(b"- "):
+                            k = line.split(b" ", 1)[0]
+                            retained.pop(k, None)
+                            retained[k] = line
+                    for other in list(peers.values()):
+                        if len(other.wbuf) > MAX_PEER_BUFFER:
+                            close(other, "too slow, send buffer full")
+                            continue
+                        other.wbuf += chunk
+                        flush(other)
+            if events & selectors.EVENT_WRITE and peer.sock in peers:
+                flush(peer)
+
+
+def main():
+    import argparse     # broker CLI only; not on the workers' import path
+    p = argparse.ArgumentParser(description="Unix-socket backplane broker for app workers")
+    p.add_argument("path", help="Socket path; workers use WGC_BACKPLANE=unix://<path>")
+    args = p.parse_args()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        serve(args.path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.path):
+            os.unlink(args.path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
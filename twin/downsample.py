@@ -0,0 +1,94 @@
+"""Downsampling for chart-sized history responses.
+
+``lttb`` (Largest-Triangle-Three-Buckets) keeps the visual shape of one
+series in ``n`` points.  ``minmax`` keeps the min and max of each bucket
+for every series, so spikes survive and all signals share one x axis.
+Both return indices into the input, so the caller can pick the same rows
+from any column without copying the others.
+"""
+import numpy as np
+
+
+def _bucket_edges(length, buckets):
+    return np.linspace(0, length, buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, n):
+    """Indices of the ``n`` points LTTB keeps from ``(x, y)``."""
+    length = len(x)
+    if n >= length or n < 3:
+        return np.arange(length)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # first and last points are fixed; the middle is split into n-2 buckets
+    edges = _bucket_edges(length - 2, n - 2) + 1
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, length - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else length)
+        # average of the next bucket (the last bucket looks at the final point)
+        if nlo >= nhi:
+            nlo, nhi = length - 1, length
+        cx = x[nlo:nhi].mean()
+        cy = np.nanmean(y[nlo:nhi]) if np.isfinite(y[nlo:nhi]).any() else 0.0
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        area = np.nan_to_num(area, nan=-1.0)
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _minmax_rows(columns, length, buckets):
+    size = -(-length // buckets)
+    buckets = -(-length // size)
+    pad = buckets * size - length
+    base = np.arange(buckets) * size
+    keep = [np.array([0, length - 1])]
+    for col in columns:
+        col = np.asarray(col, dtype=np.float64)
+        nan = np.isnan(col)
+        lo = np.concatenate([np.where(nan, np.inf, col), np.full(pad, np.inf)])
+        hi = np.concatenate([np.where(nan, -np.inf, col), np.full(pad, -np.inf)])
+        keep.append(base + lo.reshape(buckets, size).argmin(axis=1))
+        keep.append(base + hi.reshape(buckets, size).argmax(axis=1))
+    idx = np.unique(np.concatenate(keep))
+    return idx[idx < length]
+
+
+def minmax(columns, n):
+    """Indices keeping each bucket's min and max of every column, at most ``n`` of them.
+
+    ``columns`` is a list of equal-length arrays; rows are cut into equal
+    buckets and the union of every column's per-bucket argmin/argmax plus
+    the first and last row is returned, sorted.  It starts from ``n // 2``
+    buckets, which is exact for one column (or columns that peak on the
+    same rows), and shrinks the bucket count while the union of the
+    columns' picks exceeds ``n``.
+    """
+    length = len(columns[0]) if columns else 0
+    n = max(n, 2)
+    if n >= length:
+        return np.arange(length)
+    buckets = max(1, n // 2)
+    while True:
+        idx = _minmax_rows(columns, length, buckets)
+        if len(idx) <= n:
+            return idx
+        if buckets == 1:
+            # fewer rows than one min and max per column: evenly spaced rows
+            return np.unique(np.linspace(0, length - 1, n).astype(np.int64))
+        buckets = max(1, min(buckets - 1, buckets * n // len(idx)))
+
+
+def lttb_multi(x, columns, n):
+    """Union of per-column LTTB picks, ``n // len(columns)`` points each."""
+    length = len(x)
+    if n >= length or not columns:
+        return np.arange(length)
+    per = max(3, n // len(columns))
+    return np.unique(np.concatenate([lttb(x, col, per) for col in columns]))
+
+
+METHODS = {"minmax": lambda x, cols, n: minmax(cols, n), "lttb": lttb_multi}
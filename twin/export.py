@@ -0,0 +1,103 @@
+"""Streaming history exports: chunked CSV and a packed binary columnar format.
+
+Both exporters are generators over ``RingHistory.segments()`` views, so
+the first bytes go out immediately and memory stays flat regardless of
+the range size.  Rows written while an export is streaming are not
+included; rows overwritten by the ring wrapping around mid-export are
+read as their new values.
+
+Binary layout (``application/vnd.wgc.history``, all little-endian)::
+
+    magic    4s     b"WGCB"
+    version  u16    1
+    ncols    u16    number of signal columns
+    nrows    u32    number of rows
+    nameslen u32    byte length of the names block
+    names    utf-8  column names joined by "\\n"
+    ts       f8[nrows]            epoch seconds
+    col_0    f4[nrows]            first signal (NaN = missing)
+    ...
+    col_n-1  f4[nrows]
+
+``read_binary`` decodes it back into ``(ts, {name: array})``.
+"""
+import io
+import csv
+import struct
+
+import numpy as np
+
+from twin.history import iso
+
+MAGIC = b"WGCB"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHII")
+BINARY_MIMETYPE = "application/vnd.wgc.history"
+
+CHUNK_ROWS = 2000           # CSV rows per yielded chunk
+BINARY_CHUNK_ROWS = 65536   # rows per yielded binary block
+
+
+def _select(hist, segments, signals):
+    # per-column views, so nothing is copied up front
+    idx = [hist.index[s] for s in signals]
+    return [(ts, [data[i] for i in idx]) for ts, data in segments]
+
+
+def iter_csv(hist, t0=None, t1=None, signals=None, decimals=4):
+    """Yield CSV text chunks: a ``timestamp`` column plus ``signals``.
+
+    ``decimals`` is one int for all columns or a sequence per signal.
+    """
+    signals = hist.columns if signals is None else tuple(signals)
+    if isinstance(decimals, int):
+        decimals = (decimals,) * len(signals)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(("timestamp",) + tuple(signals))
+    yield buf.getvalue()
+
+    for ts, data in _select(hist, hist.segments(t0, t1), signals):
+        for a in range(0, len(ts), CHUNK_ROWS):
+            buf.seek(0)
+            buf.truncate()
+            cols = [np.round(col[a:a + CHUNK_ROWS].astype(np.float64), d).tolist()
+                    for col, d in zip(data, decimals)]
+            for j, t in enumerate(ts[a:a + CHUNK_ROWS].tolist()):
+                writer.writerow([iso(t, "milliseconds")] + ["" if c[j] != c[j] else c[j] for c in cols])
+            yield buf.getvalue()
+
+
+def iter_binary(hist, t0=None, t1=None, signals=None):
+    """Yield the packed columnar export (see module docstring)."""
+    signals = hist.columns if signals is None else tuple(signals)
+    segs = _select(hist, hist.segments(t0, t1), signals)
+    nrows = sum(len(ts) for ts, _ in segs)
+    names = "\n".join(signals).encode("utf-8")
+    yield _HEADER.pack(MAGIC, VERSION, len(signals), nrows, len(names)) + names
+
+    for ts, _ in segs:
+        for a in range(0, len(ts), BINARY_CHUNK_ROWS):
+            yield ts[a:a + BINARY_CHUNK_ROWS].astype("<f8", copy=False).tobytes()
+    for i in range(len(signals)):
+        for _, data in segs:
+            col = data[i]
+            for a in range(0, len(col), BINARY_CHUNK_ROWS):
+                yield col[a:a + BINARY_CHUNK_ROWS].astype("<f4", copy=False).tobytes()
+
+
+def read_binary(buf):
+    """Decode a binary export into ``(ts, {name: float32 array})``."""
+    magic, version, ncols, nrows, nameslen = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a WGCB v1 history export")
+    off = _HEADER.size
+    names = bytes(buf[off:off + nameslen]).decode("utf-8").split("\n") if ncols else []
+    off += nameslen
+    ts = np.frombuffer(buf, dtype="<f8", count=nrows, offset=off)
+    off += 8 * nrows
+    cols = {}
+    for name in names:
+        cols[name] = np.frombuffer(buf, dtype="<f4", count=nrows, offset=off)
+        off += 4 * nrows
+    return ts, cols
@@ -0,0 +1,284 @@
+"""Rate-limited, delta-encoded fan-out of asset snapshots to Socket.IO rooms.
+
+Ingest only marks a room dirty and wakes a background task, which
+flushes at most ``max_hz`` times per second: it diffs each dirty room's
+snapshot against what that room was last sent and emits the changed
+fields once per room (python-socketio encodes a room emit a single time
+for all recipients).  Between flushes the task blocks until the next
+publish, or until a slower subscription's held-back update is due.
+Clients get a full snapshot on connect (``baseline``) and apply deltas
+on top of it.
+
+A client may also subscribe to a subset of signals at a lower rate
+(``Selector``).  Clients with the same (asset, signals, rate) share one
+group room, so each distinct filtered payload is built, diffed and
+encoded once per tick for the whole group, whatever its size.
+"""
+import os
+import time
+import queue
+import hashlib
+import logging
+
+from twin import metrics
+from twin.wire import packed_room
+
+log = logging.getLogger("twin.fanout")
+
+MAX_CLIENT_HZ = float(os.getenv("WGC_MAX_CLIENT_HZ", "4"))
+
+FLUSH_SECONDS = metrics.histogram("wgc_fanout_flush_seconds", "Time to diff and emit all dirty rooms (seconds)")
+EMITS = metrics.counter("wgc_emits_total", "Socket.IO room emits by event", ("event",))
+COALESCED = metrics.counter("wgc_fanout_coalesced_total",
+                            "Updates superseded before they were broadcast (rate limiting)")
+
+
+class Selector:
+    """The part of a payload a subscription asked for.
+
+    ``signals`` are field names (``flow``), ``section.field``
+    (``health.v_ax``) or whole sections (``kpi``); they are matched at any
+    depth, so the same subscription works for both apps' payload shapes.
+    ``always`` keys (routing and status) are kept whatever was asked.
+    """
+
+    def __init__(self, signals, always=("asset", "running", "ts")):
+        self.signals = tuple(sorted(set(signals)))
+        self._names = frozenset(self.signals)
+        self._always = frozenset(always)
+
+    def project(self, payload, parent=None):
+        out = {}
+        for k, v in payload.items():
+            path = f"{parent}.{k}" if parent else k
+            if k in self._names or path in self._names or (k in self._always and not isinstance(v, dict)):
+                out[k] = _copy(v) if isinstance(v, dict) else v
+            elif isinstance(v, dict):
+                sub = self.project(v, k)
+                if sub:
+                    out[k] = sub
+        return out
+
+
+def subscription_args(msg):
+    """``(assets, signals, hz)`` from a ``subscribe`` message or connect query args.
+
+    ``asset`` (one ID) or ``assets`` (list), ``signals`` (list or comma
+    string, None = everything) and ``max_hz``; raises ``ValueError``.
+    """
+    assets = msg.get("assets") or msg.get("asset")
+    if isinstance(assets, str):
+        assets = [a for a in assets.split(",") if a]
+    if assets is not None and (not isinstance(assets, list) or not all(isinstance(a, str) for a in assets)):
+        raise ValueError("assets must be a list of asset IDs")
+    signals = msg.get("signals")
+    if isinstance(signals, str):
+        signals = [x.strip() for x in signals.split(",") if x.strip()]
+    if signals is not None and (not isinstance(signals, list) or not all(isinstance(x, str) for x in signals)):
+        raise ValueError("signals must be a list of names")
+    hz = msg.get("max_hz")
+    if hz is not None:
+        try:
+            hz = float(hz)
+        except (TypeError, ValueError):
+            raise ValueError("max_hz must be a number") from None
+        if not hz > 0:
+            raise ValueError("max_hz must be > 0")
+    return assets, signals or None, hz
+
+
+def group_room(room, signals, hz):
+    """Room shared by every client of ``room`` with this exact subscription."""
+    key = ",".join(sorted(set(signals))) + f"@{hz:g}"
+    return f"{room}/{hashlib.sha1(key.encode()).hexdigest()[:12]}"
+
+
+def _copy(d):
+    return {k: (_copy(v) if isinstance(v, dict) else v) for k, v in d.items()}
+
+
+def diff(new, old):
+    """Return the parts of ``new`` that differ from ``old`` (recursing into dicts)."""
+    out = {}
+    for k, v in new.items():
+        o = old.get(k, diff) if old else diff   # `diff` doubles as a "missing" sentinel
+        if isinstance(v, dict) and isinstance(o, dict):
+            d = diff(v, o)
+            if d:
+                out[k] = d
+        elif v != o:
+            out[k] = _copy(v) if isinstance(v, dict) else v
+    return out
+
+
+class Broadcaster:
+    """Coalesce updates per room and push deltas at a bounded rate.
+
+    ``snapshot(src)`` turns whatever is passed to :meth:`publish` (an
+    AssetState) into the JSON-able payload; ``keys`` are always included
+    in deltas so clients can route them (e.g. ``asset``).  With
+    ``packed=(event, fn)`` clients in the room's packed twin (see
+    ``twin.wire``) get ``fn(src)`` -- a binary frame -- instead.
+    """
+
+    def __init__(self, socketio, snapshot, event, delta_event, max_hz=MAX_CLIENT_HZ, keys=("asset",),
+                 packed=None):
+        self.socketio = socketio
+        self.snapshot = snapshot
+        self.event = event
+        self.delta_event = delta_event
+        self.max_hz = max_hz
+        self.keys = keys
+        self.packed = packed
+        self._src = {}      # room -> source object
+        self._sent = {}     # room -> copy of the last payload sent to it
+        self._dirty = set()
+        self._groups = {}   # room -> {group room: (Selector, min interval)}
+        self._pending = {}  # group room -> parent room, changed but not yet sent
+        self._due = {}      # group room -> monotonic time of its next allowed emit
+        self._task = None
+        self._wake = None   # holds one token while there is a publish the task has not seen
+        metrics.gauge("wgc_fanout_pending_rooms", "Rooms waiting for the next flush", fn=lambda: len(self._dirty))
+
+    def publish(self, room, src):
+        if room in self._dirty:
+            COALESCED.inc()
+        self._src[room] = src
+        self._dirty.add(room)
+        if self.max_hz <= 0:
+            self.flush()
+            if self._pending:
+                self._signal()      # slower groups get their update when it is due
+        else:
+            self._signal()
+
+    def _signal(self):
+        if self._task is None:
+            # the async mode's queue: green under eventlet, no monkey-patching needed
+            self._wake = self.socketio.server.eio.create_queue(maxsize=1)
+            self._task = self.socketio.start_background_task(self._run)
+        try:
+            self._wake.put_nowait(None)
+        except queue.Full:
+            pass    # the task is already due to flush
+
+    def baseline(self, room, src=None):
+        """Full payload for a client joining ``room`` (an asset room or a group room).
+
+        This is what the room was last sent, so the next delta applies
+        cleanly; before the first flush it is built from ``src``.
+        """
+        sent = self._sent.get(room)
+        if sent is None and src is not None:
+            sent = self._sent[room] = _copy(self._payload(room, self.snapshot(src)))
+        return sent
+
+    def subscribe(self, room, signals=None, hz=None):
+        """Group room for a filtered subscription to ``room``; the caller joins it.
+
+        ``signals`` None means every field; ``hz`` is capped at ``max_hz``.
+        """
+        if self.max_hz > 0:
+            hz = min(hz or self.max_hz, self.max_hz)
+        hz = hz or 0.0
+        signals = tuple(signals) if signals else ("*",)
+        group = group_room(room, signals, hz)
+        if group not in self._groups.get(room, {}):
+            selector = None if signals == ("*",) else Selector(signals)
+            self._groups.setdefault(room, {})[group] = (selector, 1.0 / hz if hz else 0.0)
+        return group
+
+    def rooms(self, room):
+        """``room`` and its group rooms, for events every subscriber of an asset gets."""
+        return [room, *self._groups.get(room, ())]
+
+    def _payload(self, room, full):
+        parent = room.rpartition("/")[0]
+        entry = self._groups.get(parent, {}).get(room)
+        if entry is None or entry[0] is None:
+            return full
+        return entry[0].project(full)
+
+    def _has_members(self, room):
+        rooms = getattr(self.socketio.server.manager, "rooms", {}).get("/", {})
+        return bool(rooms.get(room))
+
+    @metrics.timed(FLUSH_SECONDS)
+    def flush(self):
+        dirty, self._dirty = self._dirty, set()
+        full = {}
+        for room in dirty:
+            if self.packed and self._has_members(packed_room(room)):
+                event, pack = self.packed
+                self.socketio.emit(event, pack(self._src[room]), to=packed_room(room))
+                EMITS.labels(event).inc()
+            payload = full[room] = self.snapshot(self._src[room])
+            self._emit(room, payload)
+            for group in self._groups.get(room, ()):
+                self._pending[group] = room
+        if self._pending:
+            self._flush_groups(full)
+
+    def _flush_groups(self, full):
+        now = time.monotonic()
+        for group, room in list(self._pending.items()):
+            if not self._has_members(group):
+                # everyone left (or disconnected): drop the group
+                del self._pending[group]
+                self._groups.get(room, {}).pop(group, None)
+                self._sent.pop(group, None)
+                self._due.pop(group, None)
+                continue
+            if now < self._due.get(group, 0.0):
+                continue        # slower subscription: stays pending, coalesced
+            del self._pending[group]
+            selector, interval = self._groups[room][group]
+            if room not in full:
+                full[room] = self.snapshot(self._src[room])
+            self._due[group] = now + interval
+            self._emit(group, full[room] if selector is None else selector.project(full[room]))
+
+    def _emit(self, room, payload):
+        prev = self._sent.get(room)
+        self._sent[room] = _copy(payload)
+        if prev is None:
+            self.socketio.emit(self.event, payload, to=room)
+            EMITS.labels(self.event).inc()
+            return
+        delta = diff(payload, prev)
+        if delta:
+            for k in self.keys:
+                if k in payload:
+                    delta[k] = payload[k]
+            self.socketio.emit(self.delta_event, delta, to=room)
+            EMITS.labels(self.delta_event).inc()
+
+    def forget(self, room):
+        self._src.pop(room, None)
+        self._sent.pop(room, None)
+        self._dirty.discard(room)
+        for group in self._groups.pop(room, {}):
+            self._sent.pop(group, None)
+            self._pending.pop(group, None)
+            self._due.pop(group, None)
+
+    def _next_due(self):
+        """Seconds until the first held-back group may be sent; None if there is none."""
+        if not self._pending:
+            return None
+        return max(0.0, min(self._due.get(g, 0.0) for g in self._pending) - time.monotonic())
+
+    def _run(self):
+        interval = 1.0 / self.max_hz if self.max_hz > 0 else 0.0
+        while True:
+            try:
+                self._wake.get(timeout=self._next_due())
+            except queue.Empty:
+                pass
+            if self._dirty or self._pending:
+                try:
+                    self.flush()
+                except Exception as e:
+                    log.warning("fan-out error: %s", e)
+            # publishes that arrive meanwhile coalesce into the next flush
+            self.socketio.sleep(interval)
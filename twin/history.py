@@ -0,0 +1,150 @@
+"""Columnar ring-buffer history shared by both twin servers.
+
+One preallocated float64 epoch-seconds column plus one float32 column per
+signal.  Appends are O(1) writes into the next slot; range reads return
+NumPy views into the buffer (at most two when the range wraps), so
+queries and exports never copy rows into Python objects.
+
+Buffers are allocated with ``np.zeros`` so pages are only committed as
+they are written: a large ``capacity`` costs memory in proportion to the
+history actually retained.
+"""
+import os
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+
+HISTORY_MAX = int(os.getenv("WGC_HISTORY_MAX", "100000"))
+
+
+def to_epoch(value, default=None):
+    """Epoch seconds from a number, a numeric string or an ISO-8601 string."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return default
+
+
+def iso(epoch, timespec="auto"):
+    """UTC ISO-8601 string with a trailing Z, as used in payloads and exports."""
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat(timespec=timespec) + "Z"
+
+
+class RingHistory:
+    """Fixed-capacity time series with one column per signal.
+
+    Timestamps are kept non-decreasing (a sample older than the newest
+    row is stamped with the newest time) so ranges can be found with a
+    binary search.
+    """
+
+    def __init__(self, columns, capacity=HISTORY_MAX, dtype=np.float32):
+        self.columns = tuple(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.capacity = int(capacity)
+        self.ts = np.zeros(self.capacity, dtype=np.float64)
+        # column-major so each signal is one contiguous run of memory
+        self.data = np.zeros((len(self.columns), self.capacity), dtype=dtype)
+        self._head = 0      # next slot to write
+        self._n = 0         # rows currently held
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def fill(self):
+        """Fraction of capacity in use (0..1)."""
+        return self._n / self.capacity
+
+    @property
+    def last_ts(self):
+        return float(self.ts[self._head - 1]) if self._n else None
+
+    @property
+    def first_ts(self):
+        if not self._n:
+            return None
+        return float(self.ts[0 if self._n < self.capacity else self._head])
+
+    def clear(self):
+        self._head = 0
+        self._n = 0
+
+    def append(self, ts, values):
+        """Append one row; ``values`` are in column order (None -> NaN).
+
+        Returns the timestamp actually stored.
+        """
+        i = self._head
+        if self._n and ts < self.ts[i - 1]:
+            ts = float(self.ts[i - 1])
+        self.ts[i] = ts
+        self.data[:, i] = [math.nan if v is None else v for v in values]
+        self._head = (i + 1) % self.capacity
+        if self._n < self.capacity:
+            self._n += 1
+        return ts
+
+    def extend(self, ts, data):
+        """Bulk-append rows (``data`` shaped ``(len(columns), rows)``), e.g. from a log replay."""
+        cap, n = self.capacity, len(ts)
+        if n > cap:
+            ts, data, n = ts[-cap:], data[:, -cap:], cap
+        a = 0
+        while a < n:
+            i = self._head
+            k = min(n - a, cap - i)
+            self.ts[i:i + k] = ts[a:a + k]
+            self.data[:, i:i + k] = data[:, a:a + k]
+            self._head = (i + k) % cap
+            self._n = min(self._n + k, cap)
+            a += k
+
+    def segments(self, t0=None, t1=None):
+        """Chronological ``(ts, data)`` view pairs covering ``t0 <= ts <= t1``.
+
+        ``data`` has shape ``(len(columns), rows)``.  No rows are copied.
+        """
+        n, head, cap = self._n, self._head, self.capacity
+        spans = [(0, n)] if n < cap else [(head, cap), (0, head)]
+        out = []
+        for a, b in spans:
+            if a == b:
+                continue
+            ts = self.ts[a:b]
+            lo = 0 if t0 is None else int(np.searchsorted(ts, t0, side="left"))
+            hi = len(ts) if t1 is None else int(np.searchsorted(ts, t1, side="right"))
+            if lo < hi:
+                out.append((ts[lo:hi], self.data[:, a + lo:a + hi]))
+        return out
+
+    def range(self, t0=None, t1=None, columns=None):
+        """Return ``(ts, {column: array})`` for a time range.
+
+        Views into the buffer when the range does not wrap, a single
+        concatenated copy when it does.
+        """
+        segs = self.segments(t0, t1)
+        names = self.columns if columns is None else tuple(columns)
+        idx = [self.index[c] for c in names]
+        if not segs:
+            return np.empty(0), {c: np.empty(0, dtype=self.data.dtype) for c in names}
+        if len(segs) == 1:
+            ts, data = segs[0]
+            return ts, {c: data[i] for c, i in zip(names, idx)}
+        ts = np.concatenate([s[0] for s in segs])
+        return ts, {c: np.concatenate([s[1][i] for s in segs]) for c, i in zip(names, idx)}
+
+    def rows(self, t0=None, t1=None):
+        """Iterate ``(ts, values)`` rows chronologically (for exports)."""
+        for ts, data in self.segments(t0, t1):
+            yield from zip(ts.tolist(), data.T.tolist())
@@ -0,0 +1,197 @@
+"""WGC KPIs and alarms: the per-sample function plus a vectorized batch engine.
+
+``compute_wgc_kpis`` evaluates one state dict with Python floats (live
+ingest, including replay and batched ingest, which apply one sample at a
+time).  ``compute_wgc_kpis_batch`` evaluates the same formulas over
+whole columns with NumPy (history windows, e.g. the reports in
+``twin/report.py``) and gives the same results; ``kpi_row`` turns one
+row of its result back into the per-sample dict shape.  Bands and alarms
+match exactly, NaN (a missing reading) included: it raises no band or
+alarm on either path.  ``head_index_norm`` can differ in the last bits
+because NumPy's vectorized ``power`` and libm's ``pow`` round differently.
+"""
+import numpy as np
+
+from twin import metrics
+
+KPI_SECONDS = metrics.histogram("wgc_kpi_seconds", "compute_wgc_kpis latency (seconds)")
+
+# Defaults used when a field is missing, shared by both paths
+DEFAULTS = {
+    "P1": 1.0, "P2": 1.0, "T1": 300.0, "T2": 350.0, "flow": 10.0, "speed": 6000.0, "valve": 50.0,
+    "mw": 18.0, "glr": 1000.0,
+    "vib_axial": 2.0, "vib_vert": 2.0, "vib_horz": 2.0,
+    "lube_oil_pressure": 3.0, "bearing_temp": 345.0, "oil_temp": 325.0, "seal_leakage": 0.1,
+}
+
+VIB_BANDS = ("OK", "Warning", "Trip")
+SEVERITIES = (None, "Warn", "Trip")
+
+# alarm type -> (batch result key, message per severity code)
+ALARMS = (
+    ("Surge", "alarm_surge", {1: "Low surge margin", 2: "Low surge margin"}),
+    ("Vibration", "alarm_vibration", {1: "Vibration caution", 2: "High vibration level"}),
+    ("LubeOil", "alarm_lube_oil", {1: "Low lube oil pressure", 2: "Low lube oil pressure"}),
+    ("Bearing", "alarm_bearing", {1: "High bearing temperature"}),
+    ("Seal", "alarm_seal", {1: "Excessive seal leakage"}),
+)
+
+
+@metrics.timed(KPI_SECONDS)
+def compute_wgc_kpis(state):
+    oper = state.get("oper", {})
+    gas = state.get("gas", {})
+    health = state.get("health", {})
+
+    P1 = float(oper.get("P1", 1.0))
+    P2 = float(oper.get("P2", 1.0))
+    T1 = float(oper.get("T1", 300.0))
+    T2 = float(oper.get("T2", 350.0))
+    flow = float(oper.get("flow", 10.0))
+    speed = float(oper.get("speed", 6000.0))
+    valve = float(oper.get("valve", 50.0))
+    mw = float(gas.get("mw", 18.0))
+    glr = float(gas.get("glr", 1000.0))
+
+    # Compression ratio
+    cr = P2 / max(P1, 1e-6)
+
+    # Polytropic-ish head index (illustrative only)
+    n = 1.3
+    Rspec = 8.314 / (mw / 1000.0)  # J/kg-K
+    head_index = (n/(n-1.0)) * Rspec * T1 * ((cr)**((n-1.0)/n) - 1.0)
+    head_index_norm = head_index / 50000.0
+
+    # Surge margin heuristic vs simple surge line
+    surge_flow = max(0.2*speed/1000.0 + 10.0, 1e-3)
+    sm = (flow - surge_flow) / surge_flow
+    sm_pct = sm * 100.0
+
+    # Efficiency index (demo)
+    dT = max(T2 - T1, 1e-3)
+    eff_idx = max(0.0, min(100.0, 80.0 - 0.15*dT + 5.0*(1.0/cr)))
+
+    # Vibration bands
+    def vib_band(v):
+        # NaN compares false: a missing reading is "OK", as in the batch path
+        if v >= 7.1: return "Trip"
+        if v >= 3.5: return "Warning"
+        return "OK"
+    vib_axial = float(health.get("vib_axial", 2.0))
+    vib_vert  = float(health.get("vib_vert", 2.0))
+    vib_horz  = float(health.get("vib_horz", 2.0))
+    vib_status = {
+        "axial": {"value": vib_axial, "band": vib_band(vib_axial)},
+        "vertical": {"value": vib_vert, "band": vib_band(vib_vert)},
+        "horizontal": {"value": vib_horz, "band": vib_band(vib_horz)},
+    }
+
+    oil_p = float(health.get("lube_oil_pressure", 3.0))
+    bearingT = float(health.get("bearing_temp", 345.0))
+    oilT = float(health.get("oil_temp", 325.0))
+    seal_leak = float(health.get("seal_leakage", 0.1))
+
+    alarms = []
+    if sm_pct < 10.0:
+        alarms.append({"type": "Surge", "message": "Low surge margin", "severity": "Warn" if sm_pct>0 else "Trip"})
+    if vib_axial>=7.1 or vib_vert>=7.1 or vib_horz>=7.1:
+        alarms.append({"type": "Vibration", "message": "High vibration level", "severity": "Trip"})
+    elif vib_axial>=3.5 or vib_vert>=3.5 or vib_horz>=3.5:
+        alarms.append({"type": "Vibration", "message": "Vibration caution", "severity": "Warn"})
+    if oil_p < 2.0:
+        alarms.append({"type": "LubeOil", "message": "Low lube oil pressure", "severity": "Trip" if oil_p<1.5 else "Warn"})
+    if bearingT > 370.0:
+        alarms.append({"type": "Bearing", "message": "High bearing temperature", "severity": "Warn"})
+    if seal_leak > 0.5:
+        alarms.append({"type": "Seal", "message": "Excessive seal leakage", "severity": "Warn"})
+
+    return {
+        "compression_ratio": cr,
+        "head_index_norm": head_index_norm,
+        "surge_margin_pct": sm_pct,
+        "efficiency_index": eff_idx,
+        "vibration": vib_status,
+        "alarms": alarms
+    }
+
+
+def _col(columns, name, n):
+    v = columns.get(name)
+    if v is None:
+        return np.full(n, DEFAULTS[name])
+    return np.broadcast_to(np.asarray(v, dtype=np.float64), (n,))
+
+
+def compute_wgc_kpis_batch(columns):
+    """Vectorized ``compute_wgc_kpis`` over columns of samples.
+
+    ``columns`` maps field names (``P1``, ``flow``, ``vib_axial``, ``mw``,
+    ...) to equal-length arrays or scalars -- e.g. the dict returned by
+    ``RingHistory.range()``.  A missing column takes the scalar path's
+    default; NaN entries (gaps in the history) are not filled and give NaN
+    KPIs and the lowest band/severity code for that row, like
+    ``compute_wgc_kpis``.  Returns float64 KPI arrays, int8 vibration band
+    codes (index into ``VIB_BANDS``) and int8 alarm severity codes (index
+    into ``SEVERITIES``, 0 = no alarm).
+    """
+    n = max((np.size(v) for v in columns.values() if v is not None), default=0)
+    c = {name: _col(columns, name, n) for name in DEFAULTS}
+
+    cr = c["P2"] / np.maximum(c["P1"], 1e-6)
+
+    k = 1.3
+    Rspec = 8.314 / (c["mw"] / 1000.0)
+    head_index = (k/(k-1.0)) * Rspec * c["T1"] * ((cr)**((k-1.0)/k) - 1.0)
+    head_index_norm = head_index / 50000.0
+
+    surge_flow = np.maximum(0.2*c["speed"]/1000.0 + 10.0, 1e-3)
+    sm_pct = ((c["flow"] - surge_flow) / surge_flow) * 100.0
+
+    dT = np.maximum(c["T2"] - c["T1"], 1e-3)
+    eff_idx = np.maximum(0.0, np.minimum(100.0, 80.0 - 0.15*dT + 5.0*(1.0/cr)))
+
+    def band(v):
+        return (v >= 3.5).astype(np.int8) + (v >= 7.1)
+
+    def severity(warn, trip):
+        return np.where(trip, 2, np.where(warn, 1, 0)).astype(np.int8)
+
+    # fmax skips NaN: one missing axis does not hide an alarm on the others
+    vmax = np.fmax(np.fmax(c["vib_axial"], c["vib_vert"]), c["vib_horz"])
+    oil_p = c["lube_oil_pressure"]
+    return {
+        "compression_ratio": cr,
+        "head_index_norm": head_index_norm,
+        "surge_margin_pct": sm_pct,
+        "efficiency_index": eff_idx,
+        "vib_axial": c["vib_axial"], "vib_vert": c["vib_vert"], "vib_horz": c["vib_horz"],
+        "vib_band_axial": band(c["vib_axial"]),
+        "vib_band_vert": band(c["vib_vert"]),
+        "vib_band_horz": band(c["vib_horz"]),
+        "alarm_surge": severity(sm_pct < 10.0, sm_pct <= 0.0),
+        "alarm_vibration": severity(vmax >= 3.5, vmax >= 7.1),
+        "alarm_lube_oil": severity(oil_p < 2.0, oil_p < 1.5),
+        "alarm_bearing": severity(c["bearing_temp"] > 370.0, False),
+        "alarm_seal": severity(c["seal_leakage"] > 0.5, False),
+    }
+
+
+def kpi_row(batch, i):
+    """Row ``i`` of a batch result in the ``compute_wgc_kpis`` dict shape."""
+    alarms = []
+    for kind, key, messages in ALARMS:
+        code = int(batch[key][i])
+        if code:
+            alarms.append({"type": kind, "message": messages[code], "severity": SEVERITIES[code]})
+    vib = {}
+    for axis, name in (("axial", "axial"), ("vertical", "vert"), ("horizontal", "horz")):
+        vib[axis] = {"value": float(batch["vib_" + name][i]),
+                     "band": VIB_BANDS[int(batch["vib_band_" + name][i])]}
+    return {
+        "compression_ratio": float(batch["compression_ratio"][i]),
+        "head_index_norm": float(batch["head_index_norm"][i]),
+        "surge_margin_pct": float(batch["surge_margin_pct"][i]),
+        "efficiency_index": float(batch["efficiency_index"][i]),
+        "vibration": vib,
+        "alarms": alarms,
+    }
@@ -0,0 +1,229 @@
+"""Low-overhead hot-path metrics, exposed as Prometheus text on ``/metrics``.
+
+Off unless ``WGC_METRICS=1``.  When off, ``counter`` / ``gauge`` /
+``histogram`` hand back a shared no-op object and ``timed`` returns the
+function it decorates unchanged, so instrumented code runs exactly as
+before.  When on, a counter increment is one attribute add and a
+histogram observation one ``bisect`` -- no locks, so concurrent updates
+from threads can (rarely) lose an increment, which is fine for
+monitoring.
+
+    INGEST_SECONDS = metrics.histogram("wgc_ingest_seconds", "Ingest handler latency")
+
+    @metrics.timed(INGEST_SECONDS)
+    def ingest(...): ...
+
+Gauges can be backed by a callback evaluated at scrape time
+(``fn=lambda: len(queue)``); a labelled callback returns
+``{label_values_tuple: value}``.
+"""
+import os
+import time
+import bisect
+import functools
+
+ENABLED = os.getenv("WGC_METRICS", "0") == "1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; tuned for handlers that normally take tens of microseconds to a few ms
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _fmt(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    esc = lambda s: str(s).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+class _Noop:
+    """Stand-in for every metric type while metrics are disabled."""
+
+    def labels(self, *values):
+        return self
+
+    def inc(self, n=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+NOOP = _Noop()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._child()
+        return child
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            out.extend(self._lines(values, child))
+        return out
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _child = _Value
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self.inc = self.labels().inc
+
+    def _lines(self, values, child):
+        return [f"{self.name}{_labels(self.labelnames, values)} {_fmt(child.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _child = _Value
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+        if not self.labelnames and fn is None:
+            self.set = self.labels().set
+            self.inc = self.labels().inc
+
+    def render(self):
+        if self.fn is not None:
+            value = self.fn()
+            items = value.items() if self.labelnames else [((), value)]
+            self._children = {}
+            for values, v in items:
+                self.labels(*values).set(v)
+        return super().render()
+
+    def _lines(self, values, child):
+        return [f"{self.name}{_labels(self.labelnames, values)} {_fmt(child.value)}"]
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self.observe = self.labels().observe
+
+    def _child(self):
+        return _Buckets(self.buckets)
+
+    def _lines(self, values, child):
+        out, total = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), child.counts):
+            total += n
+            out.append(f"{self.name}_bucket{_labels(self.labelnames, values, [('le', _fmt(bound))])} {total}")
+        out.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_fmt(child.sum)}")
+        out.append(f"{self.name}_count{_labels(self.labelnames, values)} {total}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        # both apps import the shared modules; re-registering returns the first instance
+        return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        lines = []
+        for m in self.metrics.values():
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labelnames=()):
+    return REGISTRY.register(Counter(name, help, labelnames)) if ENABLED else NOOP
+
+
+def gauge(name, help, labelnames=(), fn=None):
+    return REGISTRY.register(Gauge(name, help, labelnames, fn)) if ENABLED else NOOP
+
+
+def histogram(name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets)) if ENABLED else NOOP
+
+
+def timed(hist):
+    """Decorator observing the wall time of each call into ``hist`` (identity when disabled)."""
+    def wrap(fn):
+        if hist is NOOP:
+            return fn
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - t)
+        return inner
+    return wrap
+
+
+def render():
+    return REGISTRY.render()
+
+
+def register_app(socketio, assets):
+    """Scrape-time gauges shared by both servers: clients, assets, history fill."""
+    gauge("wgc_clients_connected", "Connected Socket.IO clients",
+          fn=lambda: len(getattr(socketio.server.eio, "sockets", ())))
+    gauge("wgc_assets", "Assets in the registry", fn=lambda: len(assets))
+    gauge("wgc_history_fill_ratio", "History ring buffer fill (0..1)", ("asset",),
+          fn=lambda: {(st.asset_id,): st.history.fill for st in assets if st.history is not None})
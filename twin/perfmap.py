@@ -0,0 +1,133 @@
+"""Precomputed compressor performance map with a surge line.
+
+Head (kJ/kg) and efficiency (%) are tabulated once on a uniform
+flow x speed grid; each sample is evaluated by bilinear interpolation
+with O(1) index arithmetic (no search), and the surge flow by linear
+interpolation along the speed axis.  The default map is synthetic
+(illustrative only): the speed lines are the dashboard's former
+``speed/50 - 0.35*(flow-30)^2`` curves and the surge line is the
+``0.2*speed/1000 + 10`` kg/s line the KPI surge margin uses, so both
+agree.  ``WGC_PERFMAP`` may point at an ``.npz`` with ``flow``,
+``speed``, ``head``, ``efficiency`` (``speed x flow``) and
+``surge_flow`` (per speed) arrays to load a real map instead.
+
+``describe()`` is the JSON served at ``/api/wgc/map``; it never changes
+while the process runs, so it is encoded once and served with an ETag.
+"""
+import os
+import json
+import hashlib
+
+import numpy as np
+
+MAP_PATH = os.getenv("WGC_PERFMAP", "")
+LINE_SPEEDS = (7000.0, 7800.0, 8500.0)      # speed lines drawn by the dashboard
+
+
+class PerformanceMap:
+    def __init__(self, flow, speed, head, efficiency, surge_flow):
+        self.flow = np.asarray(flow, dtype=np.float64)
+        self.speed = np.asarray(speed, dtype=np.float64)
+        self.head = np.asarray(head, dtype=np.float64)
+        self.efficiency = np.asarray(efficiency, dtype=np.float64)
+        self.surge_flow = np.asarray(surge_flow, dtype=np.float64)
+        if self.head.shape != (len(self.speed), len(self.flow)) or self.efficiency.shape != self.head.shape:
+            raise ValueError("head/efficiency must be shaped (len(speed), len(flow))")
+        if len(self.surge_flow) != len(self.speed):
+            raise ValueError("surge_flow needs one value per speed")
+        for axis in (self.flow, self.speed):
+            step = np.diff(axis)
+            if len(axis) < 2 or not np.allclose(step, step[0]) or step[0] <= 0:
+                raise ValueError("map axes must be uniform and increasing")
+        # plain-Python copies: per-sample lookups are scalar, where floats beat numpy
+        self._f0, self._df, self._nf = float(self.flow[0]), float(self.flow[1] - self.flow[0]), len(self.flow)
+        self._s0, self._ds, self._ns = float(self.speed[0]), float(self.speed[1] - self.speed[0]), len(self.speed)
+        self._head = self.head.tolist()
+        self._eff = self.efficiency.tolist()
+        self._surge = self.surge_flow.tolist()
+        self._body = None
+
+    @classmethod
+    def synthetic(cls, flow=(5.0, 45.0, 81), speed=(5000.0, 10000.0, 21)):
+        f = np.linspace(*flow)
+        s = np.linspace(*speed)
+        F, S = np.meshgrid(f, s)
+        head = np.maximum(S / 50.0 - 0.35 * (F - 30.0) ** 2, 0.0)
+        bep = 0.0035 * S                          # best-efficiency flow drifts with speed
+        eff = np.clip(84.0 - 0.12 * (F - bep) ** 2, 0.0, 100.0)
+        return cls(f, s, head, eff, 0.2 * s / 1000.0 + 10.0)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(z["flow"], z["speed"], z["head"], z["efficiency"], z["surge_flow"])
+
+    @classmethod
+    def from_env(cls):
+        return cls.load(MAP_PATH) if MAP_PATH else cls.synthetic()
+
+    # ---- lookups ----
+    @staticmethod
+    def _cell(x, x0, dx, n):
+        # index of the cell's lower corner and the fraction across it, clamped to the grid
+        t = (x - x0) / dx
+        if t <= 0.0:
+            return 0, 0.0
+        if t >= n - 1:
+            return n - 2, 1.0
+        i = int(t)
+        return i, t - i
+
+    def _bilinear(self, table, i, fi, j, fj):
+        r0, r1 = table[j], table[j + 1]
+        a = r0[i] + (r0[i + 1] - r0[i]) * fi
+        b = r1[i] + (r1[i + 1] - r1[i]) * fi
+        return a + (b - a) * fj
+
+    def surge_flow_at(self, speed):
+        j, fj = self._cell(speed, self._s0, self._ds, self._ns)
+        return self._surge[j] + (self._surge[j + 1] - self._surge[j]) * fj
+
+    def operating_point(self, flow, speed):
+        """Head, efficiency and distance to surge at ``(flow, speed)``; None if either is missing."""
+        if flow is None or speed is None:
+            return None
+        flow, speed = float(flow), float(speed)
+        i, fi = self._cell(flow, self._f0, self._df, self._nf)
+        j, fj = self._cell(speed, self._s0, self._ds, self._ns)
+        surge = self.surge_flow_at(speed)
+        return {
+            "head": self._bilinear(self._head, i, fi, j, fj),
+            "efficiency": self._bilinear(self._eff, i, fi, j, fj),
+            "surge_flow": surge,
+            "surge_distance": flow - surge,
+            "surge_margin_pct": (flow - surge) / max(surge, 1e-3) * 100.0,
+            "in_map": (self._f0 <= flow <= float(self.flow[-1])) and (self._s0 <= speed <= float(self.speed[-1])),
+        }
+
+    def speed_line(self, speed):
+        """``[[flow, head], ...]`` along one speed, on the flow grid."""
+        j, fj = self._cell(speed, self._s0, self._ds, self._ns)
+        r0, r1 = self._head[j], self._head[j + 1]
+        return [[f, r0[i] + (r1[i] - r0[i]) * fj] for i, f in enumerate(self.flow.tolist())]
+
+    # ---- serving ----
+    def describe(self):
+        r = lambda a: np.round(a, 3).tolist()
+        surge_head = [self.operating_point(f, s)["head"] for f, s in zip(self._surge, self.speed.tolist())]
+        return {
+            "units": {"flow": "kg/s", "speed": "rpm", "head": "kJ/kg", "efficiency": "%"},
+            "flow": r(self.flow), "speed": r(self.speed),
+            "head": r(self.head), "efficiency": r(self.efficiency),
+            "surge": {"speed": r(self.speed), "flow": r(self.surge_flow), "head": r(np.array(surge_head))},
+            "lines": [{"speed": s, "points": [[round(f, 3), round(h, 3)] for f, h in self.speed_line(s) if h > 0]}
+                      for s in LINE_SPEEDS],
+        }
+
+    @property
+    def body(self):
+        """``describe()`` encoded once, with its ETag."""
+        if self._body is None:
+            data = json.dumps(self.describe(), separators=(",", ":")).encode("utf-8")
+            self._body = (data, hashlib.sha1(data).hexdigest()[:16])
+        return self._body
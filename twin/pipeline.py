@@ -0,0 +1,143 @@
+"""Bounded ingest queue drained by a background worker.
+
+The HTTP handler validates a request, stamps arrival times and calls
+``put``; a single background task (a green thread under eventlet) drains
+the queue in batches and hands them to ``apply`` -- state update, history
+append and the broadcast publish -- so slow dashboards or a large fan-out
+never add latency to the producer's POST.  An idle worker blocks on a
+wake-up queue that ``put`` signals; it does not poll.
+
+When the queue is full the ``policy`` decides:
+
+``drop-oldest``  accept, discarding the oldest queued samples (freshest data wins)
+``reject``       refuse the whole request (the handler answers 429)
+``block``        wait up to ``block_s`` for room, then refuse
+
+``apply`` returns how many items of the batch it could not apply (a
+sample that fails is skipped; the rest of the batch still goes through);
+those are counted as dropped with reason ``failed``.  Drops and
+rejections are counted on the queue and in ``twin.metrics``.
+"""
+import os
+import time
+import queue
+import logging
+from collections import deque
+
+from twin import metrics
+
+log = logging.getLogger("twin.pipeline")
+
+QUEUE_MAX = int(os.getenv("WGC_INGEST_QUEUE", "10000"))          # samples; 0 = apply inline
+POLICY = os.getenv("WGC_INGEST_POLICY", "drop-oldest")
+BLOCK_S = float(os.getenv("WGC_INGEST_BLOCK_S", "2.0"))
+BATCH_MAX = int(os.getenv("WGC_INGEST_BATCH", "500"))             # samples per worker pass
+POLL_S = float(os.getenv("WGC_INGEST_POLL_S", "0.005"))           # wait step of a blocked producer
+
+POLICIES = ("drop-oldest", "reject", "block")
+
+DEPTH = metrics.gauge("wgc_ingest_queue_depth", "Samples waiting in the ingest queue")
+DROPPED = metrics.counter("wgc_ingest_dropped_total", "Samples lost to backpressure or apply errors", ("reason",))
+APPLY_SECONDS = metrics.histogram("wgc_ingest_apply_seconds", "Worker time per drained batch (seconds)")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class IngestQueue:
+    """FIFO of ingest items with a backpressure policy and one worker task."""
+
+    def __init__(self, socketio, apply, maxsize=QUEUE_MAX, policy=POLICY, block_s=BLOCK_S,
+                 batch_max=BATCH_MAX, poll_s=POLL_S):
+        if policy not in POLICIES:
+            raise ValueError(f"WGC_INGEST_POLICY must be one of {', '.join(POLICIES)}")
+        self.socketio = socketio
+        self.apply = apply
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_s = block_s
+        self.batch_max = batch_max
+        self.poll_s = poll_s
+        self._q = deque()
+        self._task = None
+        self._wake = None   # holds one token while there is work the worker has not seen
+        self.accepted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.rejected = 0
+        DEPTH.set(0)
+
+    def __len__(self):
+        return len(self._q)
+
+    def admit(self, n):
+        """Apply the full-queue policy to ``n`` incoming samples without queuing them.
+
+        Raises ``QueueFull`` under ``reject`` / ``block``; ``drop-oldest``
+        always admits.
+        """
+        if len(self._q) + n > self.maxsize:
+            if self.policy == "block":
+                deadline = time.monotonic() + self.block_s
+                while len(self._q) + n > self.maxsize and time.monotonic() < deadline:
+                    self.socketio.sleep(self.poll_s)
+            if self.policy != "drop-oldest" and len(self._q) + n > self.maxsize:
+                self.rejected += n
+                DROPPED.labels("rejected").inc(n)
+                raise QueueFull(f"ingest queue full ({self.maxsize} samples)")
+
+    def put(self, items):
+        """Queue ``items`` (a list) or raise ``QueueFull`` per the policy."""
+        n = len(items)
+        self.admit(n)
+        self._q.extend(items)
+        self.accepted += n
+        over = len(self._q) - self.maxsize
+        if over > 0:
+            for _ in range(over):
+                self._q.popleft()
+            self.dropped += over
+            DROPPED.labels("oldest").inc(over)
+        DEPTH.set(len(self._q))
+        if self._task is None:
+            # the async mode's queue: green under eventlet, no monkey-patching needed
+            self._wake = self.socketio.server.eio.create_queue(maxsize=1)
+            self._task = self.socketio.start_background_task(self._run)
+        try:
+            self._wake.put_nowait(None)
+        except queue.Full:
+            pass    # the worker is already due to look at the queue
+
+    def stats(self):
+        return {"policy": self.policy, "max": self.maxsize, "depth": len(self._q),
+                "accepted": self.accepted, "processed": self.processed,
+                "dropped": self.dropped, "rejected": self.rejected}
+
+    def drain(self):
+        """Apply up to ``batch_max`` queued items now; returns how many."""
+        q, batch = self._q, []
+        while q and len(batch) < self.batch_max:
+            batch.append(q.popleft())
+        if batch:
+            t = time.perf_counter()
+            try:
+                failed = self.apply(batch) or 0
+            except Exception as e:
+                # apply is expected to skip bad items itself; if it does not, the batch is lost
+                log.warning("ingest worker error: %s", e)
+                failed = len(batch)
+            APPLY_SECONDS.observe(time.perf_counter() - t)
+            self.processed += len(batch) - failed
+            if failed:
+                self.dropped += failed
+                DROPPED.labels("failed").inc(failed)
+            DEPTH.set(len(q))
+        return len(batch)
+
+    def _run(self):
+        while True:
+            self._wake.get()
+            while self.drain():
+                # yield between batches so handlers and the fan-out keep running
+                self.socketio.sleep(0)
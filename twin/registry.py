@@ -0,0 +1,105 @@
+"""Asset registry: one compact state object per compressor, keyed by asset ID."""
+import os
+import re
+import threading
+
+DEFAULT_ASSET = os.getenv("WGC_DEFAULT_ASSET", "wgc-1")
+MAX_ASSETS = int(os.getenv("WGC_MAX_ASSETS", "500"))
+
+_ASSET_ID = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+
+
+def valid_asset_id(asset_id):
+    return isinstance(asset_id, str) and bool(_ASSET_ID.match(asset_id))
+
+
+class RegistryFull(Exception):
+    """Raised when a new asset would exceed the registry's capacity."""
+
+
+def room_for(asset_id):
+    """Socket.IO room that receives updates for one asset."""
+    return f"asset:{asset_id}"
+
+
+class AssetState:
+    """Live state of a single compressor.
+
+    ``__slots__`` keeps the per-asset footprint to the section dicts
+    themselves, so hundreds of assets stay cheap.
+    """
+    __slots__ = ("asset_id", "oper", "health", "gas", "kpi", "ts", "running", "history", "analytics",
+                 "commanded", "values", "rollups", "alarms")
+
+    def __init__(self, asset_id, oper, health, gas=None, running=False):
+        self.asset_id = asset_id
+        self.oper = oper
+        self.health = health
+        self.gas = gas
+        self.kpi = {}
+        self.ts = None
+        self.running = running
+        self.history = None
+        self.analytics = None
+        self.commanded = {}     # last speed/valve setpoints, echoed to producers on ingest
+        self.values = None      # current readings in schema slot order (see twin.schema)
+        self.rollups = None     # 1s/1m/1h aggregates of history (see twin.rollup)
+        self.alarms = None      # alarm state machines and event log (see twin.alarms)
+
+    def setpoints(self, speed=None, valve=None):
+        if isinstance(speed, (int, float)):
+            self.oper["speed"] = self.commanded["speed"] = float(speed)
+        if isinstance(valve, (int, float)):
+            self.oper["valve"] = self.commanded["valve"] = float(valve)
+
+    def snapshot(self):
+        snap = {"asset": self.asset_id, "oper": self.oper, "health": self.health,
+                "ts": self.ts, "running": self.running}
+        if self.gas is not None:
+            snap["gas"] = self.gas
+            snap["kpi"] = self.kpi
+        return snap
+
+
+class AssetRegistry:
+    """Bounded mapping of asset ID -> AssetState.
+
+    ``factory(asset_id)`` builds the initial state the first time an asset
+    is seen; IDs are restricted to a safe charset since they end up in
+    room names and URLs.
+    """
+
+    def __init__(self, factory, max_assets=MAX_ASSETS):
+        self._factory = factory
+        self._assets = {}
+        self._lock = threading.Lock()
+        self.max_assets = max_assets
+
+    def __len__(self):
+        return len(self._assets)
+
+    def __iter__(self):
+        return iter(list(self._assets.values()))
+
+    def __contains__(self, asset_id):
+        return asset_id in self._assets
+
+    def get(self, asset_id):
+        return self._assets.get(asset_id)
+
+    def get_or_create(self, asset_id):
+        st = self._assets.get(asset_id)
+        if st is not None:
+            return st
+        if not valid_asset_id(asset_id):
+            raise ValueError(f"invalid asset id: {asset_id!r}")
+        with self._lock:
+            st = self._assets.get(asset_id)
+            if st is None:
+                if len(self._assets) >= self.max_assets:
+                    raise RegistryFull(f"asset registry full ({self.max_assets})")
+                st = self._assets[asset_id] = self._factory(asset_id)
+        return st
+
+    def ids(self):
+        return sorted(self._assets)
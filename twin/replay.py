@@ -0,0 +1,165 @@
+"""Server-side replay of a recorded history window.
+
+A replay copies a ``(ts, columns)`` window out of a history source (the
+ring buffer or the durable log) and feeds it back through ingest into a
+target asset, so it gets the same KPI, analytics and broadcast treatment
+as live telemetry and any dashboard in the target's room sees it.
+
+Pacing follows the recorded timestamps scaled by ``speed`` (1 = real
+time, 10, 100, ...); ``speed=0`` ("max") pushes chunks as fast as the
+ingest queue drains them.  Each session runs as one background task and
+is paced in ``tick_s`` steps, so a 100x replay of 10 Hz data still
+submits a handful of batches per second rather than one per row.
+"""
+import os
+import time
+import uuid
+import logging
+
+import numpy as np
+
+from twin.history import iso
+
+log = logging.getLogger("twin.replay")
+
+MAX_SESSIONS = int(os.getenv("WGC_REPLAY_MAX", "4"))
+MAX_ROWS = int(os.getenv("WGC_REPLAY_MAX_ROWS", "1000000"))
+TICK_S = float(os.getenv("WGC_REPLAY_TICK_S", "0.05"))
+CHUNK = int(os.getenv("WGC_REPLAY_CHUNK", "500"))       # rows per submit at max speed
+
+
+class ReplayError(Exception):
+    """Raised for a replay that cannot be started (bad speed, empty window, too many sessions)."""
+
+
+def parse_speed(value):
+    """``"max"`` -> 0, otherwise a positive multiple of real time (``"10"``, ``"10x"``, 10)."""
+    if value is None:
+        return 1.0
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value == "max":
+            return 0.0
+        value = value.removesuffix("x")
+    try:
+        speed = float(value)
+    except (TypeError, ValueError):
+        raise ReplayError(f"invalid speed: {value!r}") from None
+    if not speed > 0:
+        raise ReplayError("speed must be > 0 or 'max'")
+    return speed
+
+
+class ReplaySession:
+    __slots__ = ("id", "source", "target", "speed", "ts", "data", "cursor", "state", "started", "error")
+
+    def __init__(self, source, target, speed, ts, data):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.target = target
+        self.speed = speed
+        self.ts = ts
+        self.data = data        # (columns, rows)
+        self.cursor = 0         # next row to submit
+        self.state = "running"
+        self.started = None
+        self.error = None
+
+    def describe(self):
+        n = len(self.ts)
+        return {"id": self.id, "source": self.source, "asset": self.target,
+                "speed": self.speed or "max", "state": self.state,
+                "from": iso(float(self.ts[0])), "to": iso(float(self.ts[-1])),
+                "rows": n, "sent": self.cursor, "progress": round(self.cursor / n, 4),
+                "error": self.error}
+
+
+class ReplayEngine:
+    """Runs replay sessions as background tasks.
+
+    ``feed(target, ts, rows)`` submits one chunk -- ``ts`` a list of epoch
+    seconds, ``rows`` the matching value lists in column order -- and may
+    raise one of ``retry`` to signal backpressure; the chunk is then
+    retried after ``tick_s``.  Any other exception fails the session.
+    ``busy()`` (optional) holds max-speed replays back while the ingest
+    queue is filling up.  ``notify(session)`` is called on every state
+    change so the app can tell the target room.
+    """
+
+    def __init__(self, socketio, feed, retry=(), busy=None, notify=None, max_sessions=MAX_SESSIONS,
+                 max_rows=MAX_ROWS, tick_s=TICK_S, chunk=CHUNK):
+        self.socketio = socketio
+        self.feed = feed
+        self.retry = tuple(retry)
+        self.busy = busy or (lambda: False)
+        self.notify = notify or (lambda session: None)
+        self.max_sessions = max_sessions
+        self.max_rows = max_rows
+        self.tick_s = tick_s
+        self.chunk = chunk
+        self.sessions = {}
+
+    def active(self):
+        return [s for s in self.sessions.values() if s.state == "running"]
+
+    def start(self, hist, source, target, t0=None, t1=None, speed=1.0):
+        """Copy ``hist``'s window ``[t0, t1]`` and start replaying it into ``target``."""
+        if len(self.active()) >= self.max_sessions:
+            raise ReplayError(f"too many active replays ({self.max_sessions})")
+        ts, cols = hist.range(t0, t1)
+        if not len(ts):
+            raise ReplayError("no history in the requested range")
+        if len(ts) > self.max_rows:
+            raise ReplayError(f"range holds {len(ts)} rows (limit {self.max_rows})")
+        # copied so the ring can keep wrapping (or the log rotating) underneath
+        data = np.vstack([cols[c] for c in hist.columns])
+        session = ReplaySession(source, target, speed, np.array(ts, dtype=np.float64), data)
+        # finished sessions are kept for inspection until the next start
+        self.sessions = {k: s for k, s in self.sessions.items() if s.state == "running"}
+        self.sessions[session.id] = session
+        self.socketio.start_background_task(self._run, session)
+        return session
+
+    def stop(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None and session.state == "running":
+            session.state = "stopped"
+            self.notify(session)
+        return session
+
+    def _submit(self, session, a, b):
+        ts = session.ts[a:b].tolist()
+        rows = session.data[:, a:b].T.tolist()
+        while session.state == "running":
+            try:
+                self.feed(session.target, ts, rows)
+                session.cursor = b
+                return
+            except self.retry as e:
+                log.debug("replay %s held back: %s", session.id, e)
+                self.socketio.sleep(self.tick_s)
+
+    def _run(self, session):
+        ts, n = session.ts, len(session.ts)
+        session.started = time.monotonic()
+        self.notify(session)
+        try:
+            while session.state == "running" and session.cursor < n:
+                a = session.cursor
+                if session.speed:
+                    # every row whose scaled offset has elapsed, capped per tick
+                    now_ts = ts[0] + (time.monotonic() - session.started) * session.speed
+                    b = min(int(np.searchsorted(ts, now_ts, side="right")), a + self.chunk * 4)
+                elif self.busy():
+                    b = a
+                else:
+                    b = min(a + self.chunk, n)
+                if b > a:
+                    self._submit(session, a, b)
+                self.socketio.sleep(self.tick_s if session.speed or b == a else 0)
+            if session.state == "running":
+                session.state = "done"
+        except Exception as e:
+            log.warning("replay %s failed: %s", session.id, e)
+            session.state, session.error = "failed", str(e)
+        self.notify(session)
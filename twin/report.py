@@ -0,0 +1,358 @@
+"""Daily and shift reports computed on the server from its own history.
+
+A report covers one period -- a calendar day or a shift, in
+``WGC_REPORT_TZ`` -- and holds, for the rows the server has in that
+period (ring buffer, or the durable log for older days):
+
+* time-weighted mean / min / max / last of every history column and of
+  the KPIs (``compute_wgc_kpis_batch``),
+* per alarm type and severity the number of episodes and the time spent
+  in it, from the rows replayed through the alarm engine
+  (``twin.alarms``), so on-delay, deadband and off-delay apply as they
+  did live; the engine starts cleared at the period start,
+* time in each vibration band (worst of the three axes).
+
+Each row stands for the interval since the previous row, capped at
+``WGC_REPORT_GAP_S``, so gaps in telemetry do not count as time in band.
+
+Reports are built by one background task in chunks of ``WGC_REPORT_CHUNK``
+rows with a cooperative yield between chunks, so a day at 10 Hz does not
+hold up ingest.  A finished report is encoded once and cached per
+``(asset, period)``; reports of periods still running are rebuilt after
+``WGC_REPORT_TTL_S``.  The task also builds the report of each period
+that just ended, so it is ready before anyone asks for it.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from twin.history import iso
+from twin.kpi import compute_wgc_kpis_batch, ALARMS, SEVERITIES, VIB_BANDS, DEFAULTS
+from twin.alarms import AssetAlarms, RULES, INPUTS as ALARM_INPUTS
+
+log = logging.getLogger("twin.report")
+
+TZ = ZoneInfo(os.getenv("WGC_REPORT_TZ", "UTC"))
+SHIFTS = os.getenv("WGC_REPORT_SHIFTS", "06:00,18:00")
+GAP_S = float(os.getenv("WGC_REPORT_GAP_S", "10"))
+TTL_S = float(os.getenv("WGC_REPORT_TTL_S", "300"))
+CACHE_SIZE = int(os.getenv("WGC_REPORT_CACHE", "256"))
+CHUNK = int(os.getenv("WGC_REPORT_CHUNK", "50000"))
+POLL_S = 1.0
+
+KINDS = ("day", "shift")
+KPI_NAMES = ("compression_ratio", "surge_margin_pct", "head_index_norm", "efficiency_index")
+
+
+def parse_shifts(spec):
+    """``"06:00,18:00"`` -> sorted shift start offsets from midnight (``timedelta``)."""
+    starts = []
+    for part in spec.split(","):
+        part = part.strip()
+        if part:
+            h, _, m = part.partition(":")
+            starts.append(timedelta(hours=int(h), minutes=int(m or 0)))
+    if not starts:
+        raise ValueError("at least one shift start is needed")
+    return sorted(set(starts))
+
+
+def period_bounds(kind, at, tz=TZ, shifts=None):
+    """``(id, t0, t1)`` of the ``kind`` period containing epoch ``at`` (``t1`` exclusive)."""
+    local = datetime.fromtimestamp(at, tz)
+    midnight = datetime(local.year, local.month, local.day, tzinfo=tz)
+    if kind == "day":
+        start, end = midnight, midnight + timedelta(days=1)
+        label = start.date().isoformat()
+    elif kind == "shift":
+        shifts = shifts or parse_shifts(SHIFTS)
+        # candidates from yesterday's last shift through tomorrow's first
+        starts = [midnight - timedelta(days=1) + shifts[-1]] + [midnight + s for s in shifts] + \
+                 [midnight + timedelta(days=1) + shifts[0]]
+        i = max(k for k, s in enumerate(starts[:-1]) if s <= local)
+        start, end = starts[i], starts[i + 1]
+        label = start.strftime("%Y-%m-%dT%H:%M")
+    else:
+        raise ValueError(f"unknown period: {kind} (day or shift)")
+    # wall-clock arithmetic: a day with a DST change is 23 or 25 h long
+    return f"{kind}:{label}", start.timestamp(), end.timestamp()
+
+
+class _Stats:
+    """Time-weighted accumulators for a set of named columns."""
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        n = len(self.names)
+        self.wsum = np.zeros(n)
+        self.wt = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.last = np.full(n, np.nan)
+
+    def add(self, data, dt):
+        """``data`` shaped ``(names, rows)``, ``dt`` the seconds each row stands for."""
+        ok = data == data
+        w = np.where(ok, dt, 0.0)
+        self.wsum += (np.where(ok, data, 0.0) * w).sum(axis=1)
+        self.wt += w.sum(axis=1)
+        self.min = np.fmin(self.min, np.where(ok, data, np.inf).min(axis=1))
+        self.max = np.fmax(self.max, np.where(ok, data, -np.inf).max(axis=1))
+        pos = np.where(ok, np.arange(data.shape[1]), -1).max(axis=1)
+        has = pos >= 0
+        self.last[has] = data[has, pos[has]]
+
+    def result(self):
+        out = {}
+        for i, name in enumerate(self.names):
+            if not np.isfinite(self.min[i]):
+                out[name] = None
+                continue
+            mean = self.wsum[i] / self.wt[i] if self.wt[i] else None
+            out[name] = {"mean": None if mean is None else round(float(mean), 4),
+                         "min": round(float(self.min[i]), 4), "max": round(float(self.max[i]), 4),
+                         "last": round(float(self.last[i]), 4)}
+        return out
+
+
+class _Builder:
+    """Folds chunks of history rows (in time order) into one report."""
+
+    def __init__(self, columns, rename, gap_s):
+        self.columns = tuple(columns)
+        self.rename = rename or {}
+        self.gap_s = gap_s
+        self.signals = _Stats(self.columns)
+        self.kpis = _Stats([k for k in KPI_NAMES if k not in self.columns])
+        self.alarm_s = {a: np.zeros(len(SEVERITIES)) for a, _, _ in ALARMS}
+        self.alarm_n = {a: np.zeros(len(SEVERITIES), dtype=np.int64) for a, _, _ in ALARMS}
+        self.engine = AssetAlarms(None, history=1)
+        self.quiet = False      # the last row fed to the engine raised nothing and left nothing pending
+        self.band_s = np.zeros(len(VIB_BANDS))
+        self.rows = 0
+        self.seconds = 0.0
+        self.first = self.prev_ts = None
+
+    def add(self, ts, data):
+        if not len(ts):
+            return
+        if self.first is None:
+            self.first = float(ts[0])
+        # each row covers the interval since the row before it (gaps excluded)
+        dt = np.diff(ts, prepend=ts[0] if self.prev_ts is None else self.prev_ts)
+        dt[(dt < 0) | (dt > self.gap_s)] = 0.0
+        self.prev_ts = float(ts[-1])
+        self.rows += len(ts)
+        self.seconds += float(dt.sum())
+        data = np.asarray(data, dtype=np.float64)
+        self.signals.add(data, dt)
+
+        cols = {self.rename.get(c, c): data[i] for i, c in enumerate(self.columns)}
+        res = compute_wgc_kpis_batch({k: v for k, v in cols.items() if k in DEFAULTS})
+        if self.kpis.names:
+            self.kpis.add(np.vstack([res[k] for k in self.kpis.names]), dt)
+        self._alarms({**cols, "surge_margin_pct": res["surge_margin_pct"]}, res, ts, dt)
+        vib = np.fmax(np.fmax(res["vib_band_axial"], res["vib_band_vert"]), res["vib_band_horz"])
+        axes = [cols[k] for k in ("vib_axial", "vib_vert", "vib_horz") if k in cols]
+        if axes:
+            # rows without any vibration reading are not time in a band
+            dt = np.where(np.isfinite(np.vstack(axes)).any(axis=0), dt, 0.0)
+        self.band_s += np.bincount(vib.astype(np.int64), weights=dt, minlength=len(VIB_BANDS))
+
+    def _alarms(self, inputs, res, ts, dt):
+        inputs = {k: inputs[k] for k in ALARM_INPUTS if k in inputs}
+        # quiet rows (every rule reads inside its limits) change nothing while no alarm is raised,
+        # so only the first of a run of them goes through the engine
+        quiet = np.ones(len(ts), dtype=bool)
+        for _, key, _ in ALARMS:
+            quiet &= res[key] == 0
+        for rule in RULES:
+            present = [inputs[k] for k in rule.inputs if k in inputs]
+            if present:
+                quiet &= np.isfinite(np.vstack(present)).any(axis=0)
+        engine, names = self.engine, list(inputs)
+        rows = np.vstack([inputs[k] for k in names]).T.tolist() if names else [[]] * len(ts)
+        levels = np.zeros((len(engine.alarms), len(ts)), dtype=np.int64)
+        for i, epoch in enumerate(ts.tolist()):
+            if quiet[i] and self.quiet:
+                continue
+            for ev in engine.update(epoch, dict(zip(names, rows[i]))):
+                if ev["event"] in ("raise", "escalate", "deescalate"):
+                    self.alarm_n[ev["type"]][SEVERITIES.index(ev["severity"])] += 1
+            raised = [a.level for a in engine.alarms]
+            levels[:, i] = raised
+            self.quiet = bool(quiet[i]) and not any(raised)
+        for alarm, level in zip(engine.alarms, levels):
+            self.alarm_s[alarm.rule.type] += np.bincount(level, weights=dt, minlength=len(SEVERITIES))
+
+    def result(self):
+        total = float(self.band_s.sum())
+        signals = self.signals.result()
+        alarms = {}
+        for name, _, _ in ALARMS:
+            alarms[name] = {SEVERITIES[s]: {"count": int(self.alarm_n[name][s]),
+                                            "seconds": round(float(self.alarm_s[name][s]), 1)}
+                            for s in range(1, len(SEVERITIES))}
+        return {
+            "coverage": {"rows": self.rows, "seconds": round(self.seconds, 1),
+                         "first": iso(self.first) if self.first is not None else None,
+                         "last": iso(self.prev_ts) if self.prev_ts is not None else None},
+            "signals": signals,
+            "kpi": {**self.kpis.result(), **{k: v for k, v in signals.items() if k in KPI_NAMES}},
+            "alarms": alarms,
+            "vibration_bands": {band: {"seconds": round(float(s), 1),
+                                       "pct": round(100.0 * float(s) / total, 2) if total else None}
+                                for band, s in zip(VIB_BANDS, self.band_s)},
+        }
+
+
+class Report:
+    __slots__ = ("asset", "id", "kind", "t0", "t1", "complete", "body", "etag", "built")
+
+    def __init__(self, asset, pid, kind, t0, t1, complete, payload):
+        self.asset = asset
+        self.id = pid
+        self.kind = kind
+        self.t0 = t0
+        self.t1 = t1
+        self.complete = complete
+        self.body = json.dumps(payload, separators=(",", ":"))
+        self.etag = hashlib.sha1(self.body.encode()).hexdigest()[:16]
+        self.built = time.monotonic()
+
+    def describe(self):
+        return {"asset": self.asset, "id": self.id, "period": self.kind, "from": iso(self.t0),
+                "to": iso(self.t1), "complete": self.complete, "state": "ready"}
+
+
+class ReportService:
+    """Builds reports in one background task and caches them per ``(asset, period)``.
+
+    ``source(asset_id, t0, t1)`` returns a history source (``segments()``,
+    ``columns``) holding that window, or None; ``assets()`` lists the asset
+    IDs whose just-ended periods are built ahead of time.  ``rename`` maps
+    history column names to the names the KPI engine expects.
+    """
+
+    def __init__(self, socketio, source, assets=None, rename=None, tz=TZ, shifts=SHIFTS, gap_s=GAP_S,
+                 ttl_s=TTL_S, cache_size=CACHE_SIZE, chunk=CHUNK):
+        self.socketio = socketio
+        self.source = source
+        self.assets = assets or (lambda: ())
+        self.rename = rename
+        self.tz = tz
+        self.shifts = parse_shifts(shifts)
+        self.gap_s = gap_s
+        self.ttl_s = ttl_s
+        self.cache_size = cache_size
+        self.chunk = chunk
+        self._cache = OrderedDict()     # (asset, id) -> Report
+        self._queue = deque()
+        self._pending = {}              # (asset, id) -> (kind, t0, t1)
+        self._closed = {}               # kind -> id of the period last seen running
+        self._task = None
+
+    def bounds(self, kind, at=None):
+        return period_bounds(kind, time.time() if at is None else at, self.tz, self.shifts)
+
+    def get(self, asset_id, kind, at=None):
+        """``(report, None)`` when cached, else ``(None, state)`` with the build queued.
+
+        A cached report of a running period older than ``ttl_s`` is still
+        returned while its rebuild is queued.
+        """
+        pid, t0, t1 = self.bounds(kind, at)
+        key = (asset_id, pid)
+        rep = self._cache.get(key)
+        if rep is not None:
+            self._cache.move_to_end(key)
+            if not rep.complete and time.monotonic() - rep.built >= self.ttl_s:
+                self._enqueue(key, kind, t0, t1)
+            return rep, None
+        self._enqueue(key, kind, t0, t1)
+        return None, {"asset": asset_id, "id": pid, "period": kind, "from": iso(t0), "to": iso(t1),
+                      "state": "pending"}
+
+    def list(self, asset_id=None):
+        out = [r.describe() for (a, _), r in self._cache.items() if asset_id in (None, a)]
+        out += [{"asset": a, "id": pid, "period": kind, "from": iso(t0), "to": iso(t1), "state": "pending"}
+                for (a, pid), (kind, t0, t1) in self._pending.items() if asset_id in (None, a)]
+        return out
+
+    def forget(self, asset_id):
+        """Drop an asset's cached reports (its history was cleared)."""
+        for key in [k for k in self._cache if k[0] == asset_id]:
+            del self._cache[key]
+
+    def _enqueue(self, key, kind, t0, t1):
+        if key not in self._pending:
+            self._pending[key] = (kind, t0, t1)
+            self._queue.append(key)
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+
+    def start(self):
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+
+    def build(self, asset_id, kind, t0, t1):
+        pid = period_bounds(kind, t0, self.tz, self.shifts)[0]
+        complete = time.time() >= t1
+        hist = self.source(asset_id, t0, t1)
+        payload = {"asset": asset_id, "id": pid, "period": kind, "from": iso(t0), "to": iso(t1),
+                   "tz": str(self.tz), "complete": complete, "generated": iso(time.time())}
+        builder = _Builder(hist.columns if hist is not None else (), self.rename, self.gap_s)
+        if hist is not None:
+            # t1 is exclusive; segments() bounds are inclusive
+            for ts, data in hist.segments(t0, np.nextafter(t1, -np.inf)):
+                for a in range(0, len(ts), self.chunk):
+                    b = a + self.chunk
+                    # copied: the ring may wrap underneath between chunks
+                    builder.add(np.array(ts[a:b]), np.array(data[:, a:b], dtype=np.float64))
+                    self.socketio.sleep(0)
+        payload.update(builder.result())
+        return Report(asset_id, pid, kind, t0, t1, complete, payload)
+
+    def _store(self, rep):
+        key = (rep.asset, rep.id)
+        self._cache[key] = rep
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _schedule_closed(self):
+        # when a period ends, queue its final report for every asset
+        now = time.time()
+        for kind in KINDS:
+            pid, t0, _ = self.bounds(kind, now)
+            last = self._closed.get(kind)
+            self._closed[kind] = pid
+            if last is None or last == pid:
+                continue
+            prev_id, p0, p1 = self.bounds(kind, t0 - 1.0)
+            for asset_id in self.assets():
+                self._enqueue((asset_id, prev_id), kind, p0, p1)
+
+    def _run(self):
+        while True:
+            try:
+                self._schedule_closed()
+                while self._queue:
+                    key = self._queue.popleft()
+                    kind, t0, t1 = self._pending[key]
+                    try:
+                        self._store(self.build(key[0], kind, t0, t1))
+                    except Exception as e:
+                        log.warning("report %s/%s failed: %s", key[0], key[1], e)
+                    finally:
+                        self._pending.pop(key, None)
+            except Exception as e:
+                log.warning("report worker error: %s", e)
+            self.socketio.sleep(POLL_S)
@@ -0,0 +1,269 @@
+"""Multi-resolution rollups (1 s / 1 min / 1 h by default) kept up to date at ingest.
+
+Each tier holds fixed-width time buckets with per-signal ``mean``,
+``min``, ``max``, ``last`` and ``count``.  Only the finest tier sees raw
+samples: when one of its buckets closes, the bucket's aggregates are
+merged into the next tier's open bucket, and so on up.  A sample
+therefore only updates one small open bucket, whatever the number of
+tiers.
+
+Closed buckets go into one ``RingHistory`` per aggregate, so every tier
+is bounded (``WGC_ROLLUPS``; the default ``1s:3600,1m:10080,1h:2160``
+keeps 1 h, 7 days and 90 days) and ``Rollups.view(tier, agg)`` has the same
+``columns`` / ``segments()`` / ``range()`` surface as the raw history:
+downsampled queries and exports run on it unchanged.  Bucket timestamps
+are bucket starts; a view includes the still-open bucket as its last row.
+"""
+import os
+import math
+
+import numpy as np
+
+from twin.history import RingHistory
+
+AGGS = ("mean", "min", "max", "last", "count")
+_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0}
+
+
+def parse_tiers(spec):
+    """``"1s:21600,1m:10080"`` -> ``[("1s", 1.0, 21600), ("1m", 60.0, 10080)]`` (finest first)."""
+    tiers = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        label, _, cap = part.partition(":")
+        width = float(label[:-1]) * _UNITS[label[-1]]
+        tiers.append((label, width, int(cap)))
+    tiers.sort(key=lambda t: t[1])
+    for (_, fine, _), (label, coarse, _) in zip(tiers, tiers[1:]):
+        if coarse % fine:
+            raise ValueError(f"rollup tier {label} is not a multiple of the tier below it")
+    return tiers
+
+
+TIERS = parse_tiers(os.getenv("WGC_ROLLUPS", "1s:3600,1m:10080,1h:2160"))
+
+
+class _Bucket:
+    """Accumulators of one open bucket (one entry per signal).
+
+    Plain lists: per-sample updates on a dozen signals are several times
+    faster in Python than as NumPy calls on tiny arrays.
+    """
+
+    __slots__ = ("start", "min", "max", "sum", "count", "last")
+
+    def __init__(self, ncols):
+        self.start = None
+        self.min = [math.inf] * ncols
+        self.max = [-math.inf] * ncols
+        self.sum = [0.0] * ncols
+        self.count = [0] * ncols
+        self.last = [math.nan] * ncols
+
+    def reset(self, start):
+        n = len(self.sum)
+        self.start = start
+        self.min, self.max = [math.inf] * n, [-math.inf] * n
+        self.sum, self.count, self.last = [0.0] * n, [0] * n, [math.nan] * n
+
+    def add(self, values):
+        mn, mx, sm, cnt, last = self.min, self.max, self.sum, self.count, self.last
+        for i, x in enumerate(values):
+            if x is None or x != x:
+                continue
+            if x < mn[i]:
+                mn[i] = x
+            if x > mx[i]:
+                mx[i] = x
+            sm[i] += x
+            cnt[i] += 1
+            last[i] = x
+
+    def merge(self, other):
+        mn, mx, sm, cnt, last = self.min, self.max, self.sum, self.count, self.last
+        for i, c in enumerate(other.count):
+            if c:
+                mn[i] = min(mn[i], other.min[i])
+                mx[i] = max(mx[i], other.max[i])
+                sm[i] += other.sum[i]
+                cnt[i] += c
+                last[i] = other.last[i]
+
+    def row(self):
+        """``{agg: values}`` of this bucket (NaN where a signal had no samples)."""
+        cnt = np.array(self.count, dtype=np.float64)
+        empty = cnt == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(empty, math.nan, np.array(self.sum) / cnt)
+        return {"mean": mean, "min": np.where(empty, math.nan, self.min),
+                "max": np.where(empty, math.nan, self.max), "last": np.array(self.last), "count": cnt}
+
+
+def _group(ts, width, mn, mx, sm, cnt, last):
+    """Fold consecutive rows (raw samples or buckets) into ``width``-second buckets.
+
+    Arrays are ``(ncols, rows)``; returns the bucket starts and the same
+    five aggregates per bucket.
+    """
+    starts = np.floor(ts / width) * width
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    pos = np.where(last == last, np.arange(len(ts)), -1)
+    li = np.maximum.reduceat(pos, first, axis=1)
+    out_last = np.take_along_axis(last, np.maximum(li, 0), axis=1)
+    out_last[li < 0] = math.nan
+    return (starts[first], np.fmin.reduceat(mn, first, axis=1), np.fmax.reduceat(mx, first, axis=1),
+            np.add.reduceat(sm, first, axis=1), np.add.reduceat(cnt, first, axis=1), out_last)
+
+
+class _Tier:
+    def __init__(self, label, width, capacity, columns):
+        self.label = label
+        self.width = width
+        self.rings = {a: RingHistory(columns, capacity) for a in AGGS}
+        self.open = _Bucket(len(columns))
+
+    def bucket(self, ts):
+        return math.floor(ts / self.width) * self.width
+
+    def store(self):
+        """Move the open bucket's aggregates into the rings (the accumulators are left as they are)."""
+        b = self.open
+        for agg, vals in b.row().items():
+            self.rings[agg].append(b.start, vals)
+
+
+class TierView:
+    """One aggregate of one tier, shaped like ``RingHistory`` for queries and exports."""
+
+    def __init__(self, tier, agg):
+        self.tier = tier
+        self.agg = agg
+        self.ring = tier.rings[agg]
+        self.columns = self.ring.columns
+        self.index = self.ring.index
+        self.label = tier.label
+        self.width = tier.width
+
+    def __len__(self):
+        return len(self.ring) + (self.tier.open.start is not None)
+
+    @property
+    def first_ts(self):
+        first = self.ring.first_ts
+        return self.tier.open.start if first is None else first
+
+    @property
+    def last_ts(self):
+        open_ts = self.tier.open.start
+        return self.ring.last_ts if open_ts is None else open_ts
+
+    def segments(self, t0=None, t1=None):
+        out = self.ring.segments(t0, t1)
+        b = self.tier.open
+        if b.start is not None and (t0 is None or b.start >= t0) and (t1 is None or b.start <= t1):
+            row = b.row()[self.agg].astype(self.ring.data.dtype)
+            out.append((np.array([b.start]), row[:, None]))
+        return out
+
+    def range(self, t0=None, t1=None, columns=None):
+        names = self.columns if columns is None else tuple(columns)
+        idx = [self.index[c] for c in names]
+        segs = self.segments(t0, t1)
+        if not segs:
+            return np.empty(0), {c: np.empty(0, dtype=self.ring.data.dtype) for c in names}
+        ts = np.concatenate([s[0] for s in segs])
+        return ts, {c: np.concatenate([s[1][i] for s in segs]) for c, i in zip(names, idx)}
+
+
+class Rollups:
+    """All tiers of one asset; ``append`` is called once per ingested sample.
+
+    A tier's open bucket only holds the closed buckets of the tier below
+    it, so a coarse tier's newest row trails by the finer tiers' open
+    buckets (at most one minute for the 1 h tier with the defaults).
+    """
+
+    def __init__(self, columns, tiers=TIERS):
+        self.columns = tuple(columns)
+        self.tiers = [_Tier(label, width, cap, self.columns) for label, width, cap in tiers]
+        self.by_label = {t.label: t for t in self.tiers}
+
+    def append(self, ts, values):
+        """Add one sample (``values`` in column order, None/NaN = missing)."""
+        tier = self.tiers[0]
+        b, start = tier.open, tier.bucket(ts)
+        # an out-of-order sample is folded into the newest bucket
+        if b.start is None or start > b.start:
+            if b.start is not None:
+                tier.store()
+                self._push(1, b)
+            b.reset(start)
+        b.add(values)
+
+    def _push(self, i, child):
+        # merge a bucket that just closed in tier i-1 into tier i
+        if i == len(self.tiers):
+            return
+        tier = self.tiers[i]
+        b, start = tier.open, tier.bucket(child.start)
+        if b.start is None or start > b.start:
+            if b.start is not None:
+                tier.store()
+                self._push(i + 1, b)
+            b.reset(start)
+        b.merge(child)
+
+    def extend(self, ts, data):
+        """Bulk-load rows (``data`` shaped ``(columns, rows)``) into empty rollups, e.g. at startup."""
+        if not len(ts):
+            return
+        v = np.asarray(data, dtype=np.float64)
+        ok = v == v
+        agg = (np.asarray(ts, dtype=np.float64), np.where(ok, v, math.inf), np.where(ok, v, -math.inf),
+               np.where(ok, v, 0.0), ok.astype(np.float64), v)
+        for tier in self.tiers:
+            starts, mn, mx, sm, cnt, last = _group(agg[0], tier.width, *agg[1:])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(cnt == 0, math.nan, sm / cnt)
+            closed = {"mean": mean, "min": np.where(cnt == 0, math.nan, mn),
+                      "max": np.where(cnt == 0, math.nan, mx), "last": last, "count": cnt}
+            for name, vals in closed.items():
+                tier.rings[name].extend(starts[:-1], vals[:, :-1])
+            b = tier.open
+            b.start = float(starts[-1])
+            b.min, b.max, b.sum, b.last = (mn[:, -1].tolist(), mx[:, -1].tolist(), sm[:, -1].tolist(),
+                                           last[:, -1].tolist())
+            b.count = cnt[:, -1].astype(np.int64).tolist()
+            # the next tier is built from this one's closed buckets only
+            agg = (starts[:-1], mn[:, :-1], mx[:, :-1], sm[:, :-1], cnt[:, :-1], last[:, :-1])
+            if not len(agg[0]):
+                break
+
+    def load(self, hist):
+        """Rebuild every tier from the rows of ``hist`` (a ``RingHistory`` with the same columns)."""
+        self.clear()
+        segs = hist.segments()
+        if segs:
+            self.extend(np.concatenate([ts for ts, _ in segs]), np.concatenate([d for _, d in segs], axis=1))
+
+    def clear(self):
+        for tier in self.tiers:
+            for ring in tier.rings.values():
+                ring.clear()
+            tier.open.start = None
+
+    def views(self, agg="mean"):
+        """One view per tier, coarsest first."""
+        if agg not in AGGS:
+            raise ValueError(f"unknown agg: {agg}")
+        return [TierView(t, agg) for t in reversed(self.tiers)]
+
+    def view(self, label, agg="mean"):
+        if agg not in AGGS:
+            raise ValueError(f"unknown agg: {agg}")
+        tier = self.by_label.get(label)
+        if tier is None:
+            raise ValueError(f"unknown tier: {label}")
+        return TierView(tier, agg)
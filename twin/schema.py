@@ -0,0 +1,165 @@
+"""Declared telemetry schema, compiled once into a fast validator.
+
+``SIGNALS`` lists every numeric field a sample may carry -- section,
+canonical name, unit, plausible range and accepted aliases -- in one
+fixed order shared by both servers.  ``Validator`` compiles it into
+per-section lookup tables, so checking a sample is one dict hit per
+field it actually carries:
+
+* either spelling of a field is accepted (``v_ax`` / ``vib_axial``, ...);
+  each app presents the signal under its own name (``present``),
+* numbers and numeric strings are coerced to float, ``None`` and NaN
+  mean "no reading", anything else (bools, objects, out-of-range values,
+  unknown fields) rejects the whole sample with ``SchemaError``,
+* the result is a list of ``(slot, value)`` pairs, so state, history rows
+  and analytics are updated by position rather than by dict lookups.
+
+A producer timestamp (``ts``) is checked by ``sample_epoch``: finite
+epoch seconds (or an ISO string) within ``TS_MIN`` .. ``TS_MAX``, so a
+value in milliseconds is refused at the request, not in the worker.
+"""
+import math
+from collections import namedtuple
+
+from twin.history import to_epoch
+
+Signal = namedtuple("Signal", "section name unit lo hi aliases")
+
+SIGNALS = (
+    Signal("oper", "T1", "K", 150.0, 700.0, ()),
+    Signal("oper", "T2", "K", 150.0, 900.0, ()),
+    Signal("oper", "P1", "bar", 0.0, 300.0, ()),
+    Signal("oper", "P2", "bar", 0.0, 500.0, ()),
+    Signal("oper", "flow", "kg/s", 0.0, 1000.0, ()),
+    Signal("oper", "speed", "rpm", 0.0, 30000.0, ()),
+    Signal("oper", "valve", "%", 0.0, 100.0, ()),
+    Signal("health", "vib_axial", "mm/s", 0.0, 100.0, ("v_ax",)),
+    Signal("health", "vib_vert", "mm/s", 0.0, 100.0, ("v_vert",)),
+    Signal("health", "vib_horz", "mm/s", 0.0, 100.0, ("v_horz",)),
+    Signal("health", "lube_oil_pressure", "bar", 0.0, 50.0, ("oil_pressure",)),
+    Signal("health", "bearing_temp", "K", 200.0, 600.0, ()),
+    Signal("health", "oil_temp", "K", 200.0, 600.0, ()),
+    Signal("health", "seal_leakage", "L/min", 0.0, 100.0, ("seal_leak",)),
+    Signal("gas", "mw", "g/mol", 1.0, 200.0, ()),
+    Signal("gas", "glr", "", 0.0, 1e6, ()),
+    Signal("gas", "water_ppm", "ppm", 0.0, 1e6, ()),
+)
+
+
+class SchemaError(ValueError):
+    """A sample that does not match the telemetry schema."""
+
+
+TS_MIN = 946684800.0     # 2000-01-01
+TS_MAX = 4102444800.0    # 2100-01-01
+
+
+def sample_epoch(value):
+    """Epoch seconds of a sample's ``ts`` (number, numeric or ISO string), None when absent."""
+    if value is None or value == "":
+        return None
+    if value.__class__ is bool or not isinstance(value, (int, float, str)):
+        raise SchemaError("ts: not a timestamp")
+    try:
+        epoch = to_epoch(value)
+    except (ValueError, OverflowError):
+        raise SchemaError(f"ts: not a timestamp: {value!r}") from None
+    if not math.isfinite(epoch):
+        raise SchemaError("ts: not a finite number")
+    if not TS_MIN <= epoch <= TS_MAX:
+        hint = " (milliseconds? ts is in seconds)" if TS_MIN <= epoch / 1000 <= TS_MAX else ""
+        raise SchemaError(f"ts: {epoch:g} outside the plausible epoch range{hint}")
+    return epoch
+
+
+class Validator:
+    """``SIGNALS`` (or a subset, e.g. by ``sections``) compiled for one app.
+
+    ``present`` maps canonical names to the names the app stores and
+    serves (its state dicts and history columns); ``passthrough`` is a set
+    of ``(section, field)`` pairs that are not validated here and left to
+    the caller (e.g. the gas composition mapping).
+    """
+
+    def __init__(self, sections=("oper", "health", "gas"), present=None, passthrough=(), signals=SIGNALS):
+        present = present or {}
+        self.signals = tuple(s for s in signals if s.section in sections)
+        self.names = tuple(present.get(s.name, s.name) for s in self.signals)
+        self.slot = {name: i for i, name in enumerate(self.names)}
+        self.canonical = {name: s.name for s, name in zip(self.signals, self.names)}
+        self._lookup = {sec: {} for sec in sections}
+        for i, (s, name) in enumerate(zip(self.signals, self.names)):
+            entry = (i, s.lo, s.hi)
+            for key in (s.name, name) + s.aliases:
+                self._lookup[s.section][key] = entry
+        self._passthrough = frozenset(passthrough)
+
+    def __len__(self):
+        return len(self.signals)
+
+    def slots(self, columns):
+        """Slot of each of ``columns`` (presented names), for building rows by position."""
+        return [self.slot[c] for c in columns]
+
+    def parse(self, sample):
+        """``[(slot, value), ...]`` for the fields ``sample`` carries; raises ``SchemaError``."""
+        if not isinstance(sample, dict):
+            raise SchemaError("each sample must be a JSON object")
+        out = []
+        for sec, fields in self._lookup.items():
+            block = sample.get(sec)
+            if not block:
+                continue
+            if not isinstance(block, dict):
+                raise SchemaError(f"{sec} must be an object")
+            for key, v in block.items():
+                f = fields.get(key)
+                if f is None:
+                    if (sec, key) in self._passthrough:
+                        continue
+                    raise SchemaError(f"unknown field {sec}.{key}")
+                if v is None:
+                    continue
+                if v.__class__ is not float:
+                    if v.__class__ is bool or not isinstance(v, (int, float, str)):
+                        raise SchemaError(f"{sec}.{key}: not a number")
+                    try:
+                        v = float(v)
+                    except ValueError:
+                        raise SchemaError(f"{sec}.{key}: not a number") from None
+                slot, lo, hi = f
+                if not lo <= v <= hi:
+                    if v != v:
+                        continue
+                    s = self.signals[slot]
+                    raise SchemaError(f"{sec}.{key}: {v:g} outside [{lo:g}, {hi:g}] {s.unit}".rstrip())
+                out.append((slot, v))
+        return out
+
+    def values_of(self, st):
+        """Current values of ``st``'s section dicts in slot order (NaN = no reading)."""
+        vals = []
+        for s, name in zip(self.signals, self.names):
+            v = (getattr(st, s.section) or {}).get(name)
+            vals.append(math.nan if v is None else float(v))
+        return vals
+
+    def apply(self, st, updates):
+        """Write parsed ``updates`` into ``st.values`` and its section dicts."""
+        if st.values is None:
+            st.values = self.values_of(st)
+        vals, signals, names = st.values, self.signals, self.names
+        for slot, v in updates:
+            vals[slot] = v
+            getattr(st, signals[slot].section)[names[slot]] = v
+        return vals
+
+    def named(self, updates):
+        """``(name, value)`` pairs of ``updates`` under the presented names."""
+        names = self.names
+        return [(names[slot], v) for slot, v in updates]
+
+    def describe(self):
+        return [{"section": s.section, "name": name, "unit": s.unit, "min": s.lo, "max": s.hi,
+                 "aliases": sorted({s.name, *s.aliases} - {name})}
+                for s, name in zip(self.signals, self.names)]
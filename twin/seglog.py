@@ -0,0 +1,319 @@
+"""Optional durable history: an append-only, segmented telemetry log per asset.
+
+Each asset gets a directory of numbered segment files.  A segment is a
+small header followed by fixed-width little-endian records::
+
+    header   b"WGCL" | u16 version | u16 ncols | u32 header_len | names ("\\n"-joined, NUL-padded to 8 bytes)
+    record   f8 ts | f4 value[ncols]
+
+Ingest only packs records into an in-memory buffer; a background task
+writes the buffers out every ``WGC_LOG_FLUSH_S`` seconds, rotating to a
+new segment past ``WGC_LOG_SEGMENT_MB`` and fsyncing according to
+``WGC_LOG_FSYNC`` (``never`` | ``interval`` | ``always``).  Every process
+start opens a fresh segment, so a torn record from a crash is only ever
+at the end of a closed segment, where readers ignore it.  Under eventlet
+the fsync runs in a native thread (``tpool``) so it does not stall the hub.
+
+A row older than the one before it (a replay after a reset) starts a new
+segment; readers follow the newest run of segments whose timestamps
+ascend, so a reset log reads like the reset ring buffer, while the older
+segments stay on disk until retention removes them.
+
+Reads go through ``np.memmap`` (cached per segment and refreshed when a
+segment is added, removed or grows): ``SegmentLog`` offers the same
+``segments()`` / ``range()`` / ``columns`` surface as ``RingHistory`` so
+queries and exports can be served from disk, and ``load_into`` refills a
+ring buffer at startup with one bulk copy.
+"""
+import os
+import time
+import atexit
+import fcntl
+import functools
+import struct
+import logging
+import threading
+
+import numpy as np
+
+log = logging.getLogger("twin.seglog")
+
+LOG_DIR = os.getenv("WGC_LOG_DIR", "")
+FSYNC = os.getenv("WGC_LOG_FSYNC", "interval")
+FSYNC_INTERVAL_S = float(os.getenv("WGC_LOG_FSYNC_S", "1.0"))
+FLUSH_S = float(os.getenv("WGC_LOG_FLUSH_S", "0.5"))
+SEGMENT_BYTES = int(float(os.getenv("WGC_LOG_SEGMENT_MB", "64")) * 1024 * 1024)
+RETAIN_SEGMENTS = int(os.getenv("WGC_LOG_RETAIN_SEGMENTS", "0"))   # 0 = keep all
+
+MAGIC = b"WGCL"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+SUFFIX = ".wgcl"
+
+
+def _header(columns):
+    names = "\n".join(columns).encode("utf-8")
+    size = _HEADER.size + len(names)
+    size += -size % 8
+    return _HEADER.pack(MAGIC, VERSION, len(columns), size) + names.ljust(size - _HEADER.size, b"\0")
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        head = f.read(_HEADER.size)
+        if len(head) < _HEADER.size:
+            return None
+        magic, version, ncols, size = _HEADER.unpack(head)
+        if magic != MAGIC or version != VERSION:
+            return None
+        names = f.read(size - _HEADER.size).rstrip(b"\0").decode("utf-8")
+    return (tuple(names.split("\n")) if ncols else ()), size
+
+
+class SegmentLog:
+    """Append-only segmented log of ``(ts, values)`` rows for one asset."""
+
+    def __init__(self, directory, columns, segment_bytes=SEGMENT_BYTES, fsync=FSYNC,
+                 retain=RETAIN_SEGMENTS):
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.index = {c: i for i, c in enumerate(self.columns)}
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.retain = retain
+        self.dtype = np.dtype([("ts", "<f8"), ("v", "<f4", (len(self.columns),))])
+        self._record = struct.Struct("<d%df" % len(self.columns))
+        self._pending = bytearray()
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._last_fsync = 0.0
+        self._last_ts = None
+        self._cuts = []          # offsets in _pending where a new segment must start
+        self._mapped = {}        # path -> (size, memmap or None)
+        self._cache = None       # (signature, maps)
+        self.sync = os.fsync
+        os.makedirs(directory, exist_ok=True)
+
+    # ---- writing ----
+    def append(self, ts, values):
+        """Queue one row; it reaches disk on the next ``flush``."""
+        rec = self._record.pack(ts, *[np.nan if v is None else v for v in values])
+        with self._lock:
+            if self._last_ts is not None and ts < self._last_ts:
+                self._cuts.append(len(self._pending))
+            self._pending += rec
+            self._last_ts = ts
+
+    def flush(self):
+        with self._lock:
+            buf, self._pending = self._pending, bytearray()
+            cuts, self._cuts = self._cuts, []
+        if not buf:
+            return 0
+        rec, start = self._record.size, 0
+        for i, end in enumerate(cuts + [len(buf)]):
+            view, start = memoryview(buf)[start:end], end
+            fresh = i > 0      # timestamps went backwards: keep each segment ascending
+            while view or fresh:
+                if fresh or self._file is None or self._size >= self.segment_bytes:
+                    self._rotate()
+                    fresh = False
+                room = max(rec, (self.segment_bytes - self._size) // rec * rec)
+                self._file.write(view[:room])
+                self._size += len(view[:room])
+                view = view[room:]
+        self._file.flush()
+        self._cache = None
+        now = time.monotonic()
+        if self.fsync == "always" or (self.fsync == "interval" and now - self._last_fsync >= FSYNC_INTERVAL_S):
+            self.sync(self._file.fileno())
+            self._last_fsync = now
+        return len(buf) // self._record.size
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            if self.fsync != "never":
+                self.sync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        if self._file is not None:
+            if self.fsync != "never":
+                self.sync(self._file.fileno())
+            self._file.close()
+        paths = self.paths()
+        seq = int(os.path.basename(paths[-1])[:-len(SUFFIX)]) + 1 if paths else 1
+        path = os.path.join(self.directory, f"{seq:06d}{SUFFIX}")
+        self._file = open(path, "ab")
+        header = _header(self.columns)
+        self._file.write(header)
+        self._size = len(header)
+        if self.retain and len(paths) >= self.retain:
+            for old in paths[:len(paths) - self.retain + 1]:
+                os.remove(old)
+        self._cache = None
+
+    # ---- reading ----
+    def paths(self):
+        return sorted(os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(SUFFIX))
+
+    def _signature(self):
+        # segments are only ever added, removed (both change the directory) or grown at the end
+        paths = self.paths()
+        return os.stat(self.directory).st_mtime_ns, paths, os.path.getsize(paths[-1]) if paths else 0
+
+    def _maps(self):
+        """Memory-mapped record arrays of the newest ascending run of segments, oldest first."""
+        sig = self._signature()
+        if self._cache is not None and self._cache[0] == sig:
+            return self._cache[1]
+        mapped = {}
+        for path in sig[1]:
+            size = os.path.getsize(path)
+            old = self._mapped.get(path)
+            mapped[path] = old if old is not None and old[0] == size else (size, self._map(path, size))
+        self._mapped = mapped
+        out = []
+        for _, m in reversed(mapped.values()):
+            if m is None:
+                continue
+            if out and m["ts"][-1] > out[-1]["ts"][0]:
+                break      # a reset: what came before it no longer reads as history
+            out.append(m)
+        out.reverse()
+        self._cache = (sig, out)
+        return out
+
+    def _map(self, path, size):
+        head = _read_header(path)
+        if head is None or head[0] != self.columns:
+            return None     # foreign or older column layout
+        count = (size - head[1]) // self.dtype.itemsize
+        if count <= 0:
+            return None
+        return np.memmap(path, dtype=self.dtype, mode="r", offset=head[1], shape=(count,))
+
+    def __len__(self):
+        return sum(len(m) for m in self._maps())
+
+    @property
+    def first_ts(self):
+        maps = self._maps()
+        return float(maps[0]["ts"][0]) if maps else None
+
+    @property
+    def last_ts(self):
+        maps = self._maps()
+        return float(maps[-1]["ts"][-1]) if maps else self._last_ts
+
+    def segments(self, t0=None, t1=None):
+        """``(ts, data)`` views like ``RingHistory.segments`` (``data`` is ``(ncols, rows)``)."""
+        out = []
+        for m in self._maps():
+            ts = m["ts"]
+            if (t1 is not None and ts[0] > t1) or (t0 is not None and ts[-1] < t0):
+                continue
+            lo = 0 if t0 is None else int(np.searchsorted(ts, t0, side="left"))
+            hi = len(ts) if t1 is None else int(np.searchsorted(ts, t1, side="right"))
+            if lo < hi:
+                out.append((ts[lo:hi], m["v"][lo:hi].T))
+        return out
+
+    def range(self, t0=None, t1=None, columns=None):
+        names = self.columns if columns is None else tuple(columns)
+        segs = self.segments(t0, t1)
+        if not segs:
+            return np.empty(0), {c: np.empty(0, dtype=np.float32) for c in names}
+        ts = np.concatenate([s[0] for s in segs])
+        return ts, {c: np.concatenate([s[1][self.index[c]] for s in segs]) for c in names}
+
+    def load_into(self, hist):
+        """Refill ``hist`` with the newest rows on disk; returns the row count."""
+        need, picked = hist.capacity, []
+        for m in reversed(self._maps()):
+            picked.append(m[-need:])
+            need -= len(picked[-1])
+            if need <= 0:
+                break
+        n = 0
+        for m in reversed(picked):
+            hist.extend(np.asarray(m["ts"]), np.asarray(m["v"]).T)
+            n += len(m)
+        return n
+
+
+class LogStore:
+    """One ``SegmentLog`` per asset under a root directory, plus the flusher task."""
+
+    def __init__(self, root, columns, flush_s=FLUSH_S):
+        self.root = root
+        self.columns = tuple(columns)
+        self.flush_s = flush_s
+        self.logs = {}
+        self.writer = True
+        self._task = None
+        self._writer_lock = None
+        self.sync = os.fsync
+        os.makedirs(root, exist_ok=True)
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, columns):
+        """The store configured by ``WGC_LOG_DIR``, or None when logging is off."""
+        return cls(LOG_DIR, columns) if LOG_DIR else None
+
+    def claim_writer(self):
+        """Become the one process appending to this store.
+
+        Takes an exclusive ``flock`` on ``<root>/.writer.lock`` (released
+        when the process exits); returns False, and leaves the store
+        read-only, if another process holds it.
+        """
+        self._writer_lock = open(os.path.join(self.root, ".writer.lock"), "a")
+        try:
+            fcntl.flock(self._writer_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.writer = True
+        except OSError:
+            self._writer_lock.close()
+            self._writer_lock = None
+            self.writer = False
+        return self.writer
+
+    def asset_ids(self):
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def get(self, asset_id):
+        lg = self.logs.get(asset_id)
+        if lg is None:
+            lg = self.logs[asset_id] = SegmentLog(os.path.join(self.root, asset_id), self.columns)
+            lg.sync = self.sync
+        return lg
+
+    def flush_all(self):
+        for lg in list(self.logs.values()):
+            try:
+                lg.flush()
+            except OSError as e:
+                log.warning("log flush failed (%s): %s", lg.directory, e)
+
+    def close(self):
+        for lg in list(self.logs.values()):
+            lg.close()
+
+    def start(self, socketio):
+        if self._task is None:
+            if socketio.async_mode == "eventlet":
+                # a blocking fsync would stall every green thread; run it in a native one
+                from eventlet import tpool
+                self.sync = functools.partial(tpool.execute, os.fsync)
+                for lg in self.logs.values():
+                    lg.sync = self.sync
+            self._task = socketio.start_background_task(self._run, socketio)
+
+    def _run(self, socketio):
+        while True:
+            socketio.sleep(self.flush_s)
+            self.flush_all()
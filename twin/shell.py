@@ -0,0 +1,154 @@
+"""Precompiled dashboard shell and fingerprinted, precompressed static assets.
+
+The dashboard HTML no longer embeds per-request state: it is rendered
+once, gzipped once and served with an ETag (``no-cache``, so a reload is
+a 304), and the page fetches its initial snapshot plus a downsampled
+recent-history window in one ``/api/wgc/bootstrap`` request.
+
+Static files are served from ``/assets/<name>?v=<hash>``: the content
+hash is part of the URL, so responses carry a one-year ``immutable``
+Cache-Control and a new build simply changes the URL.  Each file is read
+and compressed on first use and kept in memory.
+
+Third-party libraries are vendored under ``static/vendor`` by running
+``python -m twin.shell`` (the Docker image does it at build time);
+``url()`` falls back to the CDN for a library that has not been vendored
+yet, so a source checkout without network access still works.
+"""
+import os
+import sys
+import gzip
+import hashlib
+import mimetypes
+import urllib.request
+
+from flask import Response
+
+ASSET_PREFIX = "/assets"
+LONG_CACHE = 365 * 24 * 3600
+MIN_GZIP = 512      # bytes; smaller bodies are not worth compressing
+
+# vendored name -> upstream URL (also the fallback while not vendored)
+VENDOR = {
+    "vendor/socket.io.min.js": "https://cdn.jsdelivr.net/npm/socket.io-client@4.7.5/dist/socket.io.min.js",
+    "vendor/chart.umd.min.js": "https://cdn.jsdelivr.net/npm/chart.js@4.4.3/dist/chart.umd.min.js",
+    "vendor/jspdf.umd.min.js": "https://cdnjs.cloudflare.com/ajax/libs/jspdf/2.5.1/jspdf.umd.min.js",
+}
+
+
+class Body:
+    """One pre-encoded response body: raw bytes, gzip variant and ETag."""
+
+    __slots__ = ("data", "gz", "etag", "mimetype")
+
+    def __init__(self, data, mimetype):
+        self.data = data
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(data).hexdigest()[:16]
+        gz = gzip.compress(data, 9, mtime=0) if len(data) >= MIN_GZIP else None
+        self.gz = gz if gz is not None and len(gz) < len(data) else None
+
+    def response(self, request, max_age=0, immutable=False):
+        """ETag'd response (304 on a match), gzipped when the client accepts it."""
+        use_gz = self.gz is not None and "gzip" in request.headers.get("Accept-Encoding", "")
+        resp = Response(self.gz if use_gz else self.data, mimetype=self.mimetype)
+        if use_gz:
+            resp.headers["Content-Encoding"] = "gzip"
+        resp.headers["Vary"] = "Accept-Encoding"
+        resp.set_etag(self.etag)
+        resp.cache_control.public = True
+        if max_age:
+            resp.cache_control.max_age = max_age
+            resp.cache_control.immutable = immutable
+        else:
+            resp.cache_control.no_cache = True
+        return resp.make_conditional(request)
+
+
+def gzip_json(body, request):
+    """Uncached JSON (``body`` already encoded), gzipped when accepted and large enough."""
+    data = body.encode() if isinstance(body, str) else body
+    resp = Response(data, mimetype="application/json")
+    if len(data) >= MIN_GZIP and "gzip" in request.headers.get("Accept-Encoding", ""):
+        resp.set_data(gzip.compress(data, 5))
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.cache_control.no_store = True
+    return resp
+
+
+class StaticAssets:
+    """Files under ``folder`` by relative name, loaded and compressed on first use."""
+
+    def __init__(self, folder, prefix=ASSET_PREFIX, vendor=VENDOR):
+        self.folder = os.path.abspath(folder)
+        self.prefix = prefix
+        self.vendor = vendor
+        self._cache = {}
+
+    def get(self, name):
+        body = self._cache.get(name)
+        if body is None:
+            path = os.path.abspath(os.path.join(self.folder, name))
+            if not path.startswith(self.folder + os.sep) or not os.path.isfile(path):
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            body = self._cache[name] = Body(data, mimetype)
+        return body
+
+    def url(self, name):
+        """Fingerprinted URL of ``name``, or its CDN URL when it is a library not vendored yet."""
+        body = self.get(name)
+        if body is None:
+            return self.vendor.get(name, f"{self.prefix}/{name}")
+        return f"{self.prefix}/{name}?v={body.etag}"
+
+    def response(self, name, request):
+        body = self.get(name)
+        if body is None:
+            return None
+        # only a fingerprinted URL may be cached forever
+        if request.args.get("v") == body.etag:
+            return body.response(request, LONG_CACHE, immutable=True)
+        return body.response(request)
+
+
+class Shell:
+    """An HTML page rendered once (by ``render()``) and served from memory."""
+
+    def __init__(self, render):
+        self.render = render
+        self._body = None
+
+    @property
+    def body(self):
+        if self._body is None:
+            self._body = Body(self.render().encode(), "text/html")
+        return self._body
+
+    def response(self, request):
+        return self.body.response(request)
+
+
+def vendor(folder, names=None):
+    """Download the libraries in ``VENDOR`` into ``folder`` (skips the ones present)."""
+    for name, url in VENDOR.items():
+        if names and name not in names:
+            continue
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as r:
+            data = r.read()
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        print(f"{name}: {len(data)} bytes from {url}")
+
+
+if __name__ == "__main__":
+    # python -m twin.shell [static_dir]
+    vendor(sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "static"))
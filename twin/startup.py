@@ -0,0 +1,211 @@
+"""Startup profile, readiness and lazily imported subsystems.
+
+A cold start (Cloud Run scales to zero) pays for the interpreter, the
+server, Flask / Flask-SocketIO / eventlet and the app's own module-level
+setup before the first sample is applied.  ``Startup`` measures that path:
+
+* ``mark(name)`` closes a phase of module-level setup (time since the
+  previous mark); ``process`` is the time from process start to the
+  ``Startup`` object, i.e. interpreter and server boot,
+* readiness is separate from liveness: ``/healthz`` answers as soon as
+  the process serves requests, ``/readyz`` only once setup has finished
+  (``ready()``) and every registered check passes (e.g. the backplane is
+  connected); both report the phases and the time to the first applied
+  sample (``ingested()``),
+* ``lazy(name)`` stands in for a module (or, with a factory, an object)
+  that only some requests need: it is built on first attribute access and
+  its build time recorded.  A subsystem that is never used is never
+  loaded.  ``warm()`` is opt-in (``WGC_WARM_DELAY_S`` >= 0): it builds
+  the remaining ones from a background task long after startup.
+  That keeps them off the path to the first ingest but still pays for
+  them, i.e. it trades the laziness for a fast first request.
+
+``python -m twin.startup [module]`` prints an import-time profile of
+``module`` (default ``app``) from ``python -X importtime``: the total,
+the cost per top-level package and the slowest modules.
+"""
+import os
+import sys
+import json
+import time
+import importlib
+
+WARM_DELAY_S = float(os.getenv("WGC_WARM_DELAY_S", "-1"))    # seconds after startup; <0 = never (default)
+
+
+def process_start():
+    """Wall-clock start time of this process (Linux ``/proc``), or now when unknown."""
+    try:
+        with open("/proc/self/stat") as f:
+            # the command name (field 2) may contain spaces; fields after it are space-separated
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+class Lazy:
+    """A module or object built on first attribute access."""
+
+    def __init__(self, name, factory, startup):
+        self._name = name
+        self._factory = factory
+        self._startup = startup
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            t = time.perf_counter()
+            self._target = self._factory()
+            self._startup.loaded[self._name] = round(time.perf_counter() - t, 4)
+        return self._target
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+class Startup:
+    """Phase timings and readiness of one app process (created before its other imports)."""
+
+    def __init__(self):
+        self.started = process_start()
+        now = time.time()
+        self.phases = {"process": round(max(0.0, now - self.started), 4)}
+        self.loaded = {}
+        self.checks = {}
+        self.ready_at = None
+        self.first_ingest_at = None
+        self._last = time.perf_counter()
+        self._lazy = []
+
+    def mark(self, name):
+        """Close the phase that began at the previous mark."""
+        now = time.perf_counter()
+        self.phases[name] = round(now - self._last, 4)
+        self._last = now
+
+    def check(self, name, fn):
+        """Readiness also requires ``fn()`` to be true (an exception counts as false)."""
+        self.checks[name] = fn
+
+    def ready(self):
+        """Module-level setup is done."""
+        self.ready_at = time.time()
+
+    def ingested(self):
+        if self.first_ingest_at is None:
+            self.first_ingest_at = time.time()
+
+    def lazy(self, name, factory=None):
+        """``name`` imported (or ``factory()`` called) on first use."""
+        obj = Lazy(name, factory or (lambda: importlib.import_module(name)), self)
+        self._lazy.append(obj)
+        return obj
+
+    def warm(self, socketio, *fns, delay=WARM_DELAY_S):
+        """Build every lazy object, then call ``fns``, ``delay`` seconds after startup."""
+        if delay < 0:
+            return
+
+        def run():
+            socketio.sleep(delay)
+            for obj in self._lazy:
+                obj._load()
+                socketio.sleep(0)
+            for fn in fns:
+                fn()
+
+        socketio.start_background_task(run)
+
+    def _since(self, t):
+        return None if t is None else round(t - self.started, 4)
+
+    def status(self):
+        """``(ready, body)`` for ``/readyz`` and ``/healthz``."""
+        failing = []
+        for name, fn in self.checks.items():
+            try:
+                ok = fn()
+            except Exception:
+                ok = False
+            if not ok:
+                failing.append(name)
+        ready = self.ready_at is not None and not failing
+        return ready, {"ready": ready, "failing": failing, "pid": os.getpid(),
+                       "uptime_s": round(time.time() - self.started, 3),
+                       "ready_s": self._since(self.ready_at), "first_ingest_s": self._since(self.first_ingest_at),
+                       "phases": self.phases, "loaded": self.loaded,
+                       "lazy": [obj._name for obj in self._lazy if not obj.loaded]}
+
+
+def import_profile(module="app", cwd=None, env=None):
+    """Parse ``python -X importtime -c 'import <module>'`` into ``[(depth, name, self_us, cum_us)]``."""
+    import subprocess   # tooling only; kept off the app's import path
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue    # the header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def summarize(rows, module="app", top=20):
+    """Cost of importing ``module``: total, per top-level package and the ``top`` slowest modules.
+
+    Only ``module``'s own import tree counts; what the interpreter imports
+    before it (``site``, ``encodings``, ...) is reported as ``interpreter_ms``.
+    """
+    end = next(i for i, r in enumerate(rows) if r[0] == 0 and r[1] == module)
+    start = max((i for i, r in enumerate(rows[:end]) if r[0] == 0), default=-1) + 1
+    tree = rows[start:end + 1]
+    packages = {}
+    for _, name, self_us, _ in tree:
+        pkg = name.split(".")[0]
+        packages[pkg] = packages.get(pkg, 0) + self_us
+    before = sum(r[3] for r in rows[:start] if r[0] == 0)
+    return {"module": module, "total_ms": round(rows[end][3] / 1000, 1), "interpreter_ms": round(before / 1000, 1),
+            "packages": [{"package": p, "ms": round(us / 1000, 1)}
+                         for p, us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]],
+            "modules": [{"module": name, "self_ms": round(s / 1000, 1), "cum_ms": round(c / 1000, 1)}
+                        for _, name, s, c in sorted(tree, key=lambda r: -r[2])[:top]]}
+
+
+def main():
+    import argparse
+    p = argparse.ArgumentParser(description="Import-time profile of a module (python -X importtime)")
+    p.add_argument("module", nargs="?", default="app")
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.getenv("PYTHONPATH")])))
+    out = summarize(import_profile(args.module, cwd=root, env=env), args.module, args.top)
+    if args.json:
+        print(json.dumps(out, indent=2))
+        return 0
+    print(f"import {args.module}: {out['total_ms']} ms (interpreter startup before it: {out['interpreter_ms']} ms)\n")
+    print(f"{'package':<32}{'ms':>9}")
+    for r in out["packages"]:
+        print(f"{r['package']:<32}{r['ms']:>9}")
+    print(f"\n{'module':<48}{'self ms':>9}{'cum ms':>9}")
+    for r in out["modules"]:
+        print(f"{r['module']:<48}{r['self_ms']:>9}{r['cum_ms']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Opt-in packed binary wire format for Socket.IO telemetry.
+
+Instead of JSON objects with full field names, a packed frame is a fixed
+little-endian struct whose field order is agreed once per connection
+(the ``wgc_schema`` handshake)::
+
+    flags  u8      bit 0 = running
+    pad    7 bytes
+    ts     f8      epoch seconds
+    value  f4 x N  in schema order; NaN = missing
+
+Socket.IO carries the frame as a binary attachment, so a 14-signal
+sample is 72 bytes on the wire and needs no JSON encode/decode.  Clients
+opt in with ``?wire=packed`` on connect.
+"""
+import math
+import struct
+
+PACKED = "packed"
+ROOM_SUFFIX = "|packed"
+FLAG_RUNNING = 1
+
+
+class PackedSchema:
+    """Field order and struct for packed frames; ``fields`` are ``(section, name)`` pairs."""
+
+    version = 1
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._struct = struct.Struct("<B7xd%df" % len(self.fields))
+        self.size = self._struct.size
+
+    def describe(self):
+        """Handshake payload sent to clients (``wgc_schema``)."""
+        return {"version": self.version, "size": self.size,
+                "header": "<B7xd", "value": "<f4",
+                "fields": [f"{sec}.{name}" for sec, name in self.fields]}
+
+    def pack(self, sections, ts, flags=0):
+        """Frame for ``sections`` (``{"oper": {...}, "health": {...}}``)."""
+        vals = []
+        for sec, name in self.fields:
+            v = (sections.get(sec) or {}).get(name)
+            vals.append(math.nan if v is None else v)
+        return self._struct.pack(flags, ts or 0.0, *vals)
+
+    def unpack(self, frame):
+        """``(flags, ts, sections)``; NaN values are left out of ``sections``.
+
+        Raises ``ValueError`` for anything but a frame of exactly ``size`` bytes.
+        """
+        if not isinstance(frame, (bytes, bytearray, memoryview)) or len(frame) != self.size:
+            got = f"{len(frame)} bytes" if isinstance(frame, (bytes, bytearray, memoryview)) else type(frame).__name__
+            raise ValueError(f"packed frame: expected {self.size} bytes, got {got}")
+        flags, ts, *vals = self._struct.unpack(bytes(frame))
+        sections = {}
+        for (sec, name), v in zip(self.fields, vals):
+            if v == v:
+                sections.setdefault(sec, {})[name] = v
+        return flags, ts, sections
+
+
+def packed_room(room):
+    """Room for clients of ``room`` that asked for packed frames."""
+    return room + ROOM_SUFFIX
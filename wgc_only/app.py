@@ -1,117 +1,163 @@
 
-from collections import deque
-from datetime import datetime
+import os
+import sys
+
+# shared `twin` package lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# startup profile and readiness (../twin/startup.py), created before the other imports
+from twin.startup import Startup
+STARTUP = Startup()
+
+import time
 from flask import Flask, render_template, redirect, url_for, Response, request
-from flask_socketio import SocketIO
-import csv
-import io
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
+from twin.registry import AssetRegistry, AssetState, RegistryFull, DEFAULT_ASSET, room_for, valid_asset_id
+from twin.fanout import Broadcaster, subscription_args
+from twin.history import RingHistory, iso, to_epoch
+from twin.rollup import Rollups
+from twin.kpi import compute_wgc_kpis
+from twin.api import history_json, range_args, signal_args, pick_source, cached_json, max_points_arg
+from twin.seglog import LogStore
+from twin.wire import PackedSchema, PACKED
+from twin import metrics
+from twin.analytics import AssetAnalytics, detect_signals
+from twin.perfmap import PerformanceMap
+from twin.schema import Validator, SchemaError
+from twin.alarms import AssetAlarms, history_args, INPUTS as ALARM_INPUTS
+
+# imported on first use (or by the opt-in warm-up, WGC_WARM_DELAY_S)
+export = STARTUP.lazy("twin.export")
+report = STARTUP.lazy("twin.report")
+STARTUP.mark("imports")
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # --------- WGC STATE + HISTORY ---------
-wgc_state = {
-    "running": True,
-    "gas": {
-        "mw": 18.0,
-        "glr": 1000.0,
-        "water_ppm": 50,
-        "composition": {"CH4": 0.8, "C2H6": 0.07, "C3H8": 0.04, "CO2": 0.05, "H2S": 0.01, "H2O": 0.03},
-    },
-    "oper": {
-        "T1": 300.0, "T2": 360.0,     # K
-        "P1": 3.0, "P2": 9.0,         # bar abs
-        "flow": 25.0,                 # kg/s
-        "speed": 7800.0,              # rpm
-        "valve": 65.0                 # % open
-    },
-    "health": {
-        "vib_axial": 2.0, "vib_vert": 2.5, "vib_horz": 2.2,  # mm/s RMS
-        "bearing_temp": 345.0,                               # K
-        "oil_temp": 325.0,                                   # K
-        "lube_oil_pressure": 3.2,                            # bar
-        "seal_leakage": 0.1                                  # L/min
-    },
-    "kpi": {}
-}
-
-WGC_HISTORY_MAX = 2000
-wgc_history = deque(maxlen=WGC_HISTORY_MAX)
-
-def compute_wgc_kpis(state):
-    oper = state.get("oper", {})
-    gas = state.get("gas", {})
-    health = state.get("health", {})
-
-    P1 = float(oper.get("P1", 1.0))
-    P2 = float(oper.get("P2", 1.0))
-    T1 = float(oper.get("T1", 300.0))
-    T2 = float(oper.get("T2", 350.0))
-    flow = float(oper.get("flow", 10.0))
-    speed = float(oper.get("speed", 6000.0))
-    valve = float(oper.get("valve", 50.0))
-    mw = float(gas.get("mw", 18.0))
-    glr = float(gas.get("glr", 1000.0))
-
-    # Compression ratio
-    cr = P2 / max(P1, 1e-6)
-
-    # Polytropic-ish head index (illustrative only)
-    n = 1.3
-    Rspec = 8.314 / (mw / 1000.0)  # J/kg-K
-    head_index = (n/(n-1.0)) * Rspec * T1 * ((cr)**((n-1.0)/n) - 1.0)
-    head_index_norm = head_index / 50000.0
-
-    # Surge margin heuristic vs simple surge line
-    surge_flow = max(0.2*speed/1000.0 + 10.0, 1e-3)
-    sm = (flow - surge_flow) / surge_flow
-    sm_pct = sm * 100.0
-
-    # Efficiency index (demo)
-    dT = max(T2 - T1, 1e-3)
-    eff_idx = max(0.0, min(100.0, 80.0 - 0.15*dT + 5.0*(1.0/cr)))
-
-    # Vibration bands
-    def vib_band(v):
-        if v < 3.5: return "OK"
-        if v < 7.1: return "Warning"
-        return "Trip"
-    vib_axial = float(health.get("vib_axial", 2.0))
-    vib_vert  = float(health.get("vib_vert", 2.0))
-    vib_horz  = float(health.get("vib_horz", 2.0))
-    vib_status = {
-        "axial": {"value": vib_axial, "band": vib_band(vib_axial)},
-        "vertical": {"value": vib_vert, "band": vib_band(vib_vert)},
-        "horizontal": {"value": vib_horz, "band": vib_band(vib_horz)},
-    }
-
-    oil_p = float(health.get("lube_oil_pressure", 3.0))
-    bearingT = float(health.get("bearing_temp", 345.0))
-    oilT = float(health.get("oil_temp", 325.0))
-    seal_leak = float(health.get("seal_leakage", 0.1))
-
-    alarms = []
-    if sm_pct < 10.0:
-        alarms.append({"type": "Surge", "message": "Low surge margin", "severity": "Warn" if sm_pct>0 else "Trip"})
-    if vib_axial>=7.1 or vib_vert>=7.1 or vib_horz>=7.1:
-        alarms.append({"type": "Vibration", "message": "High vibration level", "severity": "Trip"})
-    elif vib_axial>=3.5 or vib_vert>=3.5 or vib_horz>=3.5:
-        alarms.append({"type": "Vibration", "message": "Vibration caution", "severity": "Warn"})
-    if oil_p < 2.0:
-        alarms.append({"type": "LubeOil", "message": "Low lube oil pressure", "severity": "Trip" if oil_p<1.5 else "Warn"})
-    if bearingT > 370.0:
-        alarms.append({"type": "Bearing", "message": "High bearing temperature", "severity": "Warn"})
-    if seal_leak > 0.5:
-        alarms.append({"type": "Seal", "message": "Excessive seal leakage", "severity": "Warn"})
-
-    return {
-        "compression_ratio": cr,
-        "head_index_norm": head_index_norm,
-        "surge_margin_pct": sm_pct,
-        "efficiency_index": eff_idx,
-        "vibration": vib_status,
-        "alarms": alarms
-    }
+# history columns (CSV order) and the decimals each is exported with
+HISTORY_COLUMNS = (
+    "flow","P1","P2","T1","T2","speed","valve",
+    "vib_axial","vib_vert","vib_horz","lube_oil_pressure","bearing_temp","oil_temp","seal_leakage",
+    "compression_ratio","surge_margin_pct","head_index_norm","efficiency_index"
+)
+HISTORY_DECIMALS = (3,)*14 + (4, 4, 6, 3)
+KPI_COLUMNS = HISTORY_COLUMNS[14:]
+# declared telemetry schema (twin/schema.py); the gas composition mapping is passed through as-is
+SCHEMA = Validator(passthrough={("gas", "composition")})
+SIGNAL_SLOTS = SCHEMA.slots(HISTORY_COLUMNS[:14])
+# alarm inputs (../twin/alarms.py) by name, read from the slot-ordered values
+ALARM_SLOTS = [(name, i) for i, name in enumerate(SCHEMA.names) if name in ALARM_INPUTS]
+# rolling stats for every history column; spike/drift detection on these (WGC_ANOMALY_SIGNALS)
+ANOMALY_SIGNALS = detect_signals(("vib_axial","vib_vert","vib_horz","bearing_temp","oil_temp","lube_oil_pressure","seal_leakage"))
+
+# Opt-in packed ingest (?wire=packed): the server sends `wgc_schema` on connect
+# and the simulator emits `wgc_data_packed` binary frames in that field order.
+INGEST_SCHEMA = PackedSchema(
+    [("oper", f) for f in ("T1","T2","P1","P2","flow","speed","valve")] +
+    [("health", f) for f in ("vib_axial","vib_vert","vib_horz","bearing_temp","oil_temp","lube_oil_pressure","seal_leakage")] +
+    [("gas", f) for f in ("mw","glr","water_ppm")]
+)
+
+# Performance map (synthetic, or WGC_PERFMAP=<file.npz>): built once, looked up per sample
+PERF_MAP = PerformanceMap.from_env()
+
+def _blank_asset(asset_id):
+    # defaults only: also the snapshot of an asset that has not sent data yet
+    return AssetState(
+        asset_id,
+        gas={
+            "mw": 18.0,
+            "glr": 1000.0,
+            "water_ppm": 50,
+            "composition": {"CH4": 0.8, "C2H6": 0.07, "C3H8": 0.04, "CO2": 0.05, "H2S": 0.01, "H2O": 0.03},
+        },
+        oper={
+            "T1": 300.0, "T2": 360.0,     # K
+            "P1": 3.0, "P2": 9.0,         # bar abs
+            "flow": 25.0,                 # kg/s
+            "speed": 7800.0,              # rpm
+            "valve": 65.0                 # % open
+        },
+        health={
+            "vib_axial": 2.0, "vib_vert": 2.5, "vib_horz": 2.2,  # mm/s RMS
+            "bearing_temp": 345.0,                               # K
+            "oil_temp": 325.0,                                   # K
+            "lube_oil_pressure": 3.2,                            # bar
+            "seal_leakage": 0.1                                  # L/min
+        },
+        running=True
+    )
+
+def _new_asset(asset_id):
+    st = _blank_asset(asset_id)
+    st.history = RingHistory(HISTORY_COLUMNS)
+    st.rollups = Rollups(HISTORY_COLUMNS)
+    st.analytics = AssetAnalytics(HISTORY_COLUMNS, detect=ANOMALY_SIGNALS)
+    st.alarms = AssetAlarms(asset_id)
+    return st
+
+assets = AssetRegistry(_new_asset)
+assets.get_or_create(DEFAULT_ASSET)
+
+# Full `update_wgc` on connect, then `update_wgc_delta` with changed fields
+# only (static gas composition is sent once), capped at WGC_MAX_CLIENT_HZ.
+fanout = Broadcaster(socketio, AssetState.snapshot, "update_wgc", "update_wgc_delta")
+
+# Hot-path metrics (WGC_METRICS=1), scraped from /metrics
+INGEST_SECONDS = metrics.histogram("wgc_ingest_seconds", "Ingest handler latency (seconds)")
+INGEST_SAMPLES = metrics.counter("wgc_ingest_samples_total", "Samples applied")
+metrics.register_app(socketio, assets)
+
+def _asset_from_args():
+    # reads never register an asset: only ingest (and commands) create one
+    return assets.get(request.args.get("asset", DEFAULT_ASSET))
+
+def _unknown_asset():
+    asset_id = request.args.get("asset", DEFAULT_ASSET)
+    if not valid_asset_id(asset_id):
+        return {"ok": False, "error": f"invalid asset id: {asset_id!r}"}, 400
+    return {"ok": False, "error": "unknown asset"}, 404
+
+def _asset_for(data):
+    # asset of a socket message, created on first use; None after a `wgc_error`
+    try:
+        return assets.get_or_create(data.get("asset") or DEFAULT_ASSET)
+    except (ValueError, RegistryFull) as e:
+        emit("wgc_error", {"error": str(e)})
+        return None
+
+# Optional durable history (WGC_LOG_DIR); reloaded into the ring buffers at startup
+logstore = LogStore.from_env(HISTORY_COLUMNS)
+if logstore:
+    for _asset_id in logstore.asset_ids():
+        try:
+            _st = assets.get_or_create(_asset_id)
+        except (ValueError, RegistryFull) as e:
+            app.logger.warning("skipping logged asset %s: %s", _asset_id, e)
+            continue
+        if logstore.get(_asset_id).load_into(_st.history):
+            _st.ts = iso(_st.history.last_ts, "seconds")
+            _st.rollups.load(_st.history)
+    logstore.start(socketio)
+
+def _history_source(st, max_points=None):
+    durable = logstore.logs.get(st.asset_id) if logstore else None
+    return pick_source(st.history, durable, request.args, st.rollups, max_points)
+
+def _report_source(asset_id, t0, t1):
+    st = assets.get(asset_id)
+    if st is None:
+        return None
+    durable = logstore.logs.get(asset_id) if logstore else None
+    return pick_source(st.history, durable, {"from": t0, "to": t1})
+
+# daily / shift reports (../twin/report.py), built from history by a background task
+def _report_service():
+    service = report.ReportService(socketio, _report_source, assets=lambda: [st.asset_id for st in assets])
+    service.start()
+    return service
+
+reports = STARTUP.lazy("reports", _report_service)
 
 @app.route("/")
 def home():
@@ -119,73 +165,268 @@ def home():
 
 @app.route("/wgc")
 def wgc():
-    return render_template("wgc.html", wgc=wgc_state)
+    st = _asset_from_args()
+    if st is None:
+        asset_id = request.args.get("asset", DEFAULT_ASSET)
+        if not valid_asset_id(asset_id):
+            return _unknown_asset()
+        # not sending data yet: the page starts from the defaults and joins the asset's room
+        st = _blank_asset(asset_id)
+    return render_template("wgc.html", wgc=st.snapshot())
+
+@app.route("/api/wgc/history")
+def wgc_history():
+    # ?asset=&from=&to=&signals=&max_points=&method=minmax|lttb
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    try:
+        hist = _history_source(st, max_points_arg(request.args))
+        return history_json(hist, request.args)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}, 400
+
+def _export(fmt):
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    try:
+        hist = _history_source(st)
+        t0, t1 = range_args(request.args, hist)
+        signals = signal_args(request.args, hist)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}, 400
+    if fmt == "csv":
+        decimals = [HISTORY_DECIMALS[hist.index[s]] for s in signals]
+        return Response(export.iter_csv(hist, t0, t1, signals, decimals), mimetype="text/csv",
+                        headers={"Content-Disposition":"attachment; filename=wgc_history.csv"})
+    return Response(export.iter_binary(hist, t0, t1, signals), mimetype=export.BINARY_MIMETYPE,
+                    headers={"Content-Disposition":"attachment; filename=wgc_history.wgcb"})
 
 @app.route("/api/wgc/history.csv")
 def wgc_history_csv():
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "timestamp","flow","P1","P2","T1","T2","speed","valve",
-        "vib_axial","vib_vert","vib_horz","lube_oil_pressure","bearing_temp","oil_temp","seal_leakage",
-        "compression_ratio","surge_margin_pct","head_index_norm","efficiency_index"
-    ])
-    for row in wgc_history:
-        writer.writerow([
-            row["ts"], row["flow"], row["P1"], row["P2"], row["T1"], row["T2"], row["speed"], row["valve"],
-            row["v_ax"], row["v_v"], row["v_h"], row["oil_p"], row["bearingT"], row["oilT"], row["seal"],
-            row["cr"], row["sm_pct"], row["head_norm"], row["eff_idx"]
-        ])
-    return Response(output.getvalue(), mimetype="text/csv",
-                    headers={"Content-Disposition":"attachment; filename=wgc_history.csv"})
+    return _export("csv")
+
+@app.route("/api/wgc/history.bin")
+def wgc_history_bin():
+    return _export("bin")
 
 @app.route("/api/wgc/clear", methods=["POST"])
 def wgc_history_clear():
-    wgc_history.clear()
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    st.history.clear()
+    st.rollups.clear()
+    st.alarms.clear()
+    if reports.loaded:
+        reports.forget(st.asset_id)
     return {"ok": True, "message": "history cleared"}
 
+@app.route("/api/wgc/map")
+def wgc_map():
+    # immutable for the life of the process: encoded once, ETag + Cache-Control
+    return cached_json(*PERF_MAP.body, request)
+
+@app.route("/api/wgc/operating-point")
+def wgc_operating_point():
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    op = st.kpi.get("operating_point") or PERF_MAP.operating_point(st.oper.get("flow"), st.oper.get("speed"))
+    return {"asset": st.asset_id, "ts": st.ts, "flow": st.oper.get("flow"), "speed": st.oper.get("speed"), **op}
+
+@app.route("/api/wgc/stats")
+def wgc_stats():
+    # rolling per-signal stats and recent anomalies (?asset=)
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    return {"asset": st.asset_id, **st.analytics.summary()}
+
+@app.route("/api/wgc/alarms")
+def wgc_alarms():
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    return {"asset": st.asset_id, "active": st.alarms.active()}
+
+@app.route("/api/wgc/alarms/history")
+def wgc_alarm_history():
+    # ?asset=&from=&to=&type=&severity=&event=&id=&limit=
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    try:
+        return {"asset": st.asset_id, "events": st.alarms.log.query(**history_args(request.args))}
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}, 400
+
+@app.route("/api/wgc/report")
+def wgc_report():
+    # ?asset=&period=day|shift&at=<epoch|ISO, default now>; 202 + Retry-After while it is built
+    st = _asset_from_args()
+    if st is None:
+        return _unknown_asset()
+    try:
+        rep, pending = reports.get(st.asset_id, request.args.get("period", "day"),
+                                   to_epoch(request.args.get("at")))
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}, 400
+    if rep is None:
+        return {"ok": True, **pending}, 202, {"Retry-After": "1"}
+    return cached_json(rep.body, rep.etag, request, max_age=86400 if rep.complete else 0)
+
+@app.route("/api/wgc/reports")
+def wgc_reports():
+    return {"reports": reports.list(request.args.get("asset"))}
+
+# liveness (/healthz) vs readiness (/readyz, 503 until setup has finished)
+@app.route("/healthz")
+def healthz():
+    return STARTUP.status()[1]
+
+@app.route("/readyz")
+def readyz():
+    ready, body = STARTUP.status()
+    return body, 200 if ready else 503
+
+@app.route("/metrics")
+def prometheus_metrics():
+    if not metrics.ENABLED:
+        return {"ok": False, "error": "metrics disabled (set WGC_METRICS=1)"}, 404
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def _join(asset_id, signals=None, hz=None):
+    # an asset that has not sent data yet is joined all the same; its first update follows
+    room = room_for(asset_id)
+    if signals or hz:
+        # clients with the same (asset, signals, rate) share a group room
+        room = fanout.subscribe(room, signals, hz)
+    join_room(room)
+    st = assets.get(asset_id)
+    if st is not None:
+        emit("update_wgc", fanout.baseline(room, st))
+        emit("wgc_alarms", {"asset": st.asset_id, "active": st.alarms.active()})
+
+def _leave(asset_id):
+    room = room_for(asset_id)
+    for r in rooms():
+        if r == room or r.startswith(room + "/"):
+            leave_room(r)
+
+@socketio.on("connect")
+def handle_connect():
+    # dashboards and the simulator pick their asset with ?asset=<id> (and optionally &signals=&max_hz=)
+    if request.args.get("wire") == PACKED:
+        emit("wgc_schema", INGEST_SCHEMA.describe())
+    try:
+        _, signals, hz = subscription_args(request.args)
+    except ValueError:
+        signals = hz = None
+    _join(request.args.get("asset", DEFAULT_ASSET), signals, hz)
+
+@socketio.on("subscribe")
+def handle_subscribe(data):
+    # {"asset": id | "assets": [ids], "signals": [...], "max_hz": n}
+    try:
+        asset_ids, signals, hz = subscription_args(data or {})
+    except ValueError as e:
+        emit("wgc_error", {"error": str(e)})
+        return
+    for asset_id in asset_ids or [DEFAULT_ASSET]:
+        _leave(asset_id)
+        _join(asset_id, signals, hz)
+
+@socketio.on("unsubscribe")
+def handle_unsubscribe(data):
+    asset_id = (data or {}).get("asset")
+    if isinstance(asset_id, str):
+        _leave(asset_id)
+
+@app.route("/api/wgc/schema")
+def wgc_schema():
+    return {"signals": SCHEMA.describe()}
+
 @socketio.on("wgc_data")
+@metrics.timed(INGEST_SECONDS)
 def handle_wgc_data(data):
-    for section in ("gas","oper","health"):
-        if section in data:
-            wgc_state.setdefault(section, {}).update(data[section])
-    wgc_state["kpi"] = compute_wgc_kpis(wgc_state)
-    oper, h, k = wgc_state["oper"], wgc_state["health"], wgc_state["kpi"]
-    wgc_history.append({
-        "ts": datetime.utcnow().isoformat(timespec="seconds")+"Z",
-        "flow": round(float(oper.get("flow",0)),3),
-        "P1": round(float(oper.get("P1",0)),3),
-        "P2": round(float(oper.get("P2",0)),3),
-        "T1": round(float(oper.get("T1",0)),3),
-        "T2": round(float(oper.get("T2",0)),3),
-        "speed": round(float(oper.get("speed",0)),3),
-        "valve": round(float(oper.get("valve",0)),3),
-        "v_ax": round(float(h.get("vib_axial",0)),3),
-        "v_v": round(float(h.get("vib_vert",0)),3),
-        "v_h": round(float(h.get("vib_horz",0)),3),
-        "oil_p": round(float(h.get("lube_oil_pressure",0)),3),
-        "bearingT": round(float(h.get("bearing_temp",0)),3),
-        "oilT": round(float(h.get("oil_temp",0)),3),
-        "seal": round(float(h.get("seal_leakage",0)),3),
-        "cr": round(float(k.get("compression_ratio",0)),4),
-        "sm_pct": round(float(k.get("surge_margin_pct",0)),4),
-        "head_norm": round(float(k.get("head_index_norm",0)),6),
-        "eff_idx": round(float(k.get("efficiency_index",0)),3),
-    })
-    socketio.emit("update_wgc", wgc_state)
+    try:
+        updates = SCHEMA.parse(data)
+    except SchemaError as e:
+        emit("wgc_error", {"error": str(e)})
+        return
+    st = _asset_for(data)
+    if st is None:
+        return
+    vals = SCHEMA.apply(st, updates)
+    comp = (data.get("gas") or {}).get("composition")
+    if isinstance(comp, dict):
+        st.gas["composition"] = comp
+    st.kpi = compute_wgc_kpis(st.snapshot())
+    # alarms are stateful (st.alarms) and sent as transitions, not re-sent with every update
+    del st.kpi["alarms"]
+    st.kpi["operating_point"] = PERF_MAP.operating_point(st.oper.get("flow"), st.oper.get("speed"))
+    now = time.time()
+    st.ts = iso(now, "seconds")
+    k = st.kpi
+    row = [vals[i] for i in SIGNAL_SLOTS] + [k.get(c, 0) for c in KPI_COLUMNS]
+    now = st.history.append(now, row)
+    st.rollups.append(now, row)
+    if logstore:
+        logstore.get(st.asset_id).append(now, row)
+    for a in st.analytics.update(now, SCHEMA.named(updates)):
+        socketio.emit("wgc_anomaly", {"asset": st.asset_id, **a}, to=fanout.rooms(room_for(st.asset_id)))
+    inputs = {name: vals[i] for name, i in ALARM_SLOTS}
+    inputs["surge_margin_pct"] = k["surge_margin_pct"]
+    for ev in st.alarms.update(now, inputs):
+        socketio.emit("wgc_alarm", ev, to=fanout.rooms(room_for(st.asset_id)))
+    fanout.publish(room_for(st.asset_id), st)
+    INGEST_SAMPLES.inc()
+    STARTUP.ingested()
+
+@socketio.on("wgc_data_packed")
+def handle_wgc_data_packed(frame):
+    # a malformed frame is dropped with a `wgc_error`; values are then checked like JSON samples
+    try:
+        _flags, _ts, data = INGEST_SCHEMA.unpack(frame)
+    except ValueError as e:
+        emit("wgc_error", {"error": str(e)})
+        return
+    data["asset"] = request.args.get("asset") or DEFAULT_ASSET
+    handle_wgc_data(data)
+
+@socketio.on("wgc_alarm_ack")
+def handle_alarm_ack(data):
+    data = data or {}
+    st = assets.get(data.get("asset") or DEFAULT_ASSET)
+    if st is None:
+        emit("wgc_error", {"error": "unknown asset"})
+        return
+    for ev in st.alarms.ack(time.time(), data.get("id"), data.get("type")):
+        socketio.emit("wgc_alarm", ev, to=fanout.rooms(room_for(st.asset_id)))
 
 @socketio.on("wgc_command")
 def handle_wgc_command(data):
-    action = (data or {}).get("action")
+    data = data or {}
+    st = _asset_for(data)
+    if st is None:
+        return
+    room = room_for(st.asset_id)
+    action = data.get("action")
     if action in ("start","stop"):
-        wgc_state["running"] = (action == "start")
-        socketio.emit("wgc_command", {"action": action})
+        st.running = (action == "start")
+        socketio.emit("wgc_command", {"action": action, "asset": st.asset_id}, to=fanout.rooms(room))
     if action == "set":
-        sp = {k: v for k, v in (data or {}).items() if k in ("speed","valve") and v is not None}
+        sp = {k: v for k, v in data.items() if k in ("speed","valve") and v is not None}
         if sp:
-            wgc_state["oper"].update(sp)
-            socketio.emit("wgc_command", {"action":"set", **sp})
-    socketio.emit("update_wgc", wgc_state)
+            st.oper.update(sp)
+            st.values = None    # re-read from the section dicts on the next sample
+            socketio.emit("wgc_command", {"action":"set", "asset": st.asset_id, **sp}, to=fanout.rooms(room))
+    fanout.publish(room, st)
+
+STARTUP.warm(socketio)
+STARTUP.ready()
 
 if __name__ == "__main__":
     socketio.run(app, host="0.0.0.0", port=5050, debug=True)
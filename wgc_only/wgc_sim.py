@@ -1,14 +1,28 @@
 
-import os, time, random
+import os, time, random, struct
 import socketio
 
 URL = os.getenv("TWIN_URL", "http://localhost:5050")
+ASSET = os.getenv("WGC_ASSET", "wgc-1")
+WIRE = os.getenv("SIM_WIRE", "json")   # "packed" = binary frames per the server's wgc_schema
 sio = socketio.Client(reconnection=True, reconnection_attempts=0)
 running = True
+schema = None   # (field list, struct) once the server's wgc_schema arrives
 
 @sio.event
 def connect():
-    print(f"[OK] Connected to {URL} (WGC sim)")
+    print(f"[OK] Connected to {URL} (WGC sim, asset {ASSET})")
+
+@sio.on("wgc_schema")
+def on_wgc_schema(data):
+    global schema
+    fields = [tuple(f.split(".", 1)) for f in data["fields"]]
+    schema = (fields, struct.Struct("<B7xd%df" % len(fields)))
+    print(f"[OK] Packed wire schema v{data['version']}: {len(fields)} fields, {data['size']} bytes/frame")
+
+def pack(payload):
+    fields, st = schema
+    return st.pack(0, time.time(), *[float(payload[sec].get(name, float("nan"))) for sec, name in fields])
 
 @sio.on("wgc_command")
 def on_wgc_command(data):
@@ -35,7 +49,9 @@ def main():
         return sum(c.get(sp,0)*mw_map[sp] for sp in mw_map)
 
     try:
-        sio.connect(URL, wait=True, transports=["websocket","polling"])
+        # ?asset= joins this asset's room so only its commands arrive here
+        wire = "&wire=packed" if WIRE == "packed" else ""
+        sio.connect(f"{URL}?asset={ASSET}{wire}", wait=True, transports=["websocket","polling"])
         flow = 25.0
         speed = 7800.0
         valve = 65.0
@@ -67,6 +83,7 @@ def main():
                 seal_leak= max(0.0, jitter(0.12, 0.03))
 
                 payload = {
+                    "asset": ASSET,
                     "gas": {
                         "mw": mixture_mw(comp),
                         "glr": glr,
@@ -90,7 +107,10 @@ def main():
                         "seal_leakage": seal_leak
                     }
                 }
-                sio.emit("wgc_data", payload, namespace="/")
+                if WIRE == "packed" and schema:
+                    sio.emit("wgc_data_packed", pack(payload), namespace="/")
+                else:
+                    sio.emit("wgc_data", payload, namespace="/")
                 print("Sent WGC:", {k: round(v,2) if isinstance(v,(int,float)) else v for k,v in payload["oper"].items()})
             else:
                 print("WGC sim paused…")